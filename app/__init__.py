@@ -1,6 +1,13 @@
 from flask import Flask, render_template
+from app.backup import BackupWorker
+from app.cache import CatalogCache
 from app.config import Config
-from app.models import get_redis_client
+from app.cli import register_commands
+from app.enrichment import get_refresh_stats
+from app.google_places import GooglePlacesService, create_session
+from app.models import RestaurantModel, get_redis_client
+from app.places_cache import PlacesCache
+from app.rate_limit import parse_rate_limits
 from app.routes import api
 
 
@@ -14,20 +21,86 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Per-endpoint request budgets (a malformed RATE_LIMIT_* value raises here)
+    app.rate_limits = parse_rate_limits(Config)
+
     # Initialize Redis client
     app.redis = get_redis_client()
 
     # Test Redis connection
+    redis_address = Config.REDIS_SOCKET_PATH or f"{Config.REDIS_HOST}:{Config.REDIS_PORT}"
     try:
         app.redis.ping()
-        print(f"✓ Connected to Redis at {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+        print(f"✓ Connected to Redis at {redis_address}")
     except Exception as e:
         print(f"✗ Failed to connect to Redis: {e}")
-        print(f"  Host: {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+        print(f"  Host: {redis_address}")
+    else:
+        # Backfill derived indexes for data created before they existed
+        try:
+            for index in RestaurantModel(app.redis).ensure_indexes():
+                print(f"✓ Rebuilt {index} index")
+        except Exception as e:
+            print(f"✗ Failed to rebuild indexes: {e}")
+
+    # Start the background backup writer
+    app.backup_worker = None
+    if Config.BACKUP_ASYNC:
+        app.backup_worker = BackupWorker(
+            app.redis,
+            Config.BACKUP_INTERVAL_SECONDS,
+            max_pending=Config.BACKUP_COMPACT_MAX_PENDING
+        )
+        app.backup_worker.start()
+
+    # Per-process catalog cache (each gunicorn worker gets its own)
+    app.catalog_cache = None
+    if Config.CATALOG_CACHE_ENABLED:
+        app.catalog_cache = CatalogCache(
+            Config.CATALOG_CACHE_MAX_RESTAURANTS,
+            Config.CATALOG_CACHE_MAX_FILTERS
+        )
+
+    # Google Places response cache (shared through Redis, LRU per worker)
+    app.places_cache = None
+    if Config.PLACES_CACHE_ENABLED:
+        app.places_cache = PlacesCache(
+            app.redis,
+            Config.PLACES_CACHE_TTL_SECONDS,
+            Config.PLACES_CACHE_NEGATIVE_TTL_SECONDS,
+            Config.PLACES_CACHE_LOCAL_SIZE,
+            Config.PLACES_CACHE_LOCAL_TTL_SECONDS
+        )
+
+    # One long-lived Places service per worker, so its pooled session keeps
+    # connections to Google open across requests
+    app.places_service = GooglePlacesService(
+        Config.GOOGLE_PLACES_API_KEY,
+        Config.GOOGLE_PLACES_LOCATION,
+        Config.GOOGLE_PLACES_RADIUS,
+        cache=app.places_cache,
+        api_base_url=Config.GOOGLE_MAPS_API_BASE_URL,
+        session=create_session(
+            pool_size=Config.GOOGLE_HTTP_POOL_SIZE,
+            max_retries=Config.GOOGLE_HTTP_MAX_RETRIES,
+            backoff_factor=Config.GOOGLE_HTTP_BACKOFF_SECONDS
+        ),
+        timeouts={
+            'search': Config.GOOGLE_SEARCH_TIMEOUT_SECONDS,
+            'details': Config.GOOGLE_DETAILS_TIMEOUT_SECONDS,
+            'distance': Config.GOOGLE_DISTANCE_TIMEOUT_SECONDS
+        },
+        distance_budget=Config.GOOGLE_DISTANCE_BUDGET_SECONDS,
+        lookup_workers=Config.GOOGLE_LOOKUP_WORKERS,
+        enrich_search=Config.GOOGLE_SEARCH_ENRICH_DRIVING
+    )
 
     # Register blueprints
     app.register_blueprint(api)
 
+    # Register maintenance CLI commands
+    register_commands(app)
+
     # Main route
     @app.route('/')
     def index():
@@ -38,10 +111,21 @@ def create_app():
     @app.route('/health')
     def health():
         """Health check endpoint for monitoring"""
+        backup = app.backup_worker.stats() if app.backup_worker else None
+        catalog_cache = app.catalog_cache.stats() if app.catalog_cache else None
+        places_cache = app.places_cache.stats() if app.places_cache else None
+        pool = app.redis.connection_pool
+        redis_pool = pool.stats() if hasattr(pool, 'stats') else None
         try:
-            app.redis.ping()
-            return {"status": "healthy", "redis": "connected"}, 200
+            # The stats reads double as the connectivity check (no separate PING round trip)
+            history = RestaurantModel(app.redis).get_history_retention_stats()
+            return {"status": "healthy", "redis": "connected", "redis_pool": redis_pool,
+                    "backup": backup, "catalog_cache": catalog_cache, "places_cache": places_cache,
+                    "places_api_calls": app.places_service.api_call_counts(),
+                    "driving_refresh": get_refresh_stats(app.redis),
+                    "history_retention": history}, 200
         except:
-            return {"status": "unhealthy", "redis": "disconnected"}, 503
+            return {"status": "unhealthy", "redis": "disconnected", "redis_pool": redis_pool,
+                    "backup": backup}, 503
 
     return app
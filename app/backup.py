@@ -0,0 +1,138 @@
+"""Background writer for restaurant backups"""
+import atexit
+import threading
+import time
+from datetime import datetime
+from app.models import RestaurantModel
+
+
+class BackupWorker:
+    """
+    Collects restaurant mutation events and compacts the backup journal into
+    a snapshot on a background thread, at most once per interval (or sooner
+    once max_pending events are waiting), so requests never wait on snapshot
+    I/O and bursts of edits collapse into a single snapshot
+    """
+
+    def __init__(self, redis_client, interval_seconds, max_pending=0):
+        """
+        Initialize the worker (call start() to launch the thread)
+
+        Args:
+            redis_client (redis.Redis): Redis client used to read the catalog
+            interval_seconds (int): Minimum time between two snapshots
+            max_pending (int): Compact early once this many events are pending (0 = never)
+        """
+        self.redis = redis_client
+        self.interval = max(0, interval_seconds)
+        self.max_pending = max_pending
+        self.last_success = None
+        self.last_error = None
+
+        self._pending = 0
+        self._last_write = None
+        self._stopping = False
+        self._thread = None
+        self._condition = threading.Condition()
+        # Serializes snapshot writes between the thread and flush()
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        """Start the background thread and flush pending events at interpreter exit"""
+        if self._thread is not None:
+            return
+        self._last_write = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="backup-worker", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def notify(self, event=None):
+        """
+        Record a mutation event that needs to reach the next snapshot
+
+        Args:
+            event (str, optional): Event description (e.g. "create:12"), informational only
+        """
+        with self._condition:
+            self._pending += 1
+            self._condition.notify()
+
+    def flush(self):
+        """Write a snapshot immediately if any events are pending"""
+        with self._condition:
+            pending = self._pending
+            self._pending = 0
+        if pending:
+            self._write()
+
+    def stop(self, timeout=30):
+        """
+        Stop the background thread after writing any pending events
+
+        Args:
+            timeout (int): Seconds to wait for the final snapshot
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        """
+        Report worker state for monitoring
+
+        Returns:
+            dict: queue_depth, last_success, last_error and interval_seconds
+        """
+        with self._condition:
+            queue_depth = self._pending
+        return {
+            "queue_depth": queue_depth,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "interval_seconds": self.interval
+        }
+
+    def _run(self):
+        """Thread loop: wait for events, debounce, write one snapshot per interval"""
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return  # stop() flushes what is left
+
+                # Debounce: let further events accumulate until the interval has passed
+                while not self._stopping:
+                    remaining = self._seconds_until_next_write()
+                    if remaining <= 0 or (self.max_pending and self._pending >= self.max_pending):
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+
+                self._pending = 0
+
+            self._write()
+
+    def _seconds_until_next_write(self):
+        """Seconds left before another snapshot may be written"""
+        if self._last_write is None:
+            return 0
+        return self._last_write + self.interval - time.monotonic()
+
+    def _write(self):
+        """Write one snapshot, recording the outcome for stats()"""
+        with self._write_lock:
+            try:
+                RestaurantModel(self.redis).backup_to_file()
+                self.last_success = datetime.utcnow().isoformat()
+                self.last_error = None
+            except Exception as e:
+                print(f"Backup failed: {e}")
+                self.last_error = str(e)
+            finally:
+                self._last_write = time.monotonic()
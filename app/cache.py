@@ -0,0 +1,151 @@
+"""Process-local read-through cache of the restaurant catalog"""
+import threading
+from collections import OrderedDict
+
+# Counter bumped after every catalog mutation; a changed value tells every
+# worker process that its cached restaurants and filter results are stale
+CATALOG_VERSION_KEY = "restaurants:version"
+
+# Counter bumped whenever spin history changes (drives the history ETag)
+HISTORY_VERSION_KEY = "history:version"
+
+
+class CatalogCache:
+    """
+    Holds formatted restaurants and resolved filter ID sets for one worker
+    process. Entries are tagged with the catalog version they were read under
+    and dropped as soon as Redis reports a different version, so a mutation in
+    any worker invalidates every cache with one INCR. Both maps are LRU-bounded.
+    """
+
+    def __init__(self, max_restaurants, max_filters):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_restaurants (int): Maximum formatted restaurants kept
+            max_filters (int): Maximum filter results (ID sets) kept
+        """
+        self.max_restaurants = max(1, max_restaurants)
+        self.max_filters = max(1, max_filters)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._version = None
+        self._restaurants = OrderedDict()
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sync(self, version):
+        """
+        Drop every entry if the catalog version moved on
+
+        Args:
+            version (str): Current value of the catalog version counter
+        """
+        with self._lock:
+            if version != self._version:
+                if self._restaurants or self._filters:
+                    self.invalidations += 1
+                self._restaurants.clear()
+                self._filters.clear()
+                self._version = version
+
+    def get_filter(self, filter_key):
+        """
+        Look up a resolved filter
+
+        Args:
+            filter_key (tuple): (category, distance, open_on, within_m)
+
+        Returns:
+            frozenset: Matching restaurant IDs or None on a miss
+        """
+        with self._lock:
+            ids = self._filters.get(filter_key)
+            if ids is None:
+                self.misses += 1
+                return None
+            self._filters.move_to_end(filter_key)
+            self.hits += 1
+            return ids
+
+    def put_filter(self, version, filter_key, ids):
+        """
+        Store a resolved filter read under the given catalog version
+
+        Args:
+            version (str): Catalog version read before the IDs were fetched
+            filter_key (tuple): (category, distance, open_on, within_m)
+            ids (iterable): Matching restaurant IDs
+        """
+        with self._lock:
+            if version != self._version:
+                return
+            self._filters[filter_key] = frozenset(ids)
+            self._filters.move_to_end(filter_key)
+            while len(self._filters) > self.max_filters:
+                self._filters.popitem(last=False)
+
+    def get_restaurants(self, restaurant_ids):
+        """
+        Look up formatted restaurants
+
+        Args:
+            restaurant_ids (iterable): Restaurant IDs (str)
+
+        Returns:
+            tuple: (dict of id -> restaurant copy for the hits, list of missing IDs)
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for rid in restaurant_ids:
+                restaurant = self._restaurants.get(rid)
+                if restaurant is None:
+                    missing.append(rid)
+                    continue
+                self._restaurants.move_to_end(rid)
+                found[rid] = dict(restaurant)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_restaurants(self, version, restaurants):
+        """
+        Store formatted restaurants read under the given catalog version
+
+        Args:
+            version (str): Catalog version read before the hashes were fetched
+            restaurants (list): Formatted restaurant dictionaries
+        """
+        with self._lock:
+            if version != self._version:
+                return
+            for restaurant in restaurants:
+                self._restaurants[restaurant['id']] = dict(restaurant)
+                self._restaurants.move_to_end(restaurant['id'])
+            while len(self._restaurants) > self.max_restaurants:
+                self._restaurants.popitem(last=False)
+
+    def stats(self):
+        """
+        Get cache counters for the health endpoint
+
+        Returns:
+            dict: hits, misses, hit_rate, invalidations, sizes and limits
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+                "restaurants": len(self._restaurants),
+                "max_restaurants": self.max_restaurants,
+                "filters": len(self._filters),
+                "max_filters": self.max_filters
+            }
@@ -0,0 +1,125 @@
+import click
+from flask import current_app
+from app.config import Config
+from app.enrichment import refresh_driving_data
+from app.models import RestaurantModel
+
+
+def register_commands(app):
+    """
+    Register maintenance commands on the Flask CLI (run with `flask --app run <command>`)
+
+    Args:
+        app (Flask): Flask application
+    """
+
+    @app.cli.command('rebuild-open-days')
+    def rebuild_open_days():
+        """Backfill the per-weekday restaurants:open_on:{day} sets"""
+        model = RestaurantModel(current_app.redis)
+        result = model.rebuild_open_days_index()
+
+        day_names = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+        per_day = ", ".join(f"{day_names[day]}={count}" for day, count in result['open_on'].items())
+        click.echo(f"Indexed {result['restaurants_indexed']} restaurants ({per_day})")
+
+    @app.cli.command('rebuild-geo')
+    def rebuild_geo():
+        """Rebuild the restaurants:geo set from the stored lat/lng"""
+        model = RestaurantModel(current_app.redis)
+        result = model.rebuild_geo_index()
+        click.echo(
+            f"Indexed {result['restaurants_indexed']} of {result['restaurants_scanned']} "
+            f"restaurants with coordinates"
+        )
+
+    @app.cli.command('reindex-distances')
+    @click.option('--dry-run', is_flag=True, help='Only report what would change')
+    def reindex_distances(dry_run):
+        """Reclassify distance levels from google_distance/eta and rebuild restaurants:by_distance:*"""
+        model = RestaurantModel(current_app.redis, backup_worker=current_app.backup_worker)
+        result = model.reindex_distance_tiers(dry_run=dry_run)
+
+        per_level = ", ".join(f"{level}={count}" for level, count in result['levels'].items())
+        verb = "Would change" if dry_run else "Changed"
+        click.echo(
+            f"{verb} {result['changed']} of {result['restaurants_indexed']} restaurants "
+            f"({result['estimated']} from straight-line distance, {result['manual']} picked by hand and "
+            f"{result['unclassified']} without driving data or coordinates kept their level; {per_level})"
+        )
+
+    @app.cli.command('restore-backup')
+    @click.argument('backup_file')
+    @click.option('--batch-size', type=int, default=None, help='Restaurants per MULTI/EXEC batch')
+    def restore_backup(backup_file, batch_size):
+        """Stream a backup snapshot (plus journal) back into Redis"""
+        model = RestaurantModel(current_app.redis)
+        result = model.restore_from_file(
+            backup_file,
+            progress=lambda written: click.echo(f"  {written} restaurants written"),
+            batch_size=batch_size
+        )
+        click.echo(
+            f"Restored {result['restaurants_restored']} restaurants and "
+            f"{result['categories_restored']} categories, replayed "
+            f"{result['journal_entries_replayed']} journal entries"
+        )
+
+    @app.cli.command('migrate-history')
+    def migrate_history():
+        """Move the legacy spin_history list into the sorted-set + hash layout"""
+        model = RestaurantModel(current_app.redis)
+        migrated = model.migrate_history_list()
+        click.echo(f"Migrated {migrated} history entries")
+
+    @app.cli.command('trim-history')
+    def trim_history():
+        """Evict spin history older than HISTORY_RETENTION_DAYS in bounded batches"""
+        model = RestaurantModel(current_app.redis)
+        evicted = 0
+        while True:
+            batch = model.trim_history()
+            evicted += batch
+            if batch == 0:
+                break
+        stats = model.get_history_retention_stats()
+        click.echo(f"Evicted {evicted} history entries ({stats['entries']} remaining)")
+
+    @app.cli.command('refresh-driving-data')
+    @click.option('--max-age-days', type=int, default=None, help='Refresh data older than this')
+    @click.option('--batch-size', type=int, default=None, help='Restaurants per Distance Matrix request (max 25)')
+    @click.option('--pause', type=float, default=None, help='Seconds between requests')
+    @click.option('--limit', type=int, default=None, help='Refresh at most this many restaurants')
+    @click.option('--retry-hours', type=float, default=None, help='Wait this long before retrying failed lookups')
+    @click.option('--dry-run', is_flag=True, help='Only report how many restaurants are stale')
+    def refresh_driving(max_age_days, batch_size, pause, limit, retry_hours, dry_run):
+        """Re-fetch stale google_distance/eta for restaurants with a Google place ID"""
+        if not Config.GOOGLE_PLACES_ENABLED or not Config.GOOGLE_PLACES_API_KEY:
+            raise click.ClickException("Google Places feature is not enabled")
+
+        model = RestaurantModel(current_app.redis, backup_worker=current_app.backup_worker)
+        max_age_seconds = (max_age_days if max_age_days is not None else Config.DRIVING_REFRESH_MAX_AGE_DAYS) * 86400
+        retry_after_seconds = (retry_hours if retry_hours is not None else Config.DRIVING_REFRESH_RETRY_HOURS) * 3600
+        if dry_run:
+            stale = model.find_stale_driving_data(max_age_seconds, retry_after_seconds)
+            click.echo(f"{len(stale)} restaurants have stale driving data")
+            return
+
+        stats = refresh_driving_data(
+            model,
+            current_app.places_service,
+            max_age_seconds,
+            batch_size=batch_size or Config.DRIVING_REFRESH_BATCH_SIZE,
+            pause_seconds=pause if pause is not None else Config.DRIVING_REFRESH_PAUSE_SECONDS,
+            limit=limit,
+            retry_after_seconds=retry_after_seconds,
+            progress=lambda s: click.echo(
+                f"  {s['processed']} processed, {s['refreshed']} refreshed, "
+                f"{s['api_calls'].get('distance', 0)} Distance Matrix calls"
+            )
+        )
+        click.echo(
+            f"Refreshed {stats['refreshed']} of {stats['stale']} stale restaurants "
+            f"({stats['failed']} failed, {stats['remaining']} remaining) using "
+            f"{stats['api_calls'].get('distance', 0)} Distance Matrix calls"
+        )
@@ -16,6 +16,28 @@ class Config:
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
     REDIS_DB = int(os.getenv('REDIS_DB', 0))
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', None)
+    # Unix socket path; when set it is used instead of REDIS_HOST/REDIS_PORT
+    REDIS_SOCKET_PATH = os.getenv('REDIS_SOCKET_PATH', '')
+    # Connections per worker; callers wait up to REDIS_POOL_TIMEOUT_SECONDS for one when all are busy
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 20))
+    REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv('REDIS_POOL_TIMEOUT_SECONDS', 5))
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS', 2))
+    REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv('REDIS_SOCKET_TIMEOUT_SECONDS', 5))
+    # Connections idle longer than this are PINGed before reuse (0 = never)
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL_SECONDS', 30))
+    # Retries for commands failing on a timeout or dropped connection (exponential backoff)
+    REDIS_RETRY_ATTEMPTS = int(os.getenv('REDIS_RETRY_ATTEMPTS', 3))
+    REDIS_RETRY_BACKOFF_SECONDS = float(os.getenv('REDIS_RETRY_BACKOFF_SECONDS', 0.05))
+    REDIS_RETRY_BACKOFF_CAP_SECONDS = float(os.getenv('REDIS_RETRY_BACKOFF_CAP_SECONDS', 1))
+    # Number of commands sent per pipeline round trip for bulk reads/writes
+    REDIS_PIPELINE_CHUNK_SIZE = int(os.getenv('REDIS_PIPELINE_CHUNK_SIZE', 500))
+    # Lifetime of the temporary sets used to resolve category/distance filters
+    FILTER_TEMP_KEY_TTL_SECONDS = int(os.getenv('FILTER_TEMP_KEY_TTL_SECONDS', 10))
+
+    # Process-local catalog cache (invalidated across workers by the restaurants:version counter)
+    CATALOG_CACHE_ENABLED = os.getenv('CATALOG_CACHE_ENABLED', 'True').lower() == 'true'
+    CATALOG_CACHE_MAX_RESTAURANTS = int(os.getenv('CATALOG_CACHE_MAX_RESTAURANTS', 5000))
+    CATALOG_CACHE_MAX_FILTERS = int(os.getenv('CATALOG_CACHE_MAX_FILTERS', 256))
 
     # Cookie settings
     COOKIE_NAME = os.getenv('COOKIE_NAME', 'dinner_roulette_user')
@@ -30,6 +52,13 @@ class Config:
     # Distance levels
     VALID_DISTANCES = os.getenv('VALID_DISTANCES', 'nearby,short-drive,medium-drive,far').split(',')
     DEFAULT_DISTANCE = os.getenv('DEFAULT_DISTANCE', 'nearby')
+    # Automatic distance levels from Google driving data: each threshold list holds the
+    # upper bound of every level in VALID_DISTANCES but the last (default 5/10/20 miles)
+    DISTANCE_TIERS_AUTO = os.getenv('DISTANCE_TIERS_AUTO', 'True').lower() == 'true'
+    # Measure tried first: 'meters' (google_distance) or 'eta' (minutes); the other is the fallback
+    DISTANCE_TIER_BASIS = os.getenv('DISTANCE_TIER_BASIS', 'meters').lower()
+    DISTANCE_TIER_METERS = [float(v) for v in os.getenv('DISTANCE_TIER_METERS', '8047,16093,32187').split(',') if v.strip()]
+    DISTANCE_TIER_ETA_MINUTES = [float(v) for v in os.getenv('DISTANCE_TIER_ETA_MINUTES', '10,20,35').split(',') if v.strip()]
 
     # "Eat at Home" weighted option
     EAT_AT_HOME_ENABLED = os.getenv('EAT_AT_HOME_ENABLED', 'True').lower() == 'true'
@@ -46,12 +75,27 @@ class Config:
 
     # History retention
     HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', 30))
+    # Maximum expired entries evicted per spin (keeps the inline trim constant time)
+    HISTORY_TRIM_BATCH_SIZE = int(os.getenv('HISTORY_TRIM_BATCH_SIZE', 100))
 
     # Backup configuration
     BACKUP_DIR = os.getenv('BACKUP_DIR', '/app/backups')
+    # Write backups from a background thread instead of inside each request
+    BACKUP_ASYNC = os.getenv('BACKUP_ASYNC', 'True').lower() == 'true'
+    # Mutations are appended to a journal right away; the background writer compacts
+    # the journal into a full snapshot at most once per interval...
+    BACKUP_INTERVAL_SECONDS = int(os.getenv('BACKUP_INTERVAL_SECONDS', 3600))
+    # ...or sooner, once this many mutations are waiting
+    BACKUP_COMPACT_MAX_PENDING = int(os.getenv('BACKUP_COMPACT_MAX_PENDING', 200))
+    # Number of timestamped snapshots to keep (0 = keep all)
+    BACKUP_RETENTION_COUNT = int(os.getenv('BACKUP_RETENTION_COUNT', 14))
 
     # Spin rate limiting (seconds between spins per user)
     SPIN_TIMEOUT_SECONDS = int(os.getenv('SPIN_TIMEOUT_SECONDS', 300))  # 5 minutes default
+    # Per-user budgets of mutating endpoints as "<requests>/<seconds>" (empty or 0 = unlimited);
+    # requests that fail (4xx/5xx) do not use up the budget
+    RATE_LIMIT_ADD_RESTAURANT = os.getenv('RATE_LIMIT_ADD_RESTAURANT', '20/3600')
+    RATE_LIMIT_ADD_CATEGORY = os.getenv('RATE_LIMIT_ADD_CATEGORY', '10/3600')
 
     # Location settings for Google search
     ZIP_CODE = os.getenv('ZIP_CODE', '00000')
@@ -61,3 +105,35 @@ class Config:
     GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY', '')
     GOOGLE_PLACES_LOCATION = os.getenv('GOOGLE_PLACES_LOCATION', '')  # Lat,Lng for search center
     GOOGLE_PLACES_RADIUS = int(os.getenv('GOOGLE_PLACES_RADIUS', '50000'))  # meters (default: 50km)
+    # Google Maps web service root (point at a local stub server for testing)
+    GOOGLE_MAPS_API_BASE_URL = os.getenv('GOOGLE_MAPS_API_BASE_URL', 'https://maps.googleapis.com/maps/api')
+    # Outbound HTTP: keep-alive connections per host, retries (with exponential backoff)
+    GOOGLE_HTTP_POOL_SIZE = int(os.getenv('GOOGLE_HTTP_POOL_SIZE', 10))
+    GOOGLE_HTTP_MAX_RETRIES = int(os.getenv('GOOGLE_HTTP_MAX_RETRIES', 2))
+    GOOGLE_HTTP_BACKOFF_SECONDS = float(os.getenv('GOOGLE_HTTP_BACKOFF_SECONDS', 0.3))
+    # Per-endpoint request timeouts in seconds
+    GOOGLE_SEARCH_TIMEOUT_SECONDS = float(os.getenv('GOOGLE_SEARCH_TIMEOUT_SECONDS', 5))
+    GOOGLE_DETAILS_TIMEOUT_SECONDS = float(os.getenv('GOOGLE_DETAILS_TIMEOUT_SECONDS', 5))
+    GOOGLE_DISTANCE_TIMEOUT_SECONDS = float(os.getenv('GOOGLE_DISTANCE_TIMEOUT_SECONDS', 3))
+    # Place details with known coordinates: Details and Distance Matrix run in parallel, and
+    # the straight-line estimate is returned if driving distance takes longer than this
+    GOOGLE_DISTANCE_BUDGET_SECONDS = float(os.getenv('GOOGLE_DISTANCE_BUDGET_SECONDS', 1.0))
+    GOOGLE_LOOKUP_WORKERS = int(os.getenv('GOOGLE_LOOKUP_WORKERS', 4))
+    # Add driving distance/ETA to search results (one batched Distance Matrix call per search)
+    GOOGLE_SEARCH_ENRICH_DRIVING = os.getenv('GOOGLE_SEARCH_ENRICH_DRIVING', 'False').lower() == 'true'
+
+    # Refresh of stored google_distance/eta (flask refresh-driving-data)
+    DRIVING_REFRESH_MAX_AGE_DAYS = int(os.getenv('DRIVING_REFRESH_MAX_AGE_DAYS', 30))
+    # Restaurants per Distance Matrix request (max 25) and pause between requests
+    DRIVING_REFRESH_BATCH_SIZE = int(os.getenv('DRIVING_REFRESH_BATCH_SIZE', 25))
+    DRIVING_REFRESH_PAUSE_SECONDS = float(os.getenv('DRIVING_REFRESH_PAUSE_SECONDS', 1.0))
+    # Restaurants whose lookup failed (no route, Google error) are retried after this long
+    DRIVING_REFRESH_RETRY_HOURS = float(os.getenv('DRIVING_REFRESH_RETRY_HOURS', 24))
+
+    # Places response cache (Redis, fronted by a per-worker LRU)
+    PLACES_CACHE_ENABLED = os.getenv('PLACES_CACHE_ENABLED', 'True').lower() == 'true'
+    PLACES_CACHE_TTL_SECONDS = int(os.getenv('PLACES_CACHE_TTL_SECONDS', 86400))  # 1 day
+    # Empty results ("no matches", unknown place) are kept for a shorter time
+    PLACES_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv('PLACES_CACHE_NEGATIVE_TTL_SECONDS', 3600))
+    PLACES_CACHE_LOCAL_SIZE = int(os.getenv('PLACES_CACHE_LOCAL_SIZE', 512))
+    PLACES_CACHE_LOCAL_TTL_SECONDS = int(os.getenv('PLACES_CACHE_LOCAL_TTL_SECONDS', 300))
@@ -0,0 +1,100 @@
+"""Refresh of stale Google driving distance/ETA on stored restaurants"""
+import time
+from datetime import datetime
+
+# Hash holding the results of the last refresh run
+REFRESH_STATS_KEY = "restaurants:driving_refresh"
+
+
+def refresh_driving_data(model, service, max_age_seconds, batch_size=25, pause_seconds=1.0,
+                         limit=None, progress=None, retry_after_seconds=0):
+    """
+    Re-fetch google_distance/eta for restaurants whose data is older than max_age_seconds
+    Restaurants are processed least recently tried first in batches of at most
+    batch_size (one Distance Matrix request each, place IDs as destinations), with
+    a pause between batches to stay under the API rate limit. Failed lookups are
+    stamped and skipped for retry_after_seconds, so they do not re-spend quota every run
+
+    Args:
+        model (RestaurantModel): Model used to find and write restaurants
+        service (GooglePlacesService): Service used for Distance Matrix calls
+        max_age_seconds (int): Refresh driving data older than this
+        batch_size (int): Restaurants per Distance Matrix request (max 25)
+        pause_seconds (float): Sleep between two batches
+        limit (int, optional): Refresh at most this many restaurants in this run
+        progress (callable, optional): Called as progress(stats) after every batch
+        retry_after_seconds (int): Back-off after a failed lookup
+
+    Returns:
+        dict: stale, processed, refreshed, failed, api_calls (per endpoint), remaining
+    """
+    batch_size = max(1, min(batch_size, service.MAX_MATRIX_DESTINATIONS))
+    stale = model.find_stale_driving_data(max_age_seconds, retry_after_seconds)
+    todo = stale[:limit] if limit else stale
+    calls_before = service.api_call_counts()
+
+    stats = {
+        "started_at": datetime.utcnow().isoformat(),
+        "stale": len(stale),
+        "processed": 0,
+        "refreshed": 0,
+        "failed": 0,
+        "api_calls": {},
+        "remaining": len(stale)
+    }
+
+    for start in range(0, len(todo), batch_size):
+        if start:
+            time.sleep(pause_seconds)
+
+        batch = todo[start:start + batch_size]
+        # Bypass the (day-long) distance cache: stale data must really be re-fetched
+        driving = service.get_driving_distances([{'place_id': place_id} for _, place_id in batch], use_cache=False)
+        updates = {rid: driving[place_id] for rid, place_id in batch if place_id in driving}
+        model.apply_driving_data(updates)
+        model.mark_driving_attempts([rid for rid, _ in batch if rid not in updates])
+
+        calls_now = service.api_call_counts()
+        stats["processed"] += len(batch)
+        stats["refreshed"] += len(updates)
+        stats["failed"] += len(batch) - len(updates)
+        stats["api_calls"] = {k: calls_now[k] - calls_before.get(k, 0) for k in calls_now}
+        stats["remaining"] = len(stale) - stats["refreshed"]
+        if progress:
+            progress(stats)
+
+    stats["finished_at"] = datetime.utcnow().isoformat()
+    _save_stats(model.redis, stats)
+    return stats
+
+
+def _save_stats(redis_client, stats):
+    """Store the run's statistics for get_refresh_stats()"""
+    redis_client.hset(REFRESH_STATS_KEY, mapping={
+        "started_at": stats["started_at"],
+        "finished_at": stats["finished_at"],
+        "stale": stats["stale"],
+        "refreshed": stats["refreshed"],
+        "failed": stats["failed"],
+        "remaining": stats["remaining"],
+        "distance_api_calls": stats["api_calls"].get("distance", 0)
+    })
+
+
+def get_refresh_stats(redis_client):
+    """
+    Get the statistics of the last refresh run
+
+    Args:
+        redis_client (redis.Redis): Redis client
+
+    Returns:
+        dict: Last run statistics, or None if the refresh never ran
+    """
+    stats = redis_client.hgetall(REFRESH_STATS_KEY)
+    if not stats:
+        return None
+
+    for key in ("stale", "refreshed", "failed", "remaining", "distance_api_calls"):
+        stats[key] = int(stats.get(key, 0))
+    return stats
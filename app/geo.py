@@ -0,0 +1,83 @@
+"""Great-circle (Haversine) distances, vectorized with NumPy when it is installed"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # Optional: pure-Python fallback below
+    np = None
+
+# Mean Earth radius in meters
+EARTH_RADIUS_METERS = 6371000
+
+# Below this many points the NumPy array setup costs more than the loop saves
+NUMPY_MIN_POINTS = 32
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    Distance between two points using the Haversine formula
+
+    Args:
+        lat1, lng1 (float): First point coordinates
+        lat2, lng2 (float): Second point coordinates
+
+    Returns:
+        float: Distance in meters
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lng2 - lng1)
+
+    a = math.sin(delta_phi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_METERS * c
+
+
+def haversine_many(origin_lat, origin_lng, lats, lngs):
+    """
+    Distances from one origin to many points in a single call
+    Uses NumPy array math when available (and worth it for the batch size),
+    otherwise the pure-Python loop; both give the same results
+
+    Args:
+        origin_lat, origin_lng (float): Origin coordinates
+        lats (sequence): Latitudes of the points (list, tuple or NumPy array)
+        lngs (sequence): Longitudes of the points, aligned with lats
+
+    Returns:
+        list: Distance in meters per point, aligned with the input
+    """
+    if len(lats) != len(lngs):
+        raise ValueError("lats and lngs must have the same length")
+
+    if np is not None and len(lats) >= NUMPY_MIN_POINTS:
+        return _haversine_many_numpy(origin_lat, origin_lng, lats, lngs).tolist()
+    return _haversine_many_python(origin_lat, origin_lng, lats, lngs)
+
+
+def _haversine_many_python(origin_lat, origin_lng, lats, lngs):
+    """Pure-Python haversine_many (origin terms computed once)"""
+    phi1 = math.radians(origin_lat)
+    cos_phi1 = math.cos(phi1)
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+
+    distances = []
+    for lat, lng in zip(lats, lngs):
+        phi2 = radians(lat)
+        a = sin((phi2 - phi1) / 2) ** 2 + cos_phi1 * cos(phi2) * sin(radians(lng - origin_lng) / 2) ** 2
+        # asin(sqrt(a)) == atan2(sqrt(a), sqrt(1 - a)); clamp rounding above 1
+        distances.append(2 * EARTH_RADIUS_METERS * asin(sqrt(min(1.0, a))))
+    return distances
+
+
+def _haversine_many_numpy(origin_lat, origin_lng, lats, lngs):
+    """NumPy haversine_many; returns a float64 array"""
+    phi1 = math.radians(origin_lat)
+    phi2 = np.radians(np.asarray(lats, dtype=np.float64))
+    delta_lambda = np.radians(np.asarray(lngs, dtype=np.float64) - origin_lng)
+
+    a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -1,25 +1,99 @@
 """Google Places API integration service"""
 import requests
-import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.geo import haversine, haversine_many
+from app.places_cache import PlacesCache
+
+
+def create_session(pool_size: int = 10, max_retries: int = 2, backoff_factor: float = 0.3) -> requests.Session:
+    """
+    Build a keep-alive HTTP session for the Google APIs
+    Connections are pooled and reused across calls, so only the first request
+    to each host pays the TCP/TLS handshake. Idempotent GETs are retried with
+    exponential backoff on connection errors and 429/5xx answers
+
+    Args:
+        pool_size: Connections kept open per host
+        max_retries: Retries per request (0 = no retries)
+        backoff_factor: Backoff base in seconds (sleeps factor * 2^(retry - 1))
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class GooglePlacesService:
     """Service class for interacting with Google Places API"""
 
-    def __init__(self, api_key: str, location: str, radius: int):
+    # Google Maps web service root (overridable, e.g. to point at a local stub server)
+    DEFAULT_API_BASE_URL = "https://maps.googleapis.com/maps/api"
+
+    # Statuses meaning "nothing found" (cacheable), as opposed to request/quota errors
+    EMPTY_STATUSES = ('ZERO_RESULTS', 'NOT_FOUND')
+
+    # Request timeouts in seconds per endpoint (search, details, distance)
+    DEFAULT_TIMEOUTS = {'search': 10, 'details': 10, 'distance': 10}
+
+    # Caller-supplied coordinates further than this from the place's own are ignored
+    COORDINATE_TOLERANCE_METERS = 250
+
+    # Distance Matrix accepts at most 25 destinations per request
+    MAX_MATRIX_DESTINATIONS = 25
+
+    def __init__(self, api_key: str, location: str, radius: int,
+                 cache: Optional[PlacesCache] = None, api_base_url: Optional[str] = None,
+                 session: Optional[requests.Session] = None, timeouts: Optional[Dict[str, float]] = None,
+                 distance_budget: float = 1.0, lookup_workers: int = 4, enrich_search: bool = False):
         """
         Initialize Google Places service
+        Create one instance per worker and reuse it, so its session keeps
+        connections to Google open between requests
 
         Args:
             api_key: Google Places API key
             location: Center point as "lat,lng" string
             radius: Search radius in meters
+            cache: Response cache for searches and details (None = always call the API)
+            api_base_url: Google Maps API root (default DEFAULT_API_BASE_URL)
+            session: Pooled HTTP session (default create_session())
+            timeouts: Per-endpoint timeouts overriding DEFAULT_TIMEOUTS
+            distance_budget: Seconds to wait for driving distance in a parallel lookup
+                before falling back to the straight-line estimate
+            lookup_workers: Threads running parallel Details/Distance Matrix calls
+            enrich_search: Add driving distance/ETA to search results by default
         """
         self.api_key = api_key
         self.location = location  # "lat,lng"
         self.radius = radius
-        self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.cache = cache
+        self.session = session or create_session()
+        self.timeouts = {**self.DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.distance_budget = distance_budget
+        self.enrich_search = enrich_search
+        # Outbound API requests per endpoint since startup (quota tracking)
+        self._api_calls = {'search': 0, 'details': 0, 'distance': 0}
+        self._api_calls_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(2, lookup_workers), thread_name_prefix='places-lookup')
+        self.api_base_url = (api_base_url or self.DEFAULT_API_BASE_URL).rstrip('/')
+        self.base_url = f"{self.api_base_url}/place"
 
         # Parse location
         if location:
@@ -34,20 +108,102 @@ class GooglePlacesService:
             self.center_lat = None
             self.center_lng = None
 
-    def search_places(self, query: str, max_results: int = 5) -> List[Dict]:
+    def api_call_counts(self) -> Dict[str, int]:
+        """
+        Get the number of API requests sent per endpoint since startup
+
+        Returns:
+            Dictionary of endpoint (search, details, distance) -> request count
+        """
+        with self._api_calls_lock:
+            return dict(self._api_calls)
+
+    def _count_call(self, endpoint: str):
+        """Count one outbound request to an endpoint"""
+        with self._api_calls_lock:
+            self._api_calls[endpoint] += 1
+
+    def search_places(self, query: str, max_results: int = 5, enrich: Optional[bool] = None) -> List[Dict]:
         """
         Search for places using Google Places Text Search API
+        Results (including empty ones) are served from the cache when available
 
         Args:
             query: Search query (restaurant name)
             max_results: Maximum number of results to return
+            enrich: Add driving distance and ETA to every result with one batched
+                Distance Matrix request (default: the service's enrich_search setting)
 
         Returns:
-            List of place dictionaries with: place_id, name, address, distance
+            List of place dictionaries with: place_id, name, address, distance, lat, lng
+            (plus driving_distance and eta when enriched)
         """
         if not self.api_key:
             return []
 
+        results = self._cached_search(query, max_results)
+        if self.enrich_search if enrich is None else enrich:
+            results = self._add_driving_distances(results)
+        return results
+
+    def _cached_search(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Text Search through the response cache
+
+        Args:
+            query: Search query (restaurant name)
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of place dictionaries (empty on API error)
+        """
+        if self.cache is None:
+            return self._search_places(query, max_results) or []
+
+        key = self.cache.search_key(query, self.location, self.radius, max_results)
+        hit, results = self.cache.get(key)
+        if hit:
+            return results
+
+        results = self._search_places(query, max_results)
+        if results is None:
+            # API error: don't cache it
+            return []
+        self.cache.set(key, results)
+        return results
+
+    def _add_driving_distances(self, results: List[Dict]) -> List[Dict]:
+        """
+        Copy search results with driving_distance (meters) and eta (minutes) filled in
+
+        Args:
+            results: Search results (with lat/lng)
+
+        Returns:
+            New list of result dictionaries (None values where no driving data is available)
+        """
+        driving = self.get_driving_distances(results)
+        enriched = []
+        for place in results:
+            driving_data = driving.get(place.get('place_id')) or {}
+            enriched.append({
+                **place,
+                'driving_distance': driving_data.get('distance'),
+                'eta': driving_data.get('duration')
+            })
+        return enriched
+
+    def _search_places(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        """
+        Call the Text Search API
+
+        Args:
+            query: Search query (restaurant name)
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of place dictionaries (empty if nothing matched), or None on API error
+        """
         url = f"{self.base_url}/textsearch/json"
 
         params = {
@@ -62,13 +218,16 @@ class GooglePlacesService:
             params['radius'] = self.radius
 
         try:
-            response = requests.get(url, params=params, timeout=10)
+            self._count_call('search')
+            response = self.session.get(url, params=params, timeout=self.timeouts['search'])
             response.raise_for_status()
             data = response.json()
 
+            if data.get('status') in self.EMPTY_STATUSES:
+                return []
             if data.get('status') != 'OK':
                 print(f"Google Places API error: {data.get('status')} - {data.get('error_message', '')}")
-                return []
+                return None
 
             results = []
             for place in data.get('results', []):
@@ -79,45 +238,49 @@ class GooglePlacesService:
                     'distance': None
                 }
 
-                # Calculate distance if we have location data
-                geometry = place.get('geometry', {})
-                place_location = geometry.get('location', {})
-                if place_location and self.center_lat and self.center_lng:
-                    place_lat = place_location.get('lat')
-                    place_lng = place_location.get('lng')
-                    if place_lat and place_lng:
-                        distance = self.calculate_distance(
-                            self.center_lat, self.center_lng,
-                            place_lat, place_lng
-                        )
-                        place_data['distance'] = distance
-
-                        # Filter: Use 1.5x radius since driving distance is longer than straight-line
-                        # (This is just for initial filtering; actual distance is calculated on selection)
-                        if distance > (self.radius * 1.5):
-                            continue  # Skip this place, it's too far
-                else:
-                    # Skip places without location data
+                # Skip places without location data
+                place_location = place.get('geometry', {}).get('location', {})
+                if not (self.center_lat and self.center_lng):
+                    continue
+                if not (place_location.get('lat') and place_location.get('lng')):
                     continue
 
+                # Lets get_place_details run Details and Distance Matrix in parallel
+                place_data['lat'] = place_location['lat']
+                place_data['lng'] = place_location['lng']
                 results.append(place_data)
 
+            # Straight-line distances for every result in one batch
+            distances = haversine_many(
+                self.center_lat, self.center_lng,
+                [place['lat'] for place in results], [place['lng'] for place in results]
+            )
+            for place, distance in zip(results, distances):
+                place['distance'] = distance
+
+            # Filter: Use 1.5x radius since driving distance is longer than straight-line
+            # (This is just for initial filtering; actual distance is calculated on selection)
+            results = [place for place in results if place['distance'] <= self.radius * 1.5]
+
             # Sort by distance (closest first)
-            results.sort(key=lambda x: x['distance'] if x['distance'] is not None else float('inf'))
+            results.sort(key=lambda x: x['distance'])
 
             # Return top max_results
             return results[:max_results]
 
         except requests.RequestException as e:
             print(f"Error searching Google Places: {e}")
-            return []
+            return None
 
-    def get_place_details(self, place_id: str) -> Optional[Dict]:
+    def get_place_details(self, place_id: str, lat: Optional[float] = None,
+                          lng: Optional[float] = None) -> Optional[Dict]:
         """
         Get detailed information for a specific place using Google Places Details API
 
         Args:
             place_id: Google Place ID
+            lat, lng: Place coordinates when already known (e.g. from a search result);
+                the Details and Distance Matrix calls then run concurrently
 
         Returns:
             Dictionary with: name, phone, address, website, location, distance, eta
@@ -125,6 +288,76 @@ class GooglePlacesService:
         if not self.api_key or not place_id:
             return None
 
+        if self.cache is None:
+            return self._get_place_details(place_id, lat, lng) or None
+
+        key = self.cache.details_key(place_id, self.location)
+        hit, place_details = self.cache.get(key)
+        if hit:
+            return place_details or None
+
+        place_details = self._get_place_details(place_id, lat, lng)
+        if place_details is None:
+            # API error: don't cache it
+            return None
+        # Keep straight-line estimates only briefly so driving data replaces them soon
+        estimated = place_details.get('distance_source') == 'estimate'
+        self.cache.set(key, place_details, ttl=self.cache.negative_ttl if estimated else None)
+        return place_details or None
+
+    def _get_place_details(self, place_id: str, lat: Optional[float] = None,
+                           lng: Optional[float] = None) -> Optional[Dict]:
+        """
+        Call the Details API plus Distance Matrix for driving distance/ETA
+        With known coordinates both calls run in parallel and the driving
+        distance gets distance_budget seconds; past that the Haversine estimate
+        is returned instead of waiting
+
+        Args:
+            place_id: Google Place ID
+            lat, lng: Place coordinates, if known
+
+        Returns:
+            Place details dictionary (empty if the place was not found), or None on API error
+        """
+        if lat is None or lng is None or not (self.center_lat and self.center_lng):
+            place_details, location = self._fetch_details(place_id)
+            if place_details and location and self.center_lat and self.center_lng:
+                self._apply_distance(place_details, location, self._driving_distance_to(place_id, *location))
+            return place_details
+
+        deadline = time.monotonic() + self.distance_budget
+        details_future = self.executor.submit(self._fetch_details, place_id)
+        distance_future = self.executor.submit(self._driving_distance_to, place_id, lat, lng)
+
+        place_details, location = details_future.result()
+        if not place_details:
+            return place_details
+
+        # Only trust the caller's coordinates if they match the place
+        if location and self.calculate_distance(lat, lng, *location) > self.COORDINATE_TOLERANCE_METERS:
+            self._apply_distance(place_details, location, self._driving_distance_to(place_id, *location))
+            return place_details
+
+        try:
+            driving_data = distance_future.result(timeout=max(0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            print(f"Distance Matrix exceeded {self.distance_budget}s budget, using straight-line estimate")
+            driving_data = None
+        self._apply_distance(place_details, (lat, lng), driving_data)
+        return place_details
+
+    def _fetch_details(self, place_id: str):
+        """
+        Call the Details API
+
+        Args:
+            place_id: Google Place ID
+
+        Returns:
+            Tuple of (place details without distance/eta, (lat, lng) or None);
+            details are empty if the place was not found and None on API error
+        """
         url = f"{self.base_url}/details/json"
 
         params = {
@@ -134,13 +367,16 @@ class GooglePlacesService:
         }
 
         try:
-            response = requests.get(url, params=params, timeout=10)
+            self._count_call('details')
+            response = self.session.get(url, params=params, timeout=self.timeouts['details'])
             response.raise_for_status()
             data = response.json()
 
+            if data.get('status') in self.EMPTY_STATUSES:
+                return {}, None
             if data.get('status') != 'OK':
                 print(f"Google Places Details API error: {data.get('status')}")
-                return None
+                return None, None
 
             result = data.get('result', {})
 
@@ -155,39 +391,44 @@ class GooglePlacesService:
                 'eta': None
             }
 
-            # Get actual driving distance and time using Distance Matrix API
-            geometry = result.get('geometry', {})
-            place_location = geometry.get('location', {})
-
-            if place_location and self.center_lat and self.center_lng:
-                place_lat = place_location.get('lat')
-                place_lng = place_location.get('lng')
-
-                if place_lat and place_lng:
-                    # Get actual driving distance and ETA from Distance Matrix API
-                    driving_data = self.get_driving_distance_and_time(place_lat, place_lng)
-                    if driving_data:
-                        place_details['distance'] = driving_data['distance']
-                        place_details['eta'] = driving_data['duration']
-                    else:
-                        # Fallback to Haversine calculation if Distance Matrix fails
-                        distance = self.calculate_distance(
-                            self.center_lat, self.center_lng,
-                            place_lat, place_lng
-                        )
-                        place_details['distance'] = distance
-                        # Calculate ETA (rough estimate: average 35 mph in city)
-                        distance_miles = distance * 0.000621371
-                        avg_speed_mph = 35
-                        eta_hours = distance_miles / avg_speed_mph
-                        eta_minutes = int(eta_hours * 60)
-                        place_details['eta'] = eta_minutes
+            place_location = result.get('geometry', {}).get('location', {})
+            place_lat = place_location.get('lat')
+            place_lng = place_location.get('lng')
+            location = (place_lat, place_lng) if place_lat and place_lng else None
+            # Stored with the restaurant for the restaurants:geo radius index
+            place_details['lat'] = place_lat
+            place_details['lng'] = place_lng
 
-            return place_details
+            return place_details, location
 
         except requests.RequestException as e:
             print(f"Error fetching place details: {e}")
-            return None
+            return None, None
+
+    def _apply_distance(self, place_details: Dict, location, driving_data: Optional[Dict]):
+        """
+        Fill distance/eta from Distance Matrix data, or estimate them if it is missing
+
+        Args:
+            place_details: Details dictionary to update
+            location: Place coordinates as (lat, lng)
+            driving_data: Result of get_driving_distance_and_time (None = failed or too slow)
+        """
+        if driving_data:
+            place_details['distance'] = driving_data['distance']
+            place_details['eta'] = driving_data['duration']
+            place_details['distance_source'] = 'driving'
+            return
+
+        # Fallback to Haversine calculation if Distance Matrix fails
+        distance = self.calculate_distance(self.center_lat, self.center_lng, *location)
+        place_details['distance'] = distance
+        # Calculate ETA (rough estimate: average 35 mph in city)
+        distance_miles = distance * 0.000621371
+        avg_speed_mph = 35
+        eta_hours = distance_miles / avg_speed_mph
+        place_details['eta'] = int(eta_hours * 60)
+        place_details['distance_source'] = 'estimate'
 
     def get_driving_distance_and_time(self, dest_lat: float, dest_lng: float) -> Optional[Dict]:
         """
@@ -200,56 +441,130 @@ class GooglePlacesService:
         Returns:
             Dictionary with distance (meters) and duration (minutes), or None if error
         """
-        url = "https://maps.googleapis.com/maps/api/distancematrix/json"
+        return self._fetch_distance_matrix([(dest_lat, dest_lng)])[0]
+
+    def get_driving_distances(self, places: List[Dict], use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Get driving distance and time from the center to several places at once
+        Cached results are reused (keyed by origin and place_id); the rest are
+        fetched with one multi-destination Distance Matrix request per
+        MAX_MATRIX_DESTINATIONS places
+
+        Args:
+            places: Dictionaries with place_id and, if known, lat and lng
+                (without coordinates the place ID itself is the destination)
+            use_cache: Reuse cached results; False fetches every place from the API
+                (the fresh results are still written to the cache)
+
+        Returns:
+            Dictionary of place_id -> {distance (meters), duration (minutes)};
+            places whose lookup failed are left out
+        """
+        if not self.center_lat or not self.center_lng:
+            return {}
+
+        places = [p for p in places if p.get('place_id')]
+        results = {}
+        keys = {}
+        if self.cache is not None:
+            keys = {p['place_id']: self.cache.distance_key(p['place_id'], self.location) for p in places}
+        if self.cache is not None and use_cache:
+            for place_id, (hit, value) in zip(keys, self.cache.get_many(list(keys.values()))):
+                if hit and value:
+                    results[place_id] = value
+
+        missing = [p for p in places if p['place_id'] not in results]
+        for start in range(0, len(missing), self.MAX_MATRIX_DESTINATIONS):
+            chunk = missing[start:start + self.MAX_MATRIX_DESTINATIONS]
+            fetched = {}
+            destinations = [
+                (p['lat'], p['lng']) if p.get('lat') is not None and p.get('lng') is not None
+                else f"place_id:{p['place_id']}"
+                for p in chunk
+            ]
+            for place, driving_data in zip(chunk, self._fetch_distance_matrix(destinations)):
+                if driving_data:
+                    fetched[place['place_id']] = driving_data
+            if self.cache is not None and fetched:
+                self.cache.set_many({keys[place_id]: value for place_id, value in fetched.items()})
+            results.update(fetched)
+
+        return results
+
+    def _driving_distance_to(self, place_id: str, lat: float, lng: float) -> Optional[Dict]:
+        """
+        Driving distance and time to one place, through the per-place distance cache
+
+        Args:
+            place_id: Google Place ID
+            lat, lng: Place coordinates
+
+        Returns:
+            Dictionary with distance (meters) and duration (minutes), or None if error
+        """
+        return self.get_driving_distances([{'place_id': place_id, 'lat': lat, 'lng': lng}]).get(place_id)
+
+    def _fetch_distance_matrix(self, destinations: List) -> List[Optional[Dict]]:
+        """
+        Call the Distance Matrix API for one origin (the center) and several destinations
+
+        Args:
+            destinations: (lat, lng) tuples or "place_id:..." strings
+
+        Returns:
+            One {distance (meters), duration (minutes)} dictionary per destination, None where it failed
+        """
+        url = f"{self.api_base_url}/distancematrix/json"
 
         params = {
             'origins': f"{self.center_lat},{self.center_lng}",
-            'destinations': f"{dest_lat},{dest_lng}",
+            'destinations': '|'.join(
+                d if isinstance(d, str) else f"{d[0]},{d[1]}" for d in destinations
+            ),
             'key': self.api_key,
             'mode': 'driving',
             'units': 'imperial'
         }
 
+        results = [None] * len(destinations)
         try:
-            response = requests.get(url, params=params, timeout=10)
+            self._count_call('distance')
+            response = self.session.get(url, params=params, timeout=self.timeouts['distance'])
             response.raise_for_status()
             data = response.json()
 
             if data.get('status') != 'OK':
                 print(f"Distance Matrix API error: {data.get('status')}")
-                return None
+                return results
 
             rows = data.get('rows', [])
             if not rows:
-                return None
+                return results
 
             elements = rows[0].get('elements', [])
-            if not elements:
-                return None
-
-            element = elements[0]
-            if element.get('status') != 'OK':
-                print(f"Distance Matrix element error: {element.get('status')}")
-                return None
+            for index, element in enumerate(elements[:len(destinations)]):
+                if element.get('status') != 'OK':
+                    print(f"Distance Matrix element error: {element.get('status')}")
+                    continue
 
-            # Extract distance (in meters) and duration (in seconds)
-            distance_meters = element.get('distance', {}).get('value')
-            duration_seconds = element.get('duration', {}).get('value')
+                # Extract distance (in meters) and duration (in seconds)
+                distance_meters = element.get('distance', {}).get('value')
+                duration_seconds = element.get('duration', {}).get('value')
 
-            if distance_meters is None or duration_seconds is None:
-                return None
+                if distance_meters is None or duration_seconds is None:
+                    continue
 
-            # Convert duration from seconds to minutes
-            duration_minutes = int(duration_seconds / 60)
+                # Convert duration from seconds to minutes
+                results[index] = {
+                    'distance': distance_meters,
+                    'duration': int(duration_seconds / 60)
+                }
 
-            return {
-                'distance': distance_meters,
-                'duration': duration_minutes
-            }
+            return results
 
         except requests.RequestException as e:
             print(f"Error fetching driving distance: {e}")
-            return None
+            return results
 
     def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """
@@ -262,20 +577,4 @@ class GooglePlacesService:
         Returns:
             Distance in meters
         """
-        # Earth's radius in meters
-        R = 6371000
-
-        # Convert to radians
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lng2 - lng1)
-
-        # Haversine formula
-        a = math.sin(delta_phi / 2) ** 2 + \
-            math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        distance = R * c
-
-        return distance
+        return haversine(lat1, lng1, lat2, lng2)
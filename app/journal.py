@@ -0,0 +1,309 @@
+"""Backup file formats: append-only mutation journal, snapshot streaming and retention"""
+import fcntl
+import glob
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+
+JOURNAL_FILENAME = "restaurants_journal.jsonl"
+LATEST_SNAPSHOT_FILENAME = "restaurants_latest.json"
+SNAPSHOT_PATTERN = "restaurants_backup_*.json"
+
+
+class BackupJournal:
+    """
+    Journal of restaurant mutations stored next to the backup snapshots
+
+    Every entry records the full state of what changed, so replaying the
+    entries newer than a snapshot on top of it reproduces the catalog.
+    Appends, compaction and whole snapshot writes are serialized with a file
+    lock, which keeps several gunicorn workers from interleaving or losing lines.
+    """
+
+    def __init__(self, backup_dir):
+        """
+        Initialize the journal
+
+        Args:
+            backup_dir (str): Directory holding the journal and snapshots
+        """
+        self.backup_dir = backup_dir
+        self.path = os.path.join(backup_dir, JOURNAL_FILENAME)
+        self.lock_path = f"{self.path}.lock"
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold an exclusive lock on the journal (shared by every worker process)
+        Not reentrant: while holding it, call compact(..., lock=False)
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, op, **data):
+        """
+        Append one mutation entry
+
+        Args:
+            op (str): Entry type ("restaurant", "category" or "weight")
+            **data: Entry payload (e.g. restaurant=dict, name=str)
+
+        Returns:
+            dict: The entry written
+        """
+        entry = {"ts": datetime.utcnow().isoformat(), "op": op, **data}
+        line = json.dumps(entry, separators=(',', ':')) + "\n"
+
+        with self.locked():
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+        return entry
+
+    def entries(self, since=None):
+        """
+        Iterate over journal entries in the order they were written
+
+        Args:
+            since (str, optional): ISO timestamp; only entries strictly newer are returned
+
+        Yields:
+            dict: Journal entry
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash mid-append
+                if since and entry.get('ts', '') <= since:
+                    continue
+                yield entry
+
+    def compact(self, snapshot_timestamp, lock=True):
+        """
+        Drop the entries already covered by a snapshot
+
+        Args:
+            snapshot_timestamp (str): ISO timestamp taken before the snapshot read Redis
+            lock (bool): Take the journal lock (False when the caller already holds it)
+
+        Returns:
+            int: Number of entries kept
+        """
+        if lock:
+            with self.locked():
+                return self.compact(snapshot_timestamp, lock=False)
+
+        kept = list(self.entries(since=snapshot_timestamp))
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            for entry in kept:
+                f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        os.replace(temp_path, self.path)
+
+        return len(kept)
+
+
+def write_json_atomic(path, data):
+    """
+    Write a JSON file through a uniquely named temporary file and an atomic rename,
+    so readers and concurrent writers never see or share a partial file
+
+    Args:
+        path (str): Destination path
+        data (dict): JSON-serializable data
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def snapshot_timestamp(path):
+    """
+    Read the timestamp of a snapshot without loading its restaurants
+
+    Args:
+        path (str): Snapshot path
+
+    Returns:
+        str: ISO timestamp, or None if the file is missing, unreadable or has none
+    """
+    try:
+        for kind, value in iter_snapshot(path):
+            if kind == "field" and value[0] == "timestamp":
+                return value[1]
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def replace_latest_snapshot(backup_dir, data):
+    """
+    Make a snapshot the latest one unless the current latest is newer
+    Call with the journal lock held, so the check and the rename cannot interleave
+    with another worker's snapshot
+
+    Args:
+        backup_dir (str): Directory holding the snapshots
+        data (dict): Snapshot with an ISO "timestamp"
+
+    Returns:
+        bool: True if written, False if an equal or newer snapshot was already the latest
+    """
+    latest_file = os.path.join(backup_dir, LATEST_SNAPSHOT_FILENAME)
+    current = snapshot_timestamp(latest_file)
+    if current and current >= data["timestamp"]:
+        return False
+    write_json_atomic(latest_file, data)
+    return True
+
+
+def prune_snapshots(backup_dir, keep):
+    """
+    Delete the oldest timestamped snapshots beyond the retention count
+
+    Args:
+        backup_dir (str): Directory holding the snapshots
+        keep (int): Number of most recent snapshots to keep (0 keeps all)
+
+    Returns:
+        list: Paths of deleted snapshots
+    """
+    if keep <= 0:
+        return []
+
+    # Timestamped names sort chronologically
+    snapshots = sorted(glob.glob(os.path.join(backup_dir, SNAPSHOT_PATTERN)))
+    deleted = []
+    for path in snapshots[:-keep]:
+        try:
+            os.remove(path)
+            deleted.append(path)
+        except OSError as e:
+            print(f"Failed to prune backup {path}: {e}")
+
+    return deleted
+
+
+class _StreamReader:
+    """Buffered character reader that decodes JSON values incrementally"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Read another chunk, dropping what has been consumed"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of backup file")
+
+    def next(self):
+        """Consume and return the next non-whitespace character"""
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number or literal at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof or not self._fill():
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise ValueError("Malformed backup file")
+
+
+def iter_snapshot(path, chunk_size=65536):
+    """
+    Stream a snapshot file without loading it into memory at once
+
+    Args:
+        path (str): Snapshot path
+        chunk_size (int): Characters read per file access
+
+    Yields:
+        tuple: ("restaurant", dict) for each element of the top-level "restaurants"
+               array, ("field", (key, value)) for every other top-level field
+    """
+    with open(path, 'r') as f:
+        reader = _StreamReader(f, chunk_size)
+        if reader.next() != '{':
+            raise ValueError("Malformed backup file")
+        if reader.peek() == '}':
+            return
+
+        while True:
+            key = reader.decode()
+            if reader.next() != ':':
+                raise ValueError("Malformed backup file")
+
+            if key == 'restaurants' and reader.peek() == '[':
+                reader.next()
+                if reader.peek() == ']':
+                    reader.next()
+                else:
+                    while True:
+                        yield "restaurant", reader.decode()
+                        separator = reader.next()
+                        if separator == ']':
+                            break
+                        if separator != ',':
+                            raise ValueError("Malformed backup file")
+            else:
+                yield "field", (key, reader.decode())
+
+            separator = reader.next()
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError("Malformed backup file")
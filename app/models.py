@@ -1,23 +1,63 @@
 from datetime import datetime
+import math
 import redis
+from app.cache import CATALOG_VERSION_KEY, HISTORY_VERSION_KEY
 from app.config import Config
+from app.geo import haversine_many
+from app.journal import (
+    BackupJournal,
+    LATEST_SNAPSHOT_FILENAME,
+    iter_snapshot,
+    prune_snapshots,
+    replace_latest_snapshot,
+    write_json_atomic
+)
+from app.rate_limit import RateLimiter
+from app.redis_pool import create_connection_pool
+from app.redis_scripts import GEO_FILTER_SCRIPT, SPIN_POOL_SCRIPT, SPIN_SCRIPT, TRIM_HISTORY_SCRIPT
+from app.utils import classify_distance
 
 
 class RestaurantModel:
     """Redis-based restaurant data model"""
 
-    def __init__(self, redis_client):
+    # Distance levels in order from closest to farthest
+    DISTANCE_HIERARCHY = ['nearby', 'short-drive', 'medium-drive', 'far']
+
+    # The last spin is excluded from the pool for this long (15 minutes)
+    RECENT_SPIN_WINDOW_SECONDS = 900
+
+    # GEO set of active restaurants with coordinates (member = restaurant ID)
+    GEO_INDEX_KEY = "restaurants:geo"
+
+    # Hash of per-restaurant spin weights (restaurant ID -> weight); unlisted restaurants weigh 1
+    WEIGHTS_KEY = "restaurants:weights"
+
+    def __init__(self, redis_client, backup_worker=None, catalog_cache=None):
         self.redis = redis_client
+        # Background backup writer (None = back up synchronously after each mutation)
+        self.backup_worker = backup_worker
+        # Process-local catalog cache for read paths (None = always read Redis)
+        self.catalog_cache = catalog_cache
+        # Append-only log of mutations since the last snapshot
+        self.journal = BackupJournal(Config.BACKUP_DIR)
+        # Atomic spin script (EVALSHA with automatic fallback to EVAL/SCRIPT LOAD)
+        self.spin_script = redis_client.register_script(SPIN_SCRIPT)
+        self.spin_pool_script = redis_client.register_script(SPIN_POOL_SCRIPT)
+        self.trim_history_script = redis_client.register_script(TRIM_HISTORY_SCRIPT)
+        self.geo_filter_script = redis_client.register_script(GEO_FILTER_SCRIPT)
 
     def create(self, name, categories, distance, added_by, closed_days=None,
-               place_id='', phone='', address='', website='', google_distance='', eta=''):
+               place_id='', phone='', address='', website='', google_distance='', eta='',
+               lat=None, lng=None, distance_auto=False):
         """
         Create a new restaurant entry
 
         Args:
             name (str): Restaurant name
             categories (list): List of category tags
-            distance (str): Distance level (nearby, short-drive, medium-drive, far)
+            distance (str): Distance level (nearby, short-drive, medium-drive, far); None to
+                classify it from google_distance/eta (DISTANCE_TIERS_AUTO)
             added_by (str): Username who added it
             closed_days (list, optional): Days restaurant is closed (0=Sunday, 1=Monday, ..., 6=Saturday)
             place_id (str, optional): Google Place ID
@@ -26,6 +66,10 @@ class RestaurantModel:
             website (str, optional): Website URL
             google_distance (str, optional): Distance in meters from configured location
             eta (str, optional): Estimated driving time in minutes
+            lat (float, optional): Latitude (indexed in restaurants:geo together with lng)
+            lng (float, optional): Longitude
+            distance_auto (bool, optional): The distance was pre-selected for the user
+                rather than picked, so it stays open to automatic reclassification
 
         Returns:
             dict: Created restaurant data with id
@@ -38,6 +82,11 @@ class RestaurantModel:
             if cat not in valid_categories:
                 raise ValueError(f"Invalid category '{cat}'. Use existing categories or add a new one.")
 
+        # A hand-picked level is kept; otherwise Google driving data picks it when automatic tiers are on
+        distance_source = self._distance_source(distance, google_distance, eta, distance_auto)
+        if not distance:
+            distance = self._auto_distance(google_distance, eta) or Config.DEFAULT_DISTANCE
+
         # Validate distance
         if distance not in Config.VALID_DISTANCES:
             raise ValueError(f"Invalid distance. Must be one of: {Config.VALID_DISTANCES}")
@@ -47,6 +96,8 @@ class RestaurantModel:
             closed_days = []
         closed_days = [int(day) for day in closed_days if 0 <= int(day) <= 6]
 
+        coordinates = self._parse_coordinates(lat, lng)
+
         # Generate unique ID atomically
         restaurant_id = self.redis.incr("restaurants:counter")
 
@@ -56,6 +107,8 @@ class RestaurantModel:
             "name": name,
             "categories": json.dumps(categories),  # Store as JSON array
             "distance": distance,
+            # "manual" levels are never reclassified from driving data
+            "distance_source": distance_source,
             "closed_days": json.dumps(closed_days),  # Store as JSON array
             "added_by": added_by,
             "added_at": datetime.utcnow().isoformat(),
@@ -66,7 +119,11 @@ class RestaurantModel:
             "address": address,
             "website": website,
             "google_distance": google_distance,
-            "eta": eta
+            "eta": eta,
+            # When google_distance/eta were last fetched (drives the background refresh)
+            "enriched_at": datetime.utcnow().isoformat() if (google_distance or eta) else '',
+            "lat": str(coordinates[0]) if coordinates else '',
+            "lng": str(coordinates[1]) if coordinates else ''
         }
 
         # Store in Redis
@@ -78,18 +135,20 @@ class RestaurantModel:
             self.redis.sadd(f"restaurants:by_category:{category}", restaurant_id)
         self.redis.sadd(f"restaurants:by_distance:{distance}", restaurant_id)
         self.redis.sadd(f"user:{added_by}:added", restaurant_id)
+        self._index_open_days(restaurant_id, closed_days)
+        if coordinates:
+            self._index_geo(restaurant_id, coordinates)
+
+        restaurant = self._format_restaurant(restaurant_data)
 
         # Auto-backup after create
-        try:
-            self.backup_to_file()
-        except Exception as e:
-            print(f"Backup failed: {e}")
+        self._record_mutation("restaurant", restaurant=restaurant)
 
-        return self._format_restaurant(restaurant_data)
+        return restaurant
 
     def _format_restaurant(self, data):
         """
-        Format restaurant data from Redis (convert bytes, parse JSON)
+        Format restaurant data from Redis (parse JSON fields)
 
         Args:
             data (dict): Raw restaurant data from Redis
@@ -102,10 +161,7 @@ class RestaurantModel:
         if not data:
             return None
 
-        # Convert bytes to strings
-        formatted = {k.decode('utf-8') if isinstance(k, bytes) else k:
-                    v.decode('utf-8') if isinstance(v, bytes) else v
-                    for k, v in data.items()}
+        formatted = dict(data)
 
         # Parse categories JSON if present
         if 'categories' in formatted:
@@ -137,6 +193,12 @@ class RestaurantModel:
             formatted['google_distance'] = ''
         if 'eta' not in formatted:
             formatted['eta'] = ''
+        if 'enriched_at' not in formatted:
+            formatted['enriched_at'] = ''
+        if 'lat' not in formatted:
+            formatted['lat'] = ''
+        if 'lng' not in formatted:
+            formatted['lng'] = ''
 
         return formatted
 
@@ -153,7 +215,536 @@ class RestaurantModel:
         data = self.redis.hgetall(f"restaurants:{restaurant_id}")
         return self._format_restaurant(data)
 
-    def get_all(self, category=None, distance=None, active_only=True):
+    def get_many(self, restaurant_ids, chunk_size=None):
+        """
+        Get several restaurants at once using pipelined HGETALL calls
+
+        Args:
+            restaurant_ids (iterable): Restaurant IDs
+            chunk_size (int, optional): Hashes fetched per pipeline round trip
+                (default Config.REDIS_PIPELINE_CHUNK_SIZE)
+
+        Returns:
+            list: Restaurant dictionaries (IDs without a hash are skipped)
+        """
+        chunk_size = max(1, chunk_size or Config.REDIS_PIPELINE_CHUNK_SIZE)
+        ids = [str(rid) for rid in restaurant_ids]
+
+        restaurants = []
+        for start in range(0, len(ids), chunk_size):
+            pipe = self.redis.pipeline(transaction=False)
+            for rid in ids[start:start + chunk_size]:
+                pipe.hgetall(f"restaurants:{rid}")
+
+            for data in pipe.execute():
+                restaurant = self._format_restaurant(data)
+                if restaurant:
+                    restaurants.append(restaurant)
+
+        return restaurants
+
+    def _read_version(self, key):
+        """
+        Read a version counter
+
+        Args:
+            key (str): Counter key
+
+        Returns:
+            str: Counter value ("0" before the first bump)
+        """
+        return self.redis.get(key) or "0"
+
+    def catalog_version(self):
+        """
+        Read the catalog version counter and drop stale catalog cache entries
+        Also used as the ETag of catalog responses
+
+        Returns:
+            str: Current catalog version ("0" before the first mutation)
+        """
+        version = self._read_version(CATALOG_VERSION_KEY)
+        if self.catalog_cache is not None:
+            self.catalog_cache.sync(version)
+        return version
+
+    def history_version(self):
+        """
+        Read the history version counter (bumped by spins, "went" marks and trims)
+        Used as the ETag of history responses
+
+        Returns:
+            str: Current history version ("0" before the first change)
+        """
+        return self._read_version(HISTORY_VERSION_KEY)
+
+    def _bump_catalog_version(self, pipe=None):
+        """
+        Invalidate every worker's catalog cache after a mutation
+
+        Args:
+            pipe (redis.client.Pipeline, optional): Queue on this pipeline (e.g. inside
+                the MULTI that writes the change) instead of sending immediately
+        """
+        (pipe if pipe is not None else self.redis).incr(CATALOG_VERSION_KEY)
+
+    def _cached_filter_ids(self, version, filters):
+        """
+        Resolve several filters to ID sets, serving repeats from the catalog cache
+        Misses are resolved together in one pipeline
+
+        Args:
+            version (str): Catalog version returned by catalog_version()
+            filters (list): (category, distance, open_on, within_m) tuples
+
+        Returns:
+            list: One set of matching restaurant IDs (str) per filter
+        """
+        results = [None] * len(filters)
+        if self.catalog_cache is not None:
+            results = [self.catalog_cache.get_filter(f) for f in filters]
+
+        missing = [i for i, ids in enumerate(results) if ids is None]
+        if missing:
+            pipe = self.redis.pipeline()
+            positions = []
+            for i in missing:
+                filter_key = self._queue_filter(pipe, *filters[i])
+                positions.append(len(pipe))
+                pipe.smembers(filter_key)
+            replies = pipe.execute()
+            for i, position in zip(missing, positions):
+                results[i] = replies[position]
+                if self.catalog_cache is not None:
+                    self.catalog_cache.put_filter(version, filters[i], results[i])
+        return [set(ids) for ids in results]
+
+    def _cached_get_many(self, version, restaurant_ids):
+        """
+        Hydrate restaurants through the catalog cache (misses use get_many)
+
+        Args:
+            version (str): Catalog version returned by catalog_version()
+            restaurant_ids (iterable): Restaurant IDs (str)
+
+        Returns:
+            list: Restaurant dictionaries (IDs without a hash are skipped)
+        """
+        if self.catalog_cache is None:
+            return self.get_many(restaurant_ids)
+
+        found, missing = self.catalog_cache.get_restaurants(restaurant_ids)
+        if missing:
+            fetched = self.get_many(missing)
+            self.catalog_cache.put_restaurants(version, fetched)
+            found.update((r['id'], r) for r in fetched)
+        return list(found.values())
+
+    @staticmethod
+    def _current_day():
+        """
+        Get the current day of week in Sunday=0 format (0=Sunday, 1=Monday, ..., 6=Saturday)
+
+        Returns:
+            int: Current day of week
+        """
+        # Python uses Monday=0
+        return (datetime.utcnow().weekday() + 1) % 7
+
+    def _index_open_days(self, restaurant_id, closed_days, pipe=None):
+        """
+        Place a restaurant in the restaurants:open_on:{day} set of every day it is open
+
+        Args:
+            restaurant_id (str): Restaurant ID
+            closed_days (list): Days the restaurant is closed (0=Sunday, ..., 6=Saturday)
+            pipe (redis.client.Pipeline, optional): Queue on this pipeline instead of
+                sending the commands immediately
+        """
+        target = pipe if pipe is not None else self.redis.pipeline(transaction=False)
+        for day in range(7):
+            if day in closed_days:
+                target.srem(f"restaurants:open_on:{day}", restaurant_id)
+            else:
+                target.sadd(f"restaurants:open_on:{day}", restaurant_id)
+        if pipe is None:
+            target.execute()
+
+    def _unindex_open_days(self, restaurant_id, pipe=None):
+        """
+        Remove a restaurant from all seven restaurants:open_on:{day} sets
+
+        Args:
+            restaurant_id (str): Restaurant ID
+            pipe (redis.client.Pipeline, optional): Queue on this pipeline instead of
+                sending the commands immediately
+        """
+        target = pipe if pipe is not None else self.redis.pipeline(transaction=False)
+        for day in range(7):
+            target.srem(f"restaurants:open_on:{day}", restaurant_id)
+        if pipe is None:
+            target.execute()
+
+    @staticmethod
+    def _parse_coordinates(lat, lng, strict=True):
+        """
+        Validate a latitude/longitude pair
+
+        Args:
+            lat (str|float): Latitude ('' or None = no coordinates)
+            lng (str|float): Longitude ('' or None = no coordinates)
+            strict (bool): Raise on invalid values instead of treating them as missing
+
+        Returns:
+            tuple: (lat, lng) as floats, or None if either value is missing
+
+        Raises:
+            ValueError: If strict and the values are not valid coordinates
+        """
+        if lat in (None, '') or lng in (None, ''):
+            return None
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            lat = lng = math.nan
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            if strict:
+                raise ValueError("Latitude and longitude must be numbers")
+            return None
+        # Redis GEO sets only accept latitudes within the Web Mercator range
+        if not (-85.05112878 <= lat <= 85.05112878 and -180 <= lng <= 180):
+            if strict:
+                raise ValueError("Coordinates are out of range")
+            return None
+        return lat, lng
+
+    @classmethod
+    def _home_coordinates(cls):
+        """
+        Parse GOOGLE_PLACES_LOCATION (the point radius filters and estimates measure from)
+
+        Returns:
+            tuple: (lat, lng) as floats, or None if the location is not configured
+        """
+        parts = (Config.GOOGLE_PLACES_LOCATION or '').split(',')
+        if len(parts) != 2:
+            return None
+        return cls._parse_coordinates(parts[0].strip(), parts[1].strip(), strict=False)
+
+    def _index_geo(self, restaurant_id, coordinates, pipe=None):
+        """
+        Place a restaurant in the restaurants:geo set, or drop it if it has no coordinates
+
+        Args:
+            restaurant_id (str): Restaurant ID
+            coordinates (tuple): (lat, lng) or None
+            pipe (redis.client.Pipeline, optional): Queue on this pipeline instead of
+                sending the command immediately
+        """
+        target = pipe if pipe is not None else self.redis
+        if coordinates:
+            target.geoadd(self.GEO_INDEX_KEY, [coordinates[1], coordinates[0], restaurant_id])
+        else:
+            target.zrem(self.GEO_INDEX_KEY, restaurant_id)
+
+    def rebuild_geo_index(self):
+        """
+        Rebuild the restaurants:geo set from the lat/lng stored on active restaurants
+        Used to backfill the index for data created before it existed
+
+        Returns:
+            dict: Number of active restaurants scanned and number indexed
+        """
+        ids = list(self.redis.smembers("restaurants:index"))
+
+        members = []
+        chunk_size = Config.REDIS_PIPELINE_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            pipe = self.redis.pipeline(transaction=False)
+            for rid in chunk:
+                pipe.hmget(f"restaurants:{rid}", "lat", "lng")
+            for rid, (lat, lng) in zip(chunk, pipe.execute()):
+                coordinates = self._parse_coordinates(lat, lng, strict=False)
+                if coordinates:
+                    members.extend([coordinates[1], coordinates[0], rid])
+
+        # Swap the set in one transaction so readers never see a partial index
+        pipe = self.redis.pipeline()
+        pipe.delete(self.GEO_INDEX_KEY)
+        for start in range(0, len(members), chunk_size * 3):
+            pipe.geoadd(self.GEO_INDEX_KEY, members[start:start + chunk_size * 3])
+        pipe.set(f"{self.GEO_INDEX_KEY}:built_at", datetime.utcnow().isoformat())
+        self._bump_catalog_version(pipe)
+        pipe.execute()
+
+        return {
+            "restaurants_scanned": len(ids),
+            "restaurants_indexed": len(members) // 3
+        }
+
+    def rebuild_open_days_index(self):
+        """
+        Rebuild the per-weekday restaurants:open_on:{day} sets from the restaurant hashes
+        Used to backfill the index for data created before it existed
+
+        Returns:
+            dict: Number of restaurants indexed and open count per day
+        """
+        restaurants = [r for r in self.get_many(self.redis.smembers("restaurants:index"))
+                       if r.get('is_active') == '1']
+
+        open_on = {day: [] for day in range(7)}
+        for restaurant in restaurants:
+            closed_days = restaurant.get('closed_days', [])
+            for day in range(7):
+                if day not in closed_days:
+                    open_on[day].append(restaurant['id'])
+
+        # Swap the sets in one transaction so readers never see a partial index
+        chunk_size = Config.REDIS_PIPELINE_CHUNK_SIZE
+        pipe = self.redis.pipeline()
+        for day, ids in open_on.items():
+            pipe.delete(f"restaurants:open_on:{day}")
+            for start in range(0, len(ids), chunk_size):
+                pipe.sadd(f"restaurants:open_on:{day}", *ids[start:start + chunk_size])
+        pipe.set("restaurants:open_on:built_at", datetime.utcnow().isoformat())
+        self._bump_catalog_version(pipe)
+        pipe.execute()
+
+        return {
+            "restaurants_indexed": len(restaurants),
+            "open_on": {day: len(ids) for day, ids in open_on.items()}
+        }
+
+    def ensure_indexes(self):
+        """
+        Backfill derived indexes that are missing (e.g. after upgrading existing data)
+
+        Returns:
+            list: Names of the indexes that were rebuilt
+        """
+        rebuilt = []
+        if not self.redis.exists("restaurants:open_on:built_at"):
+            self.rebuild_open_days_index()
+            rebuilt.append("open_on")
+        if not self.redis.exists(f"{self.GEO_INDEX_KEY}:built_at"):
+            self.rebuild_geo_index()
+            rebuilt.append("geo")
+        if self.migrate_history_list():
+            rebuilt.append("history")
+        return rebuilt
+
+    def _filter_sources(self, category=None, distance=None, open_on=None, within_m=None):
+        """
+        Work out which index sets a set of filters combines
+        Distance works as "max distance": every distance up to and including
+        the selected one is allowed
+
+        Args:
+            category (str, optional): Filter by category
+            distance (str, optional): Filter by max distance
+            open_on (int, optional): Only restaurants open on this day (0=Sunday, ..., 6=Saturday)
+            within_m (float, optional): Only restaurants within this many meters of
+                GOOGLE_PLACES_LOCATION (the set must be filled with _queue_geo_filter)
+
+        Returns:
+            tuple: (distance_keys to union, keys to intersect with the union,
+                    temporary union key, temporary result key)
+        """
+        distance_keys = []
+        if distance:
+            allowed_distances = self.DISTANCE_HIERARCHY[:self.DISTANCE_HIERARCHY.index(distance) + 1]
+            distance_keys = [f"restaurants:by_distance:{d}" for d in allowed_distances]
+
+        intersect_keys = []
+        if category:
+            intersect_keys.append(f"restaurants:by_category:{category}")
+        if open_on is not None:
+            intersect_keys.append(f"restaurants:open_on:{open_on}")
+        if within_m:
+            intersect_keys.append(self._geo_filter_key(within_m))
+
+        union_key = f"tmp:filter:distance:{distance}"
+        filter_key = f"tmp:filter:{category}:{distance}:{open_on}"
+        if within_m:
+            # Keyed on the exact radius so nearby radii never share a result set
+            filter_key += f":{float(within_m)!r}m"
+        return distance_keys, intersect_keys, union_key, filter_key
+
+    @staticmethod
+    def _geo_filter_key(within_m):
+        """
+        Key of the temporary set holding the restaurants within a radius
+
+        Args:
+            within_m (float): Radius in meters
+
+        Returns:
+            str: Redis key
+        """
+        return f"tmp:filter:geo:{float(within_m)!r}m"
+
+    def _queue_geo_filter(self, pipe, within_m):
+        """
+        Queue the GEOSEARCH that fills the radius filter set on a pipeline
+        The search runs inside Redis, centered on GOOGLE_PLACES_LOCATION
+
+        Args:
+            pipe (redis.client.Pipeline): Pipeline to queue the script on
+            within_m (float): Radius in meters
+
+        Raises:
+            ValueError: If GOOGLE_PLACES_LOCATION is not a valid "lat,lng" pair
+        """
+        origin = self._home_coordinates()
+        if not origin:
+            raise ValueError("Radius filters need GOOGLE_PLACES_LOCATION set to \"lat,lng\"")
+
+        self.geo_filter_script(
+            keys=[self.GEO_INDEX_KEY, self._geo_filter_key(within_m)],
+            args=[origin[1], origin[0], within_m, Config.FILTER_TEMP_KEY_TTL_SECONDS],
+            client=pipe
+        )
+
+    def _queue_filter_sources(self, pipe, category=None, distance=None, open_on=None, within_m=None):
+        """
+        Queue the commands that prepare the sets a filter intersects
+        (the distance union and the radius set) without intersecting them
+
+        Args:
+            pipe (redis.client.Pipeline): Pipeline to queue commands on
+            category (str, optional): Filter by category
+            distance (str, optional): Filter by max distance
+            open_on (int, optional): Only restaurants open on this day (0=Sunday, ..., 6=Saturday)
+            within_m (float, optional): Only restaurants within this many meters of home
+
+        Returns:
+            tuple: (keys to intersect (empty = no filter), temporary result key)
+        """
+        ttl = Config.FILTER_TEMP_KEY_TTL_SECONDS
+        distance_keys, intersect_keys, union_key, filter_key = self._filter_sources(
+            category, distance, open_on, within_m
+        )
+        if within_m:
+            self._queue_geo_filter(pipe, within_m)
+
+        sources = []
+        if len(distance_keys) == 1:
+            sources.append(distance_keys[0])
+        elif distance_keys:
+            pipe.sunionstore(union_key, distance_keys)
+            pipe.expire(union_key, ttl)
+            sources.append(union_key)
+        sources.extend(intersect_keys)
+        return sources, filter_key
+
+    def _queue_filter(self, pipe, category=None, distance=None, open_on=None, within_m=None):
+        """
+        Queue the set algebra that resolves filters on a pipeline
+        The allowed distance sets are unioned and then intersected with the
+        category (and open-day / radius) sets, all inside Redis
+
+        Args:
+            pipe (redis.client.Pipeline): Pipeline to queue commands on
+            category (str, optional): Filter by category
+            distance (str, optional): Filter by max distance
+            open_on (int, optional): Only restaurants open on this day (0=Sunday, ..., 6=Saturday)
+            within_m (float, optional): Only restaurants within this many meters of home
+
+        Returns:
+            str: Key of the set holding the matching restaurant IDs
+        """
+        ttl = Config.FILTER_TEMP_KEY_TTL_SECONDS
+        sources, filter_key = self._queue_filter_sources(pipe, category, distance, open_on, within_m)
+
+        if not sources:
+            return "restaurants:index"
+        if len(sources) == 1:
+            return sources[0]
+
+        # Intersect category with allowed distances into a short-lived key
+        pipe.sinterstore(filter_key, sources)
+        pipe.expire(filter_key, ttl)
+        return filter_key
+
+    def _filter_key(self, category=None, distance=None, open_on=None, within_m=None):
+        """
+        Resolve filters to a Redis set without transferring its members
+
+        Args:
+            category (str, optional): Filter by category
+            distance (str, optional): Filter by max distance
+            open_on (int, optional): Only restaurants open on this day
+            within_m (float, optional): Only restaurants within this many meters of home
+
+        Returns:
+            str: Key of the set holding the matching restaurant IDs
+        """
+        pipe = self.redis.pipeline()
+        filter_key = self._queue_filter(pipe, category, distance, open_on, within_m)
+        if len(pipe):
+            pipe.execute()
+        return filter_key
+
+    def _count_filters(self, filters, member_id=None):
+        """
+        Count the restaurants matching several filters in one pipeline
+        Cardinalities come from SCARD/SINTERCARD over the index sets, so no
+        intersection is stored and no member is transferred (SINTERCARD needs Redis 7.0+)
+
+        Args:
+            filters (list): (category, distance, open_on, within_m) tuples
+            member_id (str, optional): Also check whether this restaurant matches each filter
+
+        Returns:
+            list: (count, member_id matches) per filter
+        """
+        pipe = self.redis.pipeline()
+        positions = []
+        for category, distance, open_on, within_m in filters:
+            sources, _ = self._queue_filter_sources(pipe, category, distance, open_on, within_m)
+            sources = sources or ["restaurants:index"]
+            count_position = len(pipe)
+            if len(sources) == 1:
+                pipe.scard(sources[0])
+            else:
+                pipe.sintercard(len(sources), sources)
+            if member_id:
+                for key in sources:
+                    pipe.sismember(key, member_id)
+            positions.append((count_position, len(sources)))
+
+        replies = pipe.execute()
+        results = []
+        for count_position, source_count in positions:
+            memberships = replies[count_position + 1:count_position + 1 + source_count] if member_id else []
+            results.append((replies[count_position], bool(memberships) and all(memberships)))
+        return results
+
+    def _get_names(self, restaurant_ids):
+        """
+        Read only the name of many restaurants with pipelined HGETs
+
+        Args:
+            restaurant_ids (list): Restaurant IDs (str)
+
+        Returns:
+            dict: restaurant_id -> name (IDs without a hash are skipped)
+        """
+        names = {}
+        chunk_size = Config.REDIS_PIPELINE_CHUNK_SIZE
+        for start in range(0, len(restaurant_ids), chunk_size):
+            chunk = restaurant_ids[start:start + chunk_size]
+            pipe = self.redis.pipeline(transaction=False)
+            for restaurant_id in chunk:
+                pipe.hget(f"restaurants:{restaurant_id}", "name")
+            for restaurant_id, name in zip(chunk, pipe.execute()):
+                if name is not None:
+                    names[restaurant_id] = name
+        return names
+
+    def get_all(self, category=None, distance=None, active_only=True, within_m=None):
         """
         Get all restaurants, optionally filtered by category and/or distance
         Distance filter works as "max distance" - includes all closer options
@@ -162,50 +753,21 @@ class RestaurantModel:
             category (str, optional): Filter by category
             distance (str, optional): Filter by max distance
             active_only (bool): Only return active restaurants (default True)
+            within_m (float, optional): Only restaurants with coordinates within this
+                many meters of GOOGLE_PLACES_LOCATION (GEOSEARCH on restaurants:geo)
 
         Returns:
             list: List of restaurant dictionaries
         """
-        # Define distance hierarchy (in order from closest to farthest)
-        distance_hierarchy = ['nearby', 'short-drive', 'medium-drive', 'far']
-
-        # Start with all restaurants or apply filters
-        if category and distance:
-            # Get all restaurants in category
-            cat_ids = self.redis.smembers(f"restaurants:by_category:{category}")
-
-            # Get all distances up to and including selected distance
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-
-            # Intersect category with allowed distances
-            ids = cat_ids.intersection(dist_ids)
-        elif category:
-            ids = self.redis.smembers(f"restaurants:by_category:{category}")
-        elif distance:
-            # Get all distances up to and including selected distance
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-            ids = dist_ids
-        else:
-            ids = self.redis.smembers("restaurants:index")
+        # Resolve filters inside Redis (or the catalog cache); only the final ID set crosses the wire
+        version = self.catalog_version()
+        ids = self._cached_filter_ids(version, [(category, distance, None, within_m)])[0]
 
-        restaurants = []
-        for rid in ids:
-            # Convert bytes to string
-            if isinstance(rid, bytes):
-                rid = rid.decode('utf-8')
-
-            restaurant = self.get(rid)
-            if restaurant:
-                # Filter by active status if requested
-                if active_only and restaurant.get('is_active') != '1':
-                    continue
-                restaurants.append(restaurant)
+        restaurants = self._cached_get_many(version, ids)
+
+        # Filter by active status if requested
+        if active_only:
+            restaurants = [r for r in restaurants if r.get('is_active') == '1']
 
         # Sort by name
         restaurants.sort(key=lambda x: x.get('name', '').lower())
@@ -243,212 +805,252 @@ class RestaurantModel:
             self.redis.srem(f"restaurants:by_category:{category}", restaurant_id)
         if distance:
             self.redis.srem(f"restaurants:by_distance:{distance}", restaurant_id)
+        self._unindex_open_days(restaurant_id)
+        self.redis.zrem(self.GEO_INDEX_KEY, restaurant_id)
 
         # Auto-backup after delete
-        try:
-            self.backup_to_file()
-        except Exception as e:
-            print(f"Backup failed: {e}")
+        self._record_mutation("restaurant", restaurant=self.get(restaurant_id))
 
         return True
 
-    def get_random(self, category=None, distance=None):
+    def spin(self, username, category=None, distance=None, within_m=None):
         """
-        Get a random restaurant, optionally filtered by category and/or distance
-        Excludes the last spin if it was within 15 minutes
-        Excludes restaurants closed on the current day of week
-        Includes weighted "Eat at Home" option if enabled
+        Perform a complete spin atomically in a single Redis round trip
+        Runs the cooldown check, filtering, recent-spin exclusion, weighted pick,
+        cooldown record and history append as one Lua script, so concurrent
+        workers cannot race between checking and recording a user's spin
 
         Args:
+            username (str): Username who pressed spin
             category (str, optional): Filter by category
-            distance (str, optional): Filter by distance
+            distance (str, optional): Filter by max distance
+            within_m (float, optional): Only restaurants within this many meters of home
+                (the GEOSEARCH is sent in the same pipeline, ahead of the script)
 
         Returns:
-            dict: Random restaurant data or None if no restaurants available
+            dict: {"status": "ok", "restaurant": dict, "entry_id": str},
+                  {"status": "cooldown", "seconds_remaining": int} or
+                  {"status": "empty"} when no restaurants are available
         """
         import random
 
-        # Define distance hierarchy (in order from closest to farthest)
-        distance_hierarchy = ['nearby', 'short-drive', 'medium-drive', 'far']
-
-        # Get appropriate set based on filters
-        if category and distance:
-            # Get all restaurants in category
-            cat_ids = self.redis.smembers(f"restaurants:by_category:{category}")
-
-            # Get all distances up to and including selected distance
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-
-            # Intersect category with allowed distances
-            ids_list = list(cat_ids.intersection(dist_ids))
-        elif category:
-            ids_list = list(self.redis.smembers(f"restaurants:by_category:{category}"))
-        elif distance:
-            # Get all distances up to and including selected distance
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-            ids_list = list(dist_ids)
+        now = datetime.utcnow()
+        timestamp = f"{now.timestamp()}"
+        current_day = self._current_day()
+
+        distance_keys, intersect_keys, union_key, filter_key = self._filter_sources(
+            category, distance, open_on=current_day, within_m=within_m
+        )
+
+        pipe = self.redis.pipeline(transaction=False)
+        if within_m:
+            self._queue_geo_filter(pipe, within_m)
+        self.spin_script(
+            keys=[f"user:{username}:last_spin", "history:index", f"history:entry:{timestamp}",
+                  "history:retention", HISTORY_VERSION_KEY, union_key, filter_key,
+                  self.WEIGHTS_KEY] + distance_keys + intersect_keys,
+            args=[
+                timestamp,
+                Config.SPIN_TIMEOUT_SECONDS,
+                len(distance_keys),
+                Config.FILTER_TEMP_KEY_TTL_SECONDS,
+                self.RECENT_SPIN_WINDOW_SECONDS,
+                self._home_weight(current_day),
+                '1' if Config.EAT_AT_HOME_IGNORE_RECENT_SPIN else '0',
+                random.random(),
+                username,
+                now.isoformat(),
+                Config.EAT_AT_HOME_NAME,
+                self._history_cutoff(),
+                Config.HISTORY_TRIM_BATCH_SIZE,
+                self._history_entry_ttl()
+            ],
+            client=pipe
+        )
+        result = pipe.execute()[-1]
+
+        status = result[0]
+        if status == 'cooldown':
+            return {"status": "cooldown", "seconds_remaining": int(result[1])}
+        if status == 'empty':
+            return {"status": "empty"}
+
+        entry_id, winner_id = result[1], result[3]
+
+        if winner_id == "eat-at-home":
+            restaurant = self._eat_at_home()
         else:
-            ids_list = list(self.redis.smembers("restaurants:index"))
-
-        # Get current day of week (0=Sunday, 1=Monday, ..., 6=Saturday)
-        current_day = datetime.utcnow().weekday()
-        # Convert to Sunday=0 format (Python uses Monday=0)
-        current_day = (current_day + 1) % 7
-
-        # Check for recent spin (within 15 minutes)
-        excluded_id = None
-        recent_history = self.get_history(limit=1)
-        if recent_history:
-            last_spin = recent_history[0]
-            last_time = datetime.fromisoformat(last_spin.get('timestamp'))
-            time_diff = (datetime.utcnow() - last_time).total_seconds()
-
-            # If last spin was within 15 minutes (900 seconds), exclude it
-            if time_diff < 900:
-                excluded_id = last_spin.get('restaurant_id')
-
-        # Build weighted pool of candidates
-        pool = []
-
-        # Add restaurants to pool (filtering out closed and excluded ones)
-        for restaurant_id in ids_list:
-            # Convert bytes to string if needed
-            if isinstance(restaurant_id, bytes):
-                restaurant_id = restaurant_id.decode('utf-8')
-
-            # Skip if this was the recently excluded restaurant
-            if excluded_id and restaurant_id == excluded_id:
-                continue
+            fields = result[4:]
+            restaurant = self._format_restaurant(dict(zip(fields[::2], fields[1::2])))
 
-            # Get the restaurant to check its closed days
-            restaurant = self.get(restaurant_id)
-            if not restaurant:
-                continue
+        return {"status": "ok", "restaurant": restaurant, "entry_id": entry_id}
 
-            # Check if restaurant is closed today
-            closed_days = restaurant.get('closed_days', [])
-            if current_day in closed_days:
-                continue  # Skip this restaurant, it's closed today
-
-            # Add to pool (weight of 1 for regular restaurants)
-            pool.append(restaurant)
-
-        # Add "Eat at Home" option with weight if enabled and not excluded today
-        if Config.EAT_AT_HOME_ENABLED and current_day not in Config.EAT_AT_HOME_EXCLUDED_DAYS:
-            # Check if "Eat at Home" should be excluded by recent spin
-            exclude_eat_at_home = False
-            if not Config.EAT_AT_HOME_IGNORE_RECENT_SPIN and excluded_id == "eat-at-home":
-                exclude_eat_at_home = True
-
-            if not exclude_eat_at_home:
-                eat_at_home = {
-                    "id": "eat-at-home",
-                    "name": Config.EAT_AT_HOME_NAME,
-                    "categories": ["home"],
-                    "distance": "nearby",
-                    "added_by": "System",
-                    "is_eat_at_home": True,
-                    "closed_days": []
-                }
-                # Add multiple times based on weight
-                for _ in range(Config.EAT_AT_HOME_WEIGHT):
-                    pool.append(eat_at_home)
-
-        # Return None if pool is empty
-        if not pool:
-            return None
+    @staticmethod
+    def _eat_at_home():
+        """
+        Build the virtual "Eat at Home" entry used by the randomizer
 
-        # Pick random from weighted pool
-        return random.choice(pool)
+        Returns:
+            dict: Restaurant-shaped "Eat at Home" data
+        """
+        return {
+            "id": "eat-at-home",
+            "name": Config.EAT_AT_HOME_NAME,
+            "categories": ["home"],
+            "distance": "nearby",
+            "added_by": "System",
+            "is_eat_at_home": True,
+            "closed_days": []
+        }
 
-    def get_randomization_stats(self, category=None, distance=None):
+    @staticmethod
+    def _parse_weight(value):
         """
-        Get statistics about the current randomization pool without actually selecting.
-        Shows what items are in the pool and their probabilities.
+        Parse a weight sent by Redis as a string
 
         Args:
-            category (str, optional): Filter by category
-            distance (str, optional): Filter by distance
+            value (str): Weight
 
         Returns:
-            dict: Pool statistics including counts, percentages, and excluded items
+            int|float: Weight (whole weights as int)
         """
-        import random
+        weight = float(value)
+        return int(weight) if weight.is_integer() else weight
+
+    def get_weights(self):
+        """
+        Get the per-restaurant spin weights that differ from the default of 1
+
+        Returns:
+            dict: restaurant_id -> weight
+        """
+        return {rid: self._parse_weight(weight) for rid, weight in self.redis.hgetall(self.WEIGHTS_KEY).items()}
+
+    def set_weight(self, restaurant_id, weight):
+        """
+        Set how many pool entries a restaurant counts as in spins and pool statistics
+        Only weights other than 1 are stored, so the spin visits just those restaurants;
+        0 keeps a restaurant listed but never drawn
+
+        Args:
+            restaurant_id (str): Restaurant ID
+            weight (float): Non-negative weight (1 = default)
 
-        # Define distance hierarchy (in order from closest to farthest)
-        distance_hierarchy = ['nearby', 'short-drive', 'medium-drive', 'far']
-
-        # Get appropriate set based on filters (same logic as get_random)
-        if category and distance:
-            cat_ids = self.redis.smembers(f"restaurants:by_category:{category}")
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-            ids_list = list(cat_ids.intersection(dist_ids))
-        elif category:
-            ids_list = list(self.redis.smembers(f"restaurants:by_category:{category}"))
-        elif distance:
-            allowed_distances = distance_hierarchy[:distance_hierarchy.index(distance) + 1]
-            dist_ids = set()
-            for dist in allowed_distances:
-                dist_ids.update(self.redis.smembers(f"restaurants:by_distance:{dist}"))
-            ids_list = list(dist_ids)
+        Returns:
+            bool: True if set, False if the restaurant does not exist
+
+        Raises:
+            ValueError: If the weight is not a finite, non-negative number
+        """
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError("Weight must be a number")
+        if not math.isfinite(weight) or weight < 0:
+            raise ValueError("Weight must be a finite number of at least 0")
+
+        restaurant_id = str(restaurant_id)
+        if not self.redis.exists(f"restaurants:{restaurant_id}"):
+            return False
+
+        if weight == 1:
+            self.redis.hdel(self.WEIGHTS_KEY, restaurant_id)
         else:
-            ids_list = list(self.redis.smembers("restaurants:index"))
+            self.redis.hset(self.WEIGHTS_KEY, restaurant_id, repr(weight))
+        self._record_mutation("weight", restaurant_id=restaurant_id, weight=weight)
+        return True
 
-        # Get current day of week
-        current_day = datetime.utcnow().weekday()
-        current_day = (current_day + 1) % 7  # Convert to Sunday=0 format
-
-        # Check for recent spin exclusion
-        excluded_restaurant = None
-        excluded_id = None
-        recent_history = self.get_history(limit=1)
-        if recent_history:
-            last_spin = recent_history[0]
-            last_time = datetime.fromisoformat(last_spin.get('timestamp'))
-            time_diff = (datetime.utcnow() - last_time).total_seconds()
-            if time_diff < 900:  # 15 minutes
-                excluded_id = last_spin.get('restaurant_id')
-                if excluded_id and excluded_id != 'eat-at-home':
-                    excluded_restaurant = self.get(excluded_id)
-
-        # Build pool (same logic as get_random)
-        pool = []
-        closed_today = []
-
-        for restaurant_id in ids_list:
-            if isinstance(restaurant_id, bytes):
-                restaurant_id = restaurant_id.decode('utf-8')
-
-            restaurant = self.get(restaurant_id)
-            if not restaurant:
-                continue
+    @staticmethod
+    def _home_weight(day):
+        """
+        Weight of "Eat at Home" in the spin pool on a day, before the recent-spin exclusion
 
-            # Check if excluded by recent spin
-            if excluded_restaurant and restaurant_id == excluded_restaurant.get('id'):
-                continue
+        Args:
+            day (int): Day of week (0=Sunday, ..., 6=Saturday)
 
-            # Check if closed today
-            closed_days = restaurant.get('closed_days', [])
-            if current_day in closed_days:
-                closed_today.append(restaurant.get('name'))
-                continue
+        Returns:
+            int: EAT_AT_HOME_WEIGHT, or 0 when disabled or excluded that day
+        """
+        if Config.EAT_AT_HOME_ENABLED and day not in Config.EAT_AT_HOME_EXCLUDED_DAYS:
+            return Config.EAT_AT_HOME_WEIGHT
+        return 0
 
-            pool.append(restaurant)
+    def get_randomization_stats(self, category=None, distance=None, within_m=None, aggregate_only=False):
+        """
+        Get statistics about the current randomization pool without actually selecting.
+        Shows what items are in the pool and their probabilities.
+        The pool, recent-spin exclusion and weights come from the same Lua code
+        the spin runs (SPIN_POOL_SCRIPT), so the stats match what a spin would draw from.
+
+        Args:
+            category (str, optional): Filter by category
+            distance (str, optional): Filter by distance
+            within_m (float, optional): Only restaurants within this many meters of home
+            aggregate_only (bool): Return totals and probabilities without per-item listings
 
-        # Add "Eat at Home" with weight if enabled and not excluded today
-        eat_at_home_count = 0
+        Returns:
+            dict: Pool statistics including counts, percentages, and excluded items
+        """
+        # Get current day of week
+        current_day = self._current_day()
+        home_weight = self._home_weight(current_day)
+
+        # Resolve the spin pool (restaurants open today) exactly as the spin script does
+        distance_keys, intersect_keys, union_key, filter_key = self._filter_sources(
+            category, distance, open_on=current_day, within_m=within_m
+        )
+        pipe = self.redis.pipeline(transaction=False)
+        if within_m:
+            self._queue_geo_filter(pipe, within_m)
+        self.spin_pool_script(
+            keys=["history:index", union_key, filter_key, self.WEIGHTS_KEY] + distance_keys + intersect_keys,
+            args=[
+                len(distance_keys),
+                Config.FILTER_TEMP_KEY_TTL_SECONDS,
+                datetime.utcnow().timestamp(),
+                self.RECENT_SPIN_WINDOW_SECONDS,
+                home_weight,
+                '1' if Config.EAT_AT_HOME_IGNORE_RECENT_SPIN else '0',
+                '0' if aggregate_only else '1'
+            ],
+            client=pipe
+        )
+        result = pipe.execute()[-1]
+        restaurant_count, eat_at_home_count, excluded_id, excluded_in_pool = result[:4]
+        restaurant_weight = self._parse_weight(result[4])
+        weight_pairs = result[6:6 + 2 * result[5]]
+        weights = {rid: self._parse_weight(w) for rid, w in zip(weight_pairs[::2], weight_pairs[1::2])}
+        pool_members = result[6 + 2 * result[5]:]
+
+        # Restaurant excluded by recent spin
+        excluded_restaurant_id = excluded_id if excluded_id not in ('', 'eat-at-home') else None
+        excluded_name = None
+        if excluded_restaurant_id:
+            excluded_name = self._get_names([excluded_restaurant_id]).get(excluded_restaurant_id)
+
+        # Restaurants matching the filters but closed today (the excluded one is not listed)
+        if aggregate_only:
+            [(filtered_count, excluded_filtered)] = self._count_filters(
+                [(category, distance, None, within_m)], member_id=excluded_restaurant_id
+            )
+            closed_count = (filtered_count - restaurant_count - excluded_in_pool
+                            - (excluded_filtered and not excluded_in_pool))
+        else:
+            version = self.catalog_version()
+            [filtered_ids] = self._cached_filter_ids(version, [(category, distance, None, within_m)])
+            open_ids = set(pool_members)
+            closed_ids = filtered_ids - open_ids
+            open_ids.discard(excluded_restaurant_id)
+            closed_ids.discard(excluded_restaurant_id)
+
+            names = self._get_names(list(open_ids | closed_ids))
+            pool_names = [(names[rid], weights.get(rid, 1)) for rid in open_ids if rid in names]
+            closed_today = [names[rid] for rid in closed_ids if rid in names]
+            closed_count = len(closed_today)
+
+        # Explain a missing "Eat at Home" (its weight already came from the script)
         eat_at_home_excluded = None
         eat_at_home_excluded_reason = None
-
         if Config.EAT_AT_HOME_ENABLED:
             # Check if excluded by day
             if current_day in Config.EAT_AT_HOME_EXCLUDED_DAYS:
@@ -456,39 +1058,49 @@ class RestaurantModel:
                 day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
                 eat_at_home_excluded_reason = f"Excluded on {day_names[current_day]}"
             # Check if excluded by recent spin
-            elif not Config.EAT_AT_HOME_IGNORE_RECENT_SPIN and excluded_id == "eat-at-home":
+            elif home_weight > 0 and eat_at_home_count == 0:
                 eat_at_home_excluded = Config.EAT_AT_HOME_NAME
                 eat_at_home_excluded_reason = "Recent spin (within 15 min)"
-            else:
-                # Not excluded, add to pool
-                eat_at_home = {
-                    "id": "eat-at-home",
-                    "name": Config.EAT_AT_HOME_NAME,
-                    "categories": ["home"],
-                    "distance": "nearby",
-                    "added_by": "System",
-                    "is_eat_at_home": True,
-                    "closed_days": []
-                }
-                for _ in range(Config.EAT_AT_HOME_WEIGHT):
-                    pool.append(eat_at_home)
-                eat_at_home_count = Config.EAT_AT_HOME_WEIGHT
-
-        # Calculate statistics
-        total_items = len(pool)
+
+        # Calculate statistics (each restaurant counts as many pool entries as it weighs, 1 by default)
+        total_items = restaurant_weight + eat_at_home_count
+
+        def percentage(count):
+            return round(count / total_items * 100, 1) if total_items > 0 else 0
+
+        stats = {
+            "total_pool_size": total_items,
+            "restaurant_count": restaurant_count,
+            "restaurant_weight": restaurant_weight,
+            "restaurant_percentage": percentage(1) if restaurant_count else 0,
+            "eat_at_home_count": eat_at_home_count,
+            "eat_at_home_percentage": percentage(eat_at_home_count),
+            "excluded": excluded_name,
+            "excluded_reason": "Recent spin (within 15 min)" if excluded_name is not None else None,
+            "closed_today_count": closed_count,
+            "filters": {
+                "category": category if category else None,
+                "distance": distance if distance else None,
+                "within_m": within_m
+            }
+        }
+        if aggregate_only:
+            return stats
+
+        # Build per-item listing (restaurants sharing a name are counted together)
         item_counts = {}
-        for item in pool:
-            name = item.get('name', 'Unknown')
-            item_counts[name] = item_counts.get(name, 0) + 1
+        for name, weight in pool_names:
+            item_counts[name] = item_counts.get(name, 0) + weight
+        if eat_at_home_count:
+            name = Config.EAT_AT_HOME_NAME
+            item_counts[name] = item_counts.get(name, 0) + eat_at_home_count
 
-        # Build stats response
         items = []
         for name, count in sorted(item_counts.items()):
-            percentage = (count / total_items * 100) if total_items > 0 else 0
             items.append({
                 "name": name,
                 "count": count,
-                "percentage": round(percentage, 1),
+                "percentage": percentage(count),
                 "excluded": False
             })
 
@@ -502,21 +1114,27 @@ class RestaurantModel:
                 "excluded_reason": eat_at_home_excluded_reason
             })
 
-        return {
-            "total_pool_size": total_items,
-            "items": items,
-            "excluded": excluded_restaurant.get('name') if excluded_restaurant else None,
-            "excluded_reason": "Recent spin (within 15 min)" if excluded_restaurant else None,
-            "closed_today": closed_today,
-            "filters": {
-                "category": category if category else None,
-                "distance": distance if distance else None
-            }
-        }
+        stats["items"] = items
+        stats["closed_today"] = closed_today
+        return stats
+
+    def spin_limiter(self):
+        """
+        Get the per-user spin cooldown (one spin per SPIN_TIMEOUT_SECONDS)
+        The spin script starts the cooldown on user:{username}:last_spin in the
+        same atomic step as the draw; the limiter reads that key
+
+        Returns:
+            RateLimiter: Cooldown limiter
+        """
+        return RateLimiter(self.redis, "spin", 1, Config.SPIN_TIMEOUT_SECONDS,
+                           key_format="user:{identity}:last_spin")
 
     def can_user_spin(self, username):
         """
         Check if a user can spin based on rate limiting
+        The cooldown key lives exactly as long as the cooldown, so a single PTTL
+        answers the question without reading or writing anything else
 
         Args:
             username (str): Username to check
@@ -524,111 +1142,111 @@ class RestaurantModel:
         Returns:
             tuple: (can_spin: bool, seconds_remaining: int)
         """
-        last_spin_key = f"user:{username}:last_spin"
-        last_spin_time = self.redis.get(last_spin_key)
+        seconds_remaining = self.spin_limiter().retry_after(username)
+        return seconds_remaining == 0, seconds_remaining
 
-        if not last_spin_time:
-            return True, 0
+    @staticmethod
+    def _history_cutoff():
+        """
+        Timestamp before which history entries fall outside HISTORY_RETENTION_DAYS
 
-        try:
-            last_spin_time = float(last_spin_time)
-            time_since_spin = datetime.utcnow().timestamp() - last_spin_time
+        Returns:
+            str: Cutoff timestamp (seconds, same clock as history entry IDs)
+        """
+        from datetime import timedelta
 
-            if time_since_spin >= Config.SPIN_TIMEOUT_SECONDS:
-                return True, 0
-            else:
-                seconds_remaining = int(Config.SPIN_TIMEOUT_SECONDS - time_since_spin)
-                return False, seconds_remaining
-        except (ValueError, TypeError):
-            return True, 0
+        return f"{(datetime.utcnow() - timedelta(days=Config.HISTORY_RETENTION_DAYS)).timestamp()}"
 
-    def record_user_spin(self, username):
+    @staticmethod
+    def _history_entry_ttl():
         """
-        Record that a user has just spun
+        TTL for history entry hashes: retention period plus a day, so a hash
+        missed by the trim still disappears on its own
 
-        Args:
-            username (str): Username who spun
+        Returns:
+            int: TTL in seconds
         """
-        last_spin_key = f"user:{username}:last_spin"
-        self.redis.set(last_spin_key, datetime.utcnow().timestamp())
-        # Set expiry to cleanup old data (2x timeout period)
-        self.redis.expire(last_spin_key, Config.SPIN_TIMEOUT_SECONDS * 2)
+        return (Config.HISTORY_RETENTION_DAYS + 1) * 86400
 
-    def add_to_history(self, username, restaurant):
+    def trim_history(self, limit=None):
         """
-        Add a spin to the history
+        Atomically evict history entries older than HISTORY_RETENTION_DAYS
+        Each run evicts at most `limit` entries, so it is safe inline on every
+        spin; a maintenance task can call it repeatedly to catch up
 
         Args:
-            username (str): Username who pressed spin
-            restaurant (dict): Restaurant that was selected
+            limit (int, optional): Maximum entries evicted (default Config.HISTORY_TRIM_BATCH_SIZE)
 
         Returns:
-            str: History entry ID (timestamp-based)
+            int: Number of entries evicted
         """
-        import json
-
-        entry_id = f"{datetime.utcnow().timestamp()}"
+        return int(self.trim_history_script(
+            keys=["history:index", "history:retention", HISTORY_VERSION_KEY],
+            args=[
+                self._history_cutoff(),
+                limit or Config.HISTORY_TRIM_BATCH_SIZE,
+                datetime.utcnow().isoformat()
+            ]
+        ))
+
+    def get_history_retention_stats(self):
+        """
+        Get history retention metrics
 
-        # Get first category from categories array (or fallback to old single category field)
-        categories = restaurant.get("categories", [])
-        if isinstance(categories, list) and categories:
-            category = categories[0]
-        else:
-            category = restaurant.get("category", "unknown")
+        Returns:
+            dict: runs, evicted_total, last_evicted, last_run_at and current entry count
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall("history:retention")
+        pipe.zcard("history:index")
+        stats, entries = pipe.execute()
 
-        history_entry = {
-            "id": entry_id,
-            "username": username,
-            "restaurant_id": restaurant.get("id"),
-            "restaurant_name": restaurant.get("name"),
-            "category": category,
-            "timestamp": datetime.utcnow().isoformat(),
-            "went": False
+        return {
+            "runs": int(stats.get('runs', 0)),
+            "evicted_total": int(stats.get('evicted_total', 0)),
+            "last_evicted": int(stats.get('last_evicted', 0)),
+            "last_run_at": stats.get('last_run_at'),
+            "entries": entries
         }
 
-        # Clean up old entries BEFORE adding new one (every 10th entry)
-        # This ensures the new entry is always present after this function returns
-        history_length = self.redis.llen("spin_history")
-        if history_length > 0 and (history_length + 1) % 10 == 0:
-            self._cleanup_old_history()
-
-        # Add to history list AFTER cleanup
-        self.redis.lpush("spin_history", json.dumps(history_entry))
+    @staticmethod
+    def _format_history_entry(data):
+        """
+        Format a history entry hash from Redis (parse "went")
 
-        return entry_id
+        Args:
+            data (dict): Raw history entry hash
 
-    def _cleanup_old_history(self):
-        """
-        Remove history entries older than HISTORY_RETENTION_DAYS
+        Returns:
+            dict: Formatted history entry or None if empty
         """
-        import json
-        from datetime import timedelta
-
-        cutoff_date = datetime.utcnow() - timedelta(days=Config.HISTORY_RETENTION_DAYS)
+        if not data:
+            return None
 
-        # Get all history entries
-        all_history = self.redis.lrange("spin_history", 0, -1)
-        valid_entries = []
+        entry = dict(data)
+        entry['went'] = entry.get('went') == '1'
+        return entry
 
-        for entry_bytes in all_history:
-            if isinstance(entry_bytes, bytes):
-                entry_bytes = entry_bytes.decode('utf-8')
+    def _load_history(self, entry_ids):
+        """
+        Load history entries with pipelined HGETALL calls
 
-            try:
-                entry = json.loads(entry_bytes)
-                entry_time = datetime.fromisoformat(entry.get('timestamp'))
+        Args:
+            entry_ids (list): History entry IDs in the desired order
 
-                # Keep if within retention period
-                if entry_time >= cutoff_date:
-                    valid_entries.append(entry_bytes)
-            except (json.JSONDecodeError, ValueError, TypeError):
-                continue
+        Returns:
+            list: Formatted history entries (missing hashes are skipped)
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for entry_id in entry_ids:
+            pipe.hgetall(f"history:entry:{entry_id}")
 
-        # Replace the list with only valid entries
-        if valid_entries:
-            self.redis.delete("spin_history")
-            for entry in reversed(valid_entries):  # Reverse to maintain order
-                self.redis.rpush("spin_history", entry)
+        history = []
+        for data in pipe.execute():
+            entry = self._format_history_entry(data)
+            if entry:
+                history.append(entry)
+        return history
 
     def get_history(self, limit=20):
         """
@@ -640,23 +1258,27 @@ class RestaurantModel:
         Returns:
             list: List of history entries (most recent first)
         """
-        import json
+        entry_ids = self.redis.zrevrange("history:index", 0, max(0, limit - 1))
+        return self._load_history(entry_ids)
 
-        # Get more than limit to filter by date, then limit the results
-        history_data = self.redis.lrange("spin_history", 0, -1)
-        history = []
+    def get_history_since(self, since, limit=None):
+        """
+        Get spin history entries recorded at or after a point in time
+        One ZREVRANGEBYSCORE on history:index (logarithmic in the history size),
+        then the matching entry hashes in one pipeline
 
-        for entry_bytes in history_data:
-            if isinstance(entry_bytes, bytes):
-                entry_bytes = entry_bytes.decode('utf-8')
-            try:
-                entry = json.loads(entry_bytes)
-                history.append(entry)
-            except json.JSONDecodeError:
-                continue
+        Args:
+            since (datetime): Earliest spin time (naive UTC, like the spin timestamps)
+            limit (int, optional): Return at most this many (the most recent)
 
-        # Return most recent entries up to limit
-        return history[:limit]
+        Returns:
+            list: List of history entries (most recent first)
+        """
+        if limit:
+            entry_ids = self.redis.zrevrangebyscore("history:index", "+inf", since.timestamp(), start=0, num=limit)
+        else:
+            entry_ids = self.redis.zrevrangebyscore("history:index", "+inf", since.timestamp())
+        return self._load_history(entry_ids)
 
     def mark_went(self, entry_id):
         """
@@ -668,31 +1290,54 @@ class RestaurantModel:
         Returns:
             bool: True if successful, False if entry not found
         """
-        import json
+        if self.redis.zscore("history:index", entry_id) is None:
+            return False
 
-        # Get all history entries
-        history_data = self.redis.lrange("spin_history", 0, -1)
-        updated = False
+        pipe = self.redis.pipeline()
+        pipe.hset(f"history:entry:{entry_id}", "went", "1")
+        pipe.incr(HISTORY_VERSION_KEY)
+        pipe.execute()
+        return True
 
-        for index, entry_bytes in enumerate(history_data):
-            if isinstance(entry_bytes, bytes):
-                entry_bytes = entry_bytes.decode('utf-8')
+    def migrate_history_list(self):
+        """
+        One-time migration of the legacy spin_history JSON list into the
+        history:index sorted set plus history:entry:{id} hashes
 
-            try:
-                entry = json.loads(entry_bytes)
+        Returns:
+            int: Number of entries migrated
+        """
+        import json
 
-                # Check if this is the entry we're looking for
-                if entry.get("id") == entry_id:
-                    entry["went"] = True
-                    # Update the entry in the list
-                    self.redis.lset("spin_history", index, json.dumps(entry))
-                    updated = True
-                    break
+        if self.redis.type("spin_history") != 'list':
+            return 0
 
-            except json.JSONDecodeError:
+        pipe = self.redis.pipeline()
+        migrated = 0
+        for raw_entry in self.redis.lrange("spin_history", 0, -1):
+            try:
+                entry = json.loads(raw_entry)
+                if entry.get('id'):
+                    score = float(entry['id'])
+                else:
+                    score = datetime.fromisoformat(entry['timestamp']).timestamp()
+                    entry['id'] = f"{score}"
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
                 continue
 
-        return updated
+            entry['went'] = "1" if entry.get('went') else "0"
+            pipe.hset(f"history:entry:{entry['id']}", mapping={
+                k: "" if v is None else str(v) for k, v in entry.items()
+            })
+            pipe.expire(f"history:entry:{entry['id']}", self._history_entry_ttl())
+            pipe.zadd("history:index", {entry['id']: score})
+            migrated += 1
+
+        # Drop the list in the same transaction so entries are never duplicated
+        pipe.delete("spin_history")
+        pipe.incr(HISTORY_VERSION_KEY)
+        pipe.execute()
+        return migrated
 
     def get_user_stats(self, username):
         """
@@ -721,8 +1366,7 @@ class RestaurantModel:
             list: List of category names
         """
         # Get custom categories from Redis
-        custom_cats = self.redis.smembers("custom_categories")
-        custom_list = [c.decode('utf-8') if isinstance(c, bytes) else c for c in custom_cats]
+        custom_list = list(self.redis.smembers("custom_categories"))
 
         # Combine with default categories
         all_categories = list(set(Config.DEFAULT_CATEGORIES + custom_list))
@@ -746,11 +1390,14 @@ class RestaurantModel:
             return False
 
         # Add to custom categories set
-        result = self.redis.sadd("custom_categories", category_name)
-        return result > 0
+        added = self.redis.sadd("custom_categories", category_name) > 0
+        if added:
+            self._record_mutation("category", name=category_name)
+        return added
 
     def update(self, restaurant_id, name=None, categories=None, distance=None, closed_days=None,
-               place_id=None, phone=None, address=None, website=None, google_distance=None, eta=None):
+               place_id=None, phone=None, address=None, website=None, google_distance=None, eta=None,
+               lat=None, lng=None, distance_auto=False):
         """
         Update restaurant details
 
@@ -766,6 +1413,10 @@ class RestaurantModel:
             website (str, optional): Website URL
             google_distance (str, optional): Distance in meters
             eta (str, optional): ETA in minutes
+            lat (float, optional): Latitude ('' together with lng clears the coordinates)
+            lng (float, optional): Longitude
+            distance_auto (bool, optional): The distance was pre-selected for the user
+                rather than picked, so it stays open to automatic reclassification
 
         Returns:
             dict: Updated restaurant data or None if not found
@@ -792,6 +1443,22 @@ class RestaurantModel:
                     raise ValueError(f"Invalid category '{cat}'")
             updates['categories'] = json.dumps(categories)
 
+        if distance is not None and distance == old_distance:
+            # Resubmitting the current level (e.g. a rename) is not a new pick
+            distance = None
+        if distance is not None:
+            updates['distance_source'] = self._distance_source(
+                distance,
+                google_distance if google_distance is not None else restaurant.get('google_distance'),
+                eta if eta is not None else restaurant.get('eta'),
+                distance_auto
+            )
+        elif (google_distance is not None or eta is not None) and restaurant.get('distance_source') != "manual":
+            distance = self._auto_distance(
+                google_distance if google_distance is not None else restaurant.get('google_distance'),
+                eta if eta is not None else restaurant.get('eta')
+            )
+
         if distance is not None:
             if distance not in Config.VALID_DISTANCES:
                 raise ValueError(f"Invalid distance '{distance}'")
@@ -824,6 +1491,17 @@ class RestaurantModel:
             updates['google_distance'] = google_distance
         if eta is not None:
             updates['eta'] = eta
+        coordinates = None
+        if lat is not None or lng is not None:
+            coordinates = self._parse_coordinates(
+                lat if lat is not None else restaurant.get('lat'),
+                lng if lng is not None else restaurant.get('lng')
+            )
+            updates['lat'] = str(coordinates[0]) if coordinates else ''
+            updates['lng'] = str(coordinates[1]) if coordinates else ''
+        if (google_distance is not None and str(google_distance) != str(restaurant.get('google_distance', ''))) or \
+                (eta is not None and str(eta) != str(restaurant.get('eta', ''))):
+            updates['enriched_at'] = datetime.utcnow().isoformat()
 
         if updates:
             self.redis.hset(f"restaurants:{restaurant_id}", mapping=updates)
@@ -844,140 +1522,581 @@ class RestaurantModel:
                 # Add to new distance index
                 self.redis.sadd(f"restaurants:by_distance:{distance}", restaurant_id)
 
+            # Update open-day indexes if closed days changed (inactive restaurants stay unindexed)
+            if closed_days is not None and restaurant.get('is_active') == '1':
+                self._index_open_days(restaurant_id, validated_days)
+
+            # Move the restaurant in the GEO set if its coordinates changed
+            if 'lat' in updates and restaurant.get('is_active') == '1':
+                self._index_geo(restaurant_id, coordinates)
+
+        restaurant = self.get(restaurant_id)
+
         # Auto-backup after update
+        self._record_mutation("restaurant", restaurant=restaurant)
+
+        return restaurant
+
+    @staticmethod
+    def _distance_source(distance, google_distance, eta, distance_auto=False):
+        """
+        Decide whether a submitted distance level was picked by hand
+        Only a level that differs from the one the driving data classifies to
+        counts as "manual"; the UI pre-selects that level, so leaving it (or a
+        pre-selection the client flags with distance_auto) stays "auto"
+
+        Args:
+            distance (str): Submitted distance level (None = not submitted)
+            google_distance (str): Driving distance in meters
+            eta (str): Driving time in minutes
+            distance_auto (bool): The client pre-selected the level for the user
+
+        Returns:
+            str: "manual" or "auto"
+        """
+        if not distance or distance_auto or distance == classify_distance(google_distance, eta):
+            return "auto"
+        return "manual"
+
+    @staticmethod
+    def _auto_distance(google_distance, eta):
+        """
+        Classify the distance level of a restaurant without a hand-picked one
+        from Google driving data (when DISTANCE_TIERS_AUTO is on)
+
+        Args:
+            google_distance (str): Driving distance in meters
+            eta (str): Driving time in minutes
+
+        Returns:
+            str: Distance level, or None if automatic tiers are off or the data is unusable
+        """
+        if not Config.DISTANCE_TIERS_AUTO:
+            return None
+        return classify_distance(google_distance, eta)
+
+    def reindex_distance_tiers(self, dry_run=False):
+        """
+        Reclassify every active restaurant's distance level from its google_distance/eta
+        and rebuild the restaurants:by_distance:{level} sets in one transaction
+        Levels picked by hand (distance_source "manual") are kept. Restaurants without
+        driving data but with coordinates are classified by their straight-line
+        distance from GOOGLE_PLACES_LOCATION (computed in one batch); the rest keep their level
+
+        Args:
+            dry_run (bool): Only count what would change
+
+        Returns:
+            dict: Restaurants indexed, changed, estimated (straight-line), manual
+                  (kept hand-picked) and unclassified, plus the count per level
+        """
+        ids = list(self.redis.smembers("restaurants:index"))
+
+        current_levels = {}
+        targets = {}
+        manual = set()
+        # Restaurants that need a straight-line estimate: (id, lat, lng)
+        to_estimate = []
+        home = self._home_coordinates()
+        chunk_size = Config.REDIS_PIPELINE_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            pipe = self.redis.pipeline(transaction=False)
+            for rid in chunk:
+                pipe.hmget(f"restaurants:{rid}", "distance", "google_distance", "eta", "lat", "lng",
+                           "distance_source")
+            for rid, (current, google_distance, eta, lat, lng, source) in zip(chunk, pipe.execute()):
+                current_levels[rid] = current
+                if source == "manual" and current in Config.VALID_DISTANCES:
+                    targets[rid] = current
+                    manual.add(rid)
+                    continue
+                targets[rid] = classify_distance(google_distance, eta)
+                coordinates = self._parse_coordinates(lat, lng, strict=False)
+                if targets[rid] is None and home and coordinates:
+                    to_estimate.append((rid, coordinates[0], coordinates[1]))
+
+        estimated = 0
+        if to_estimate:
+            distances = haversine_many(
+                home[0], home[1], [lat for _, lat, _ in to_estimate], [lng for _, _, lng in to_estimate]
+            )
+            for (rid, _, _), meters in zip(to_estimate, distances):
+                # A restaurant at the home location still counts as nearby
+                targets[rid] = classify_distance(max(meters, 1))
+                estimated += 1
+
+        levels = {}
+        changed = set()
+        unclassified = 0
+        old_levels = set()
+        for rid in ids:
+            current, level = current_levels[rid], targets[rid]
+            if level is None:
+                unclassified += 1
+                level = current if current in Config.VALID_DISTANCES else Config.DEFAULT_DISTANCE
+            if current:
+                old_levels.add(current)
+            if level != current:
+                changed.add(rid)
+            levels.setdefault(level, []).append(rid)
+
+        result = {
+            "restaurants_indexed": len(ids),
+            "changed": len(changed),
+            "estimated": estimated,
+            "manual": len(manual),
+            "unclassified": unclassified,
+            "levels": {level: len(levels.get(level, [])) for level in Config.VALID_DISTANCES}
+        }
+        if dry_run:
+            return result
+
+        # Swap the sets in one transaction so readers never see a partial index
+        pipe = self.redis.pipeline()
+        for level in old_levels | set(Config.VALID_DISTANCES):
+            pipe.delete(f"restaurants:by_distance:{level}")
+        for level, level_ids in levels.items():
+            for start in range(0, len(level_ids), chunk_size):
+                pipe.sadd(f"restaurants:by_distance:{level}", *level_ids[start:start + chunk_size])
+            for rid in level_ids:
+                if rid in changed:
+                    pipe.hset(f"restaurants:{rid}", "distance", level)
+        self._bump_catalog_version(pipe)
+        pipe.execute()
+
+        if changed:
+            for restaurant in self.get_many(changed):
+                try:
+                    self.journal.append("restaurant", restaurant=restaurant)
+                except Exception as e:
+                    print(f"Journal append failed: {e}")
+            self._schedule_backup("distance-reindex")
+
+        return result
+
+    def find_stale_driving_data(self, max_age_seconds, retry_after_seconds=0):
+        """
+        Find active restaurants with a Google place_id whose google_distance/eta
+        were fetched more than max_age_seconds ago (or never)
+        Restaurants whose last lookup failed (driving_attempted_at newer than
+        enriched_at) wait retry_after_seconds before they are tried again, and
+        sort by that attempt, so they cannot crowd out the rest of a limited run
+
+        Args:
+            max_age_seconds (int): Maximum age of the driving data
+            retry_after_seconds (int): Back-off after a failed lookup
+
+        Returns:
+            list: (restaurant_id, place_id) tuples, least recently tried first
+        """
+        from datetime import timedelta
+
+        now = datetime.utcnow()
+        cutoff = (now - timedelta(seconds=max_age_seconds)).isoformat()
+        retry_cutoff = (now - timedelta(seconds=retry_after_seconds)).isoformat()
+        ids = list(self.redis.smembers("restaurants:index"))
+
+        stale = []
+        chunk_size = Config.REDIS_PIPELINE_CHUNK_SIZE
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            pipe = self.redis.pipeline(transaction=False)
+            for rid in chunk:
+                pipe.hmget(f"restaurants:{rid}", "place_id", "enriched_at", "driving_attempted_at")
+            for rid, (place_id, enriched_at, attempted_at) in zip(chunk, pipe.execute()):
+                enriched_at, attempted_at = enriched_at or '', attempted_at or ''
+                if not place_id or enriched_at >= cutoff:
+                    continue
+                if attempted_at > enriched_at and attempted_at >= retry_cutoff:
+                    continue
+                stale.append((max(enriched_at, attempted_at), rid, place_id))
+
+        # ISO timestamps sort chronologically; never-tried ('') come first
+        stale.sort()
+        return [(rid, place_id) for _, rid, place_id in stale]
+
+    def mark_driving_attempts(self, restaurant_ids):
+        """
+        Stamp driving_attempted_at on restaurants whose driving lookup failed
+        (no route or a Google error), so the refresh backs off from them
+        Not journaled: after a restore they are simply tried once more
+
+        Args:
+            restaurant_ids (iterable): Restaurant IDs
+        """
+        attempted_at = datetime.utcnow().isoformat()
+        pipe = self.redis.pipeline(transaction=False)
+        for restaurant_id in restaurant_ids:
+            pipe.hset(f"restaurants:{restaurant_id}", "driving_attempted_at", attempted_at)
+        pipe.execute()
+
+    def apply_driving_data(self, driving_data):
+        """
+        Write refreshed driving distance/ETA back with pipelined HSETs in one
+        transaction (moving reclassified restaurants to their new distance set and
+        invalidating catalog caches) and journal the new states
+
+        Args:
+            driving_data (dict): restaurant_id -> {"distance": meters, "duration": minutes}
+
+        Returns:
+            int: Number of restaurants updated
+        """
+        if not driving_data:
+            return 0
+
+        # Current levels, so reclassified restaurants can move between distance sets
+        restaurant_ids = list(driving_data)
+        pipe = self.redis.pipeline(transaction=False)
+        for restaurant_id in restaurant_ids:
+            pipe.hmget(f"restaurants:{restaurant_id}", "distance", "is_active", "distance_source")
+        current = dict(zip(restaurant_ids, pipe.execute()))
+
+        enriched_at = datetime.utcnow().isoformat()
+        pipe = self.redis.pipeline()
+        for restaurant_id, data in driving_data.items():
+            updates = {
+                "google_distance": str(data['distance']),
+                "eta": str(data['duration']),
+                "enriched_at": enriched_at
+            }
+            old_distance, is_active, distance_source = current[restaurant_id]
+            distance = old_distance
+            if distance_source != "manual":
+                distance = self._auto_distance(data['distance'], data['duration']) or old_distance
+            if distance != old_distance:
+                updates["distance"] = distance
+                if is_active == '1':
+                    if old_distance:
+                        pipe.srem(f"restaurants:by_distance:{old_distance}", restaurant_id)
+                    pipe.sadd(f"restaurants:by_distance:{distance}", restaurant_id)
+            pipe.hset(f"restaurants:{restaurant_id}", mapping=updates)
+        self._bump_catalog_version(pipe)
+        pipe.execute()
+
+        for restaurant in self.get_many(driving_data.keys()):
+            try:
+                self.journal.append("restaurant", restaurant=restaurant)
+            except Exception as e:
+                print(f"Journal append failed: {e}")
+        self._schedule_backup("driving-refresh")
+
+        return len(driving_data)
+
+    def _record_mutation(self, op, **data):
+        """
+        Journal a mutation, then let the background writer (or, without one,
+        an immediate compaction) fold it into the next snapshot
+
+        Args:
+            op (str): Journal entry type ("restaurant", "category" or "weight")
+            **data: Entry payload (restaurant=dict with the full new state, name=str,
+                restaurant_id=str and weight=float)
+        """
+        self._bump_catalog_version()
+
+        try:
+            self.journal.append(op, **data)
+        except Exception as e:
+            print(f"Journal append failed: {e}")
+
+        self._schedule_backup(op)
+
+    def _schedule_backup(self, event):
+        """
+        Hand journaled mutations to the background writer, or compact right away without one
+
+        Args:
+            event (str): Event description passed to the writer
+        """
+        if self.backup_worker is not None:
+            self.backup_worker.notify(event)
+            return
+
         try:
             self.backup_to_file()
         except Exception as e:
             print(f"Backup failed: {e}")
 
-        return self.get(restaurant_id)
-
     def backup_to_file(self):
         """
-        Backup all restaurant data to a JSON file
-        Creates timestamped backup in backups/ directory
+        Compact the catalog into a base snapshot
+        Writes a timestamped snapshot plus restaurants_latest.json, drops the
+        journal entries the snapshot covers and prunes old snapshots beyond
+        BACKUP_RETENTION_COUNT. Safe to run from several worker processes at once
 
         Returns:
             str: Path to backup file
         """
-        import json
         import os
 
-        # Get all active and inactive restaurants
-        all_restaurants = self.get_all(active_only=False)
-
-        # Also get custom categories
-        categories = self.get_categories()
+        backup_dir = Config.BACKUP_DIR
+        journal = BackupJournal(backup_dir)
+
+        # Every worker process snapshots under the journal lock, so snapshot → replace
+        # latest → compact never interleaves with another worker's snapshot or appends
+        with journal.locked():
+            # Taken before reading Redis: journal entries up to here are in the snapshot
+            snapshot_timestamp = datetime.utcnow().isoformat()
+
+            # Get all active and soft-deleted restaurants (the journal entries of
+            # deleted ones are compacted away, so the snapshot is their only copy)
+            all_restaurants = self.get_many(self._all_restaurant_ids())
+
+            # Also get custom categories
+            categories = self.get_categories()
+
+            backup_data = {
+                "timestamp": snapshot_timestamp,
+                "restaurants": all_restaurants,
+                "custom_categories": [cat for cat in categories if cat not in Config.DEFAULT_CATEGORIES],
+                "weights": self.get_weights()
+            }
 
-        backup_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "restaurants": all_restaurants,
-            "custom_categories": [cat for cat in categories if cat not in Config.DEFAULT_CATEGORIES]
-        }
+            # Create backup filename with timestamp
+            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+            os.makedirs(backup_dir, exist_ok=True)
+            backup_file = os.path.join(backup_dir, f"restaurants_backup_{timestamp}.json")
 
-        # Create backup filename with timestamp
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        backup_dir = Config.BACKUP_DIR
-        os.makedirs(backup_dir, exist_ok=True)
-        backup_file = os.path.join(backup_dir, f"restaurants_backup_{timestamp}.json")
+            # Write backup file (per-process temporary file, replaced atomically)
+            write_json_atomic(backup_file, backup_data)
 
-        # Write backup file
-        with open(backup_file, 'w') as f:
-            json.dump(backup_data, f, indent=2)
+            # Also maintain a "latest" backup; never replace it with an older snapshot, and
+            # only compact the journal up to a snapshot that actually became the latest
+            if replace_latest_snapshot(backup_dir, backup_data):
+                journal.compact(snapshot_timestamp, lock=False)
+            else:
+                print(f"Kept the newer {LATEST_SNAPSHOT_FILENAME} (snapshot {snapshot_timestamp} is older)")
 
-        # Also maintain a "latest" backup
-        latest_file = os.path.join(backup_dir, "restaurants_latest.json")
-        with open(latest_file, 'w') as f:
-            json.dump(backup_data, f, indent=2)
+        prune_snapshots(backup_dir, Config.BACKUP_RETENTION_COUNT)
 
         return backup_file
 
-    def restore_from_file(self, backup_file):
+    def _all_restaurant_ids(self):
+        """
+        List the ID of every restaurant hash, active or soft-deleted
+        restaurants:index only holds active restaurants, so the keyspace is
+        walked with SCAN (incrementally, without blocking Redis)
+
+        Returns:
+            list: Restaurant IDs (str) in numeric order
+        """
+        ids = set()
+        for key in self.redis.scan_iter(match="restaurants:*", count=Config.REDIS_PIPELINE_CHUNK_SIZE):
+            # Skips the indexes and the restaurants:{id}:removed_* metadata keys
+            suffix = key[len("restaurants:"):]
+            if suffix.isdigit():
+                ids.add(suffix)
+        return sorted(ids, key=int)
+
+    def _restore_batch(self, batch):
+        """
+        Write a batch of backed-up restaurants to Redis under their original IDs
+        Reads the stored versions with one pipelined HMGET, then writes every hash
+        and index change in a single MULTI/EXEC, replacing the index memberships
+        of any version already stored
+
+        Args:
+            batch (list): Restaurants as stored in a snapshot or journal entries
+
+        Returns:
+            int: Number of restaurants written
+        """
+        import json
+
+        # Later states of the same restaurant win (journal replays may repeat an ID)
+        latest = {}
+        for restaurant_data in batch:
+            if restaurant_data.get('id') not in (None, ''):
+                latest[str(restaurant_data['id'])] = restaurant_data
+        records = list(latest.values())
+        if not records:
+            return 0
+
+        # Categories or distance may differ from the stored versions
+        read_pipe = self.redis.pipeline(transaction=False)
+        for restaurant_data in records:
+            read_pipe.hmget(f"restaurants:{restaurant_data['id']}", "categories", "distance")
+        current_versions = read_pipe.execute()
+
+        pipe = self.redis.pipeline()
+        for restaurant_data, (old_categories, old_distance) in zip(records, current_versions):
+            restaurant_id = str(restaurant_data['id'])
+            try:
+                old_categories = json.loads(old_categories) if old_categories else []
+            except (json.JSONDecodeError, TypeError):
+                old_categories = []
+            for category in old_categories:
+                pipe.srem(f"restaurants:by_category:{category}", restaurant_id)
+            if old_distance:
+                pipe.srem(f"restaurants:by_distance:{old_distance}", restaurant_id)
+
+            categories = restaurant_data.get('categories') or ['takeout']
+            if not isinstance(categories, list):
+                categories = [categories]
+            distance = restaurant_data.get('distance') or Config.DEFAULT_DISTANCE
+            is_active = str(restaurant_data.get('is_active', '1'))
+            closed_days = restaurant_data.get('closed_days') or []
+
+            # Keep every stored field (Google Places data, closed days, ...) under the original ID
+            restaurant_hash = {
+                key: json.dumps(value) if isinstance(value, (list, dict)) else str(value)
+                for key, value in restaurant_data.items() if value is not None
+            }
+            restaurant_hash.update({
+                "id": restaurant_id,
+                "categories": json.dumps(categories),
+                "distance": distance,
+                "closed_days": json.dumps(closed_days),
+                "added_by": restaurant_data.get('added_by') or 'restored',
+                "added_at": restaurant_data.get('added_at') or datetime.utcnow().isoformat(),
+                "is_active": is_active
+            })
+            pipe.hset(f"restaurants:{restaurant_id}", mapping=restaurant_hash)
+
+            # Update indexes if active
+            if is_active == '1':
+                pipe.sadd("restaurants:index", restaurant_id)
+                for category in categories:
+                    pipe.sadd(f"restaurants:by_category:{category}", restaurant_id)
+                pipe.sadd(f"restaurants:by_distance:{distance}", restaurant_id)
+                self._index_open_days(restaurant_id, closed_days, pipe=pipe)
+                self._index_geo(
+                    restaurant_id,
+                    self._parse_coordinates(restaurant_data.get('lat'), restaurant_data.get('lng'), strict=False),
+                    pipe=pipe
+                )
+            else:
+                pipe.srem("restaurants:index", restaurant_id)
+                self._unindex_open_days(restaurant_id, pipe=pipe)
+                pipe.zrem(self.GEO_INDEX_KEY, restaurant_id)
+        self._bump_catalog_version(pipe)
+        pipe.execute()
+
+        return len(records)
+
+    def _restore_weights(self, weights):
+        """
+        Write backed-up spin weights (weight 1 clears a stored weight)
+
+        Args:
+            weights (dict): restaurant_id -> weight
+        """
+        if not weights:
+            return
+        pipe = self.redis.pipeline()
+        for restaurant_id, weight in weights.items():
+            if float(weight) == 1:
+                pipe.hdel(self.WEIGHTS_KEY, str(restaurant_id))
+            else:
+                pipe.hset(self.WEIGHTS_KEY, str(restaurant_id), repr(float(weight)))
+        pipe.execute()
+
+    def restore_from_file(self, backup_file, progress=None, batch_size=None):
         """
         Restore restaurant data from a backup file
+        The snapshot is parsed incrementally and written in pipelined MULTI/EXEC
+        batches. When restoring the latest snapshot, journal entries written after
+        it are replayed on top so no mutation since the last compaction is lost
 
         Args:
             backup_file (str): Path to backup JSON file
+            progress (callable, optional): Called as progress(restaurants_written)
+                after every batch (snapshot and journal replay)
+            batch_size (int, optional): Restaurants per MULTI/EXEC batch
+                (default Config.REDIS_PIPELINE_CHUNK_SIZE)
 
         Returns:
-            dict: Restore statistics (restaurants_restored, categories_restored)
+            dict: Restore statistics (restaurants_restored, categories_restored, journal_entries_replayed)
         """
-        import json
         import os
 
         if not os.path.exists(backup_file):
             raise FileNotFoundError(f"Backup file not found: {backup_file}")
 
-        with open(backup_file, 'r') as f:
-            backup_data = json.load(f)
-
+        batch_size = max(1, batch_size or Config.REDIS_PIPELINE_CHUNK_SIZE)
+        fields = {}
         restaurants_restored = 0
         categories_restored = 0
+        journal_entries_replayed = 0
+        max_id = 0
 
-        # Restore custom categories first
-        if 'custom_categories' in backup_data:
-            for category in backup_data['custom_categories']:
-                if self.add_category(category):
-                    categories_restored += 1
+        written = 0
 
-        # Restore restaurants
-        if 'restaurants' in backup_data:
-            for restaurant_data in backup_data['restaurants']:
-                try:
-                    # Create restaurant with original ID
-                    restaurant_id = restaurant_data.get('id')
-                    name = restaurant_data.get('name')
-                    categories = restaurant_data.get('categories', ['takeout'])
-                    distance = restaurant_data.get('distance', Config.DEFAULT_DISTANCE)
-                    added_by = restaurant_data.get('added_by', 'restored')
-                    is_active = restaurant_data.get('is_active', '1')
-
-                    # Manually create to preserve ID
-                    restaurant_hash = {
-                        "id": restaurant_id,
-                        "name": name,
-                        "categories": json.dumps(categories) if isinstance(categories, list) else categories,
-                        "distance": distance,
-                        "added_by": added_by,
-                        "added_at": restaurant_data.get('added_at', datetime.utcnow().isoformat()),
-                        "is_active": is_active
-                    }
-
-                    # Store in Redis
-                    self.redis.hset(f"restaurants:{restaurant_id}", mapping=restaurant_hash)
-
-                    # Update indexes if active
-                    if is_active == '1':
-                        self.redis.sadd("restaurants:index", restaurant_id)
-                        for category in (categories if isinstance(categories, list) else [categories]):
-                            self.redis.sadd(f"restaurants:by_category:{category}", restaurant_id)
-                        if distance:
-                            self.redis.sadd(f"restaurants:by_distance:{distance}", restaurant_id)
-
-                    restaurants_restored += 1
+        def flush(batch):
+            nonlocal written, max_id
+            try:
+                count = self._restore_batch(batch)
+            except Exception as e:
+                print(f"Error restoring restaurants {batch[0].get('id')}..{batch[-1].get('id')}: {e}")
+                return 0
+            written += count
+            max_id = max([max_id] + [int(r['id']) for r in batch if str(r.get('id', '')).isdigit()])
+            if progress:
+                progress(written)
+            return count
 
-                except Exception as e:
-                    print(f"Error restoring restaurant {restaurant_data.get('id')}: {e}")
-                    continue
+        # Restore restaurants
+        batch = []
+        for kind, value in iter_snapshot(backup_file):
+            if kind == "restaurant":
+                batch.append(value)
+                if len(batch) >= batch_size:
+                    restaurants_restored += flush(batch)
+                    batch = []
+            else:
+                key, field_value = value
+                fields[key] = field_value
+        if batch:
+            restaurants_restored += flush(batch)
+
+        # Restore custom categories
+        for category in fields.get('custom_categories') or []:
+            if self.redis.sadd("custom_categories", category):
+                categories_restored += 1
+        if categories_restored:
+            self._bump_catalog_version()
+
+        # Restore spin weights (snapshots older than weights have none)
+        self._restore_weights(fields.get('weights') or {})
+
+        # Replay the journal (it only continues the latest snapshot)
+        if os.path.basename(backup_file) == LATEST_SNAPSHOT_FILENAME:
+            journal = BackupJournal(os.path.dirname(backup_file))
+            batch = []
+            for entry in journal.entries(since=fields.get('timestamp')):
+                if entry.get('op') == 'restaurant' and entry.get('restaurant'):
+                    batch.append(entry['restaurant'])
+                elif entry.get('op') == 'category' and entry.get('name'):
+                    if self.redis.sadd("custom_categories", entry['name']):
+                        self._bump_catalog_version()
+                elif entry.get('op') == 'weight' and entry.get('restaurant_id'):
+                    self._restore_weights({entry['restaurant_id']: entry.get('weight', 1)})
+                journal_entries_replayed += 1
+            # Entries are full states: applying them in order, last one wins
+            for start in range(0, len(batch), batch_size):
+                flush(batch[start:start + batch_size])
+
+        # Keep newly created IDs clear of restored ones
+        counter = self.redis.get("restaurants:counter")
+        if max_id > int(counter or 0):
+            self.redis.set("restaurants:counter", max_id)
 
         return {
             "restaurants_restored": restaurants_restored,
             "categories_restored": categories_restored,
-            "timestamp": backup_data.get('timestamp')
+            "journal_entries_replayed": journal_entries_replayed,
+            "timestamp": fields.get('timestamp')
         }
 
 
 def get_redis_client():
     """
     Create and return a Redis client instance
+    Connections come from a bounded, health-checked pool configured by the REDIS_* settings
 
     Returns:
         redis.Redis: Redis client
     """
-    return redis.Redis(
-        host=Config.REDIS_HOST,
-        port=Config.REDIS_PORT,
-        db=Config.REDIS_DB,
-        password=Config.REDIS_PASSWORD,
-        decode_responses=False  # We'll handle decoding manually for consistency
-    )
+    return redis.Redis(connection_pool=create_connection_pool(Config))
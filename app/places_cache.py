@@ -0,0 +1,258 @@
+"""Redis-backed cache (with an in-process LRU in front) for Google Places responses"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+
+class PlacesCache:
+    """
+    Two-level cache for Places search results and place details. Lookups try a
+    small per-process LRU first, then Redis (shared by every worker, entries
+    expire with a TTL). Empty results are cached too, with a shorter TTL, so
+    repeated searches that match nothing do not reach the API either. Redis
+    errors are counted and treated as misses so the cache never breaks a lookup.
+    """
+
+    def __init__(self, redis_client, ttl_seconds, negative_ttl_seconds, local_size, local_ttl_seconds):
+        """
+        Initialize the cache
+
+        Args:
+            redis_client (redis.Redis): Redis client
+            ttl_seconds (int): Redis TTL of non-empty results
+            negative_ttl_seconds (int): Redis TTL of empty results
+            local_size (int): Maximum entries in the in-process LRU (0 = no LRU)
+            local_ttl_seconds (int): Lifetime of in-process LRU entries
+        """
+        self.redis = redis_client
+        self.ttl = max(1, ttl_seconds)
+        self.negative_ttl = max(1, negative_ttl_seconds)
+        self.local_size = max(0, local_size)
+        self.local_ttl = max(1, local_ttl_seconds)
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def search_key(query, location, radius, max_results):
+        """
+        Build the cache key of a text search
+
+        Args:
+            query (str): Search query (normalized: case and whitespace ignored)
+            location (str): Search center as "lat,lng"
+            radius (int): Search radius in meters
+            max_results (int): Number of results returned
+
+        Returns:
+            str: Redis key
+        """
+        normalized = " ".join(query.lower().split())
+        digest = hashlib.sha1(f"{normalized}|{location}|{radius}|{max_results}".encode('utf-8')).hexdigest()
+        return f"places:search:{digest}"
+
+    @staticmethod
+    def details_key(place_id, location):
+        """
+        Build the cache key of a place's details (distance/ETA depend on the origin)
+
+        Args:
+            place_id (str): Google Place ID
+            location (str): Origin as "lat,lng"
+
+        Returns:
+            str: Redis key
+        """
+        return f"places:details:{location}:{place_id}"
+
+    @staticmethod
+    def distance_key(place_id, location):
+        """
+        Build the cache key of the driving distance/ETA from an origin to a place
+
+        Args:
+            place_id (str): Google Place ID
+            location (str): Origin as "lat,lng"
+
+        Returns:
+            str: Redis key
+        """
+        return f"places:distance:{location}:{place_id}"
+
+    def get(self, key):
+        """
+        Look up a cached response
+
+        Args:
+            key (str): Key from search_key() or details_key()
+
+        Returns:
+            tuple: (hit, value); value may be empty ([] or None) for a negative hit
+        """
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    if not value:
+                        self.negative_hits += 1
+                    return True, value
+                del self._local[key]
+
+        try:
+            raw = self.redis.get(key)
+        except redis.RedisError as e:
+            print(f"Places cache read failed: {e}")
+            with self._lock:
+                self.errors += 1
+                self.misses += 1
+            return False, None
+
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        value = json.loads(raw)
+        with self._lock:
+            self.redis_hits += 1
+            if not value:
+                self.negative_hits += 1
+        self._remember(key, value)
+        return True, value
+
+    def get_many(self, keys):
+        """
+        Look up several cached responses (LRU first, the rest with one MGET)
+
+        Args:
+            keys (list): Cache keys
+
+        Returns:
+            list: One (hit, value) tuple per key
+        """
+        results = [None] * len(keys)
+        remote = []
+        with self._lock:
+            now = time.monotonic()
+            for index, key in enumerate(keys):
+                entry = self._local.get(key)
+                if entry is not None and entry[0] > now:
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    if not entry[1]:
+                        self.negative_hits += 1
+                    results[index] = (True, entry[1])
+                else:
+                    remote.append(index)
+
+        if remote:
+            try:
+                raw_values = self.redis.mget([keys[index] for index in remote])
+            except redis.RedisError as e:
+                print(f"Places cache read failed: {e}")
+                raw_values = [None] * len(remote)
+                with self._lock:
+                    self.errors += 1
+
+            for index, raw in zip(remote, raw_values):
+                if raw is None:
+                    results[index] = (False, None)
+                    continue
+                value = json.loads(raw)
+                results[index] = (True, value)
+                self._remember(keys[index], value)
+
+            with self._lock:
+                for index in remote:
+                    hit, value = results[index]
+                    if not hit:
+                        self.misses += 1
+                        continue
+                    self.redis_hits += 1
+                    if not value:
+                        self.negative_hits += 1
+
+        return results
+
+    def set_many(self, values, ttl=None):
+        """
+        Cache several responses in one pipelined round trip
+
+        Args:
+            values (dict): Cache key -> JSON-serializable response
+            ttl (int, optional): Redis TTL overriding the default for these values
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, json.dumps(value), ex=ttl or (self.ttl if value else self.negative_ttl))
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Places cache write failed: {e}")
+            with self._lock:
+                self.errors += 1
+        for key, value in values.items():
+            self._remember(key, value)
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache a response (empty values get the negative TTL)
+
+        Args:
+            key (str): Key from search_key() or details_key()
+            value: JSON-serializable response ([] or None for "nothing found")
+            ttl (int, optional): Redis TTL overriding the default for this value
+        """
+        if ttl is None:
+            ttl = self.ttl if value else self.negative_ttl
+        try:
+            self.redis.set(key, json.dumps(value), ex=ttl)
+        except redis.RedisError as e:
+            print(f"Places cache write failed: {e}")
+            with self._lock:
+                self.errors += 1
+        self._remember(key, value)
+
+    def _remember(self, key, value):
+        """Store a value in the in-process LRU, evicting the least recently used entries"""
+        if not self.local_size:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def stats(self):
+        """
+        Get cache counters for the health endpoint
+
+        Returns:
+            dict: Hits per level, negative hits, misses, errors, hit_rate and LRU size
+        """
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "local_entries": len(self._local),
+                "local_size": self.local_size
+            }
@@ -0,0 +1,219 @@
+"""Redis-native rate limiting: cooldowns and per-endpoint request budgets"""
+import math
+from datetime import datetime
+from functools import wraps
+
+from app.redis_scripts import RATE_LIMIT_SCRIPT
+
+
+def parse_budget(budget):
+    """
+    Parse a "<requests>/<seconds>" budget string
+
+    Args:
+        budget (str): Budget such as "10/3600" (empty or "0" = unlimited)
+
+    Returns:
+        tuple: (requests, seconds) or None if unlimited
+
+    Raises:
+        ValueError: If the budget is malformed
+    """
+    budget = (budget or '').strip()
+    if not budget or budget == '0':
+        return None
+    try:
+        requests_allowed, seconds = budget.split('/')
+        requests_allowed, seconds = int(requests_allowed), float(seconds)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit budget '{budget}' (expected <requests>/<seconds>)")
+    if requests_allowed <= 0 or seconds <= 0:
+        return None
+    return requests_allowed, seconds
+
+
+def parse_rate_limits(config):
+    """
+    Parse every RATE_LIMIT_<ACTION> budget once, so a malformed value stops the
+    app at startup instead of failing each request it applies to
+
+    Args:
+        config (Config): Application configuration
+
+    Returns:
+        dict: action name (e.g. "add_restaurant") -> (requests, seconds) or None if unlimited
+
+    Raises:
+        ValueError: If a budget is malformed
+    """
+    prefix = "RATE_LIMIT_"
+    return {
+        name[len(prefix):].lower(): parse_budget(getattr(config, name))
+        for name in dir(config) if name.startswith(prefix)
+    }
+
+
+class RateLimiter:
+    """
+    Limits how often an identity (usually a username) may perform an action
+    The budget key expires when the window ends, so there is nothing to compare
+    in Python and nothing to clean up: a limit of one request per window is a
+    single SET NX PX (the key is the cooldown), larger budgets are an
+    INCR/PEXPIRE Lua script, and the time left always comes from PTTL.
+    """
+
+    def __init__(self, redis_client, name, limit, window_seconds, key_format="ratelimit:{name}:{identity}"):
+        """
+        Initialize the limiter
+
+        Args:
+            redis_client (redis.Redis): Redis client
+            name (str): Action name (part of the key)
+            limit (int): Requests allowed per window
+            window_seconds (float): Window (cooldown) length in seconds
+            key_format (str): Key template with {name} and {identity} placeholders
+        """
+        self.redis = redis_client
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.window_ms = max(1, int(window_seconds * 1000))
+        self.key_format = key_format
+        self._script = redis_client.register_script(RATE_LIMIT_SCRIPT) if self.limit > 1 else None
+
+    def key(self, identity):
+        """
+        Get the budget key of an identity
+
+        Args:
+            identity (str): Username or client address
+
+        Returns:
+            str: Redis key
+        """
+        return self.key_format.format(name=self.name, identity=identity)
+
+    def acquire(self, identity):
+        """
+        Take one request from the identity's budget, atomically (no check-then-act race)
+
+        Args:
+            identity (str): Username or client address
+
+        Returns:
+            tuple: (allowed: bool, seconds_remaining: int until the budget refills when refused)
+        """
+        key = self.key(identity)
+        if self._script is None:
+            # The value records when the cooldown started (informational)
+            if self.redis.set(key, datetime.utcnow().timestamp(), nx=True, px=self.window_ms):
+                return True, 0
+            return False, self._seconds(self.redis.pttl(key))
+
+        allowed, remaining_ms = self._script(keys=[key], args=[self.limit, self.window_ms])
+        if allowed:
+            return True, 0
+        return False, self._seconds(remaining_ms)
+
+    def retry_after(self, identity):
+        """
+        Check the identity's budget without taking from it
+
+        Args:
+            identity (str): Username or client address
+
+        Returns:
+            int: Seconds until the next request is allowed (0 = allowed now)
+        """
+        key = self.key(identity)
+        if self._script is None:
+            return self._seconds(self.redis.pttl(key))
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        used, remaining_ms = pipe.execute()
+        if used is None or int(used) < self.limit:
+            return 0
+        return self._seconds(remaining_ms)
+
+    def release(self, identity):
+        """
+        Give back one request (e.g. when the request it was taken for failed)
+
+        Args:
+            identity (str): Username or client address
+        """
+        key = self.key(identity)
+        if self._script is None:
+            self.redis.delete(key)
+            return
+
+        # Only decrement a live window; never leave a counter without a TTL
+        pipe = self.redis.pipeline()
+        pipe.decr(key)
+        pipe.pttl(key)
+        used, remaining_ms = pipe.execute()
+        if used <= 0 or remaining_ms < 0:
+            self.redis.delete(key)
+
+    def _seconds(self, remaining_ms):
+        """
+        Convert a PTTL reply to whole seconds, rounded up
+
+        Args:
+            remaining_ms (int): PTTL reply (-2 = no key, -1 = no expiry)
+
+        Returns:
+            int: Seconds remaining (0 when the key is gone)
+        """
+        if remaining_ms <= 0:
+            return 0
+        # Keys written by older versions may outlive the window; never report more than one window
+        return math.ceil(min(remaining_ms, self.window_ms) / 1000)
+
+
+def rate_limited(action):
+    """
+    Decorate a Flask view with the per-user budget RATE_LIMIT_<ACTION>, as parsed
+    into app.rate_limits by create_app (actions without a budget are unlimited)
+    Refused requests get a 429 with seconds_remaining and Retry-After; responses
+    with an error status give their request back, so only successful calls count
+
+    Args:
+        action (str): Action name, e.g. "add_restaurant" (Config.RATE_LIMIT_ADD_RESTAURANT)
+
+    Returns:
+        callable: View decorator
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import current_app, jsonify, make_response, request
+            from app.utils import get_user_from_cookie
+
+            budget = current_app.rate_limits.get(action)
+            if budget is None:
+                return view(*args, **kwargs)
+
+            identity = get_user_from_cookie() or f"ip:{request.remote_addr}"
+            limiter = RateLimiter(current_app.redis, action, *budget)
+            allowed, seconds_remaining = limiter.acquire(identity)
+            if not allowed:
+                response = make_response(jsonify({
+                    "success": False,
+                    "error": f"Too many requests. Please wait {seconds_remaining}s and try again",
+                    "seconds_remaining": seconds_remaining
+                }), 429)
+                response.headers['Retry-After'] = str(seconds_remaining)
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                limiter.release(identity)
+                raise
+            if response.status_code >= 400:
+                limiter.release(identity)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,122 @@
+"""Bounded, health-checked Redis connection pool with utilisation counters"""
+import threading
+import time
+from queue import Empty
+
+from redis import BlockingConnectionPool, UnixDomainSocketConnection
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    BlockingConnectionPool that counts how often callers had to wait for a connection
+    When every connection is checked out, callers block for up to `timeout`
+    seconds instead of opening more sockets; the counters show how often that
+    happens, so max_connections can be sized from /health. Failures to connect
+    (refused, auth, socket timeouts) are counted apart from wait timeouts
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.wait_timeouts = 0
+        self.connect_errors = 0
+        super().__init__(*args, **kwargs)
+
+    def get_connection(self, command_name, *keys, **options):
+        """
+        Check out a connection, recording the wait when none is idle
+
+        Args:
+            command_name (str): Command the connection is used for
+
+        Returns:
+            redis.connection.Connection: Connected connection
+        """
+        # Placeholders (None) mean a new connection can still be opened; an empty queue means waiting
+        waiting = self.pool.empty()
+        started = time.monotonic()
+        try:
+            return super().get_connection(command_name, *keys, **options)
+        except (ConnectionError, TimeoutError) as e:
+            with self._stats_lock:
+                # "No connection available" is raised from the queue's Empty; anything
+                # else failed while connecting or checking the connection
+                if isinstance(e.__context__, Empty):
+                    self.wait_timeouts += 1
+                else:
+                    self.connect_errors += 1
+            raise
+        finally:
+            if waiting:
+                with self._stats_lock:
+                    self.waits += 1
+                    self.wait_seconds += time.monotonic() - started
+
+    def stats(self):
+        """
+        Get pool utilisation for the health endpoint
+
+        Returns:
+            dict: max_connections, open, in_use, idle, waits, wait_seconds, wait_timeouts
+                  and connect_errors
+        """
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        opened = len(self._connections)
+        with self._stats_lock:
+            return {
+                "max_connections": self.max_connections,
+                "open": opened,
+                "in_use": opened - idle,
+                "idle": idle,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "wait_timeouts": self.wait_timeouts,
+                "connect_errors": self.connect_errors
+            }
+
+
+def create_connection_pool(config):
+    """
+    Build the Redis connection pool from the REDIS_* settings
+    Uses a unix socket when REDIS_SOCKET_PATH is set, TCP otherwise. Commands
+    failing on a timeout or dropped connection are retried with exponential backoff,
+    and connections idle longer than the health-check interval are PINGed before reuse
+
+    Args:
+        config (Config): Application configuration
+
+    Returns:
+        InstrumentedConnectionPool: Connection pool
+    """
+    retry = Retry(
+        ExponentialBackoff(cap=config.REDIS_RETRY_BACKOFF_CAP_SECONDS, base=config.REDIS_RETRY_BACKOFF_SECONDS),
+        config.REDIS_RETRY_ATTEMPTS,
+        supported_errors=(ConnectionError, TimeoutError)
+    )
+    connection_kwargs = {
+        "db": config.REDIS_DB,
+        "password": config.REDIS_PASSWORD or None,
+        "socket_timeout": config.REDIS_SOCKET_TIMEOUT_SECONDS or None,
+        "socket_connect_timeout": config.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS or None,
+        "health_check_interval": config.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        "retry_on_timeout": config.REDIS_RETRY_ATTEMPTS > 0,
+        "retry": retry,
+        # Replies arrive as str, so the model layer never handles bytes
+        "decode_responses": True
+    }
+    if config.REDIS_SOCKET_PATH:
+        connection_kwargs["connection_class"] = UnixDomainSocketConnection
+        connection_kwargs["path"] = config.REDIS_SOCKET_PATH
+    else:
+        connection_kwargs["host"] = config.REDIS_HOST
+        connection_kwargs["port"] = config.REDIS_PORT
+
+    return InstrumentedConnectionPool(
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT_SECONDS,
+        **connection_kwargs
+    )
@@ -0,0 +1,361 @@
+"""Lua scripts executed inside Redis (registered once, called with EVALSHA)"""
+
+
+# Evict at most `limit` history entries older than `cutoff` (entry IDs are their
+# timestamps) and record per-run metrics, so retention stays bounded and atomic.
+# The history version is bumped when anything was evicted (ETag invalidation)
+_TRIM_HISTORY_FUNCTION = """
+local function trim_history(history_key, stats_key, version_key, cutoff, limit, run_at)
+    local expired = redis.call('ZRANGEBYSCORE', history_key, '-inf', '(' .. cutoff, 'LIMIT', 0, limit)
+    for _, entry_id in ipairs(expired) do
+        -- Entry hash keys are derived from the index (single-instance Redis)
+        redis.call('DEL', 'history:entry:' .. entry_id)
+    end
+    if #expired > 0 then
+        redis.call('ZREM', history_key, unpack(expired))
+        redis.call('INCR', version_key)
+    end
+    redis.call('HINCRBY', stats_key, 'runs', 1)
+    redis.call('HINCRBY', stats_key, 'evicted_total', #expired)
+    redis.call('HSET', stats_key, 'last_evicted', #expired, 'last_run_at', run_at)
+    return #expired
+end
+"""
+
+
+# The spin pool and its weights, shared by the spin and the pool statistics so
+# both always agree: the filter sets are resolved (distance union intersected with
+# the other sets), the last spin is excluded when it is within the exclusion
+# window, each remaining restaurant weighs what the weights hash says (1 when it is
+# not listed) and "Eat at Home" weighs home_weight (0 when it was the excluded
+# spin, unless it ignores the exclusion). Only the listed restaurants are visited,
+# so the cost grows with the weights hash, not with the pool.
+# Returns pool key, restaurant count, excluded ID (nil if none), "Eat at Home" weight,
+# the listed pool members as {id, weight} pairs and the total restaurant weight
+_SPIN_POOL_FUNCTION = """
+local function spin_pool(history_key, union_key, filter_key, weights_key, source_keys, distance_count,
+                         temp_ttl, now, recent_window, home_weight, home_ignores_recent)
+    -- Resolve filters: union allowed distances, intersect with the remaining sets
+    local sources = {}
+    if distance_count == 1 then
+        table.insert(sources, source_keys[1])
+    elseif distance_count > 1 then
+        redis.call('SUNIONSTORE', union_key, unpack(source_keys, 1, distance_count))
+        redis.call('EXPIRE', union_key, temp_ttl)
+        table.insert(sources, union_key)
+    end
+    for i = distance_count + 1, #source_keys do
+        table.insert(sources, source_keys[i])
+    end
+
+    local pool_key = sources[1] or 'restaurants:index'
+    if #sources > 1 then
+        redis.call('SINTERSTORE', filter_key, unpack(sources))
+        redis.call('EXPIRE', filter_key, temp_ttl)
+        pool_key = filter_key
+    end
+
+    -- Exclude the last spin if it happened within the exclusion window
+    local excluded = nil
+    local last_entry = redis.call('ZREVRANGE', history_key, 0, 0, 'WITHSCORES')
+    if #last_entry == 2 and now - tonumber(last_entry[2]) < recent_window then
+        -- Entry hash key is derived from the index (single-instance Redis)
+        local restaurant_id = redis.call('HGET', 'history:entry:' .. last_entry[1], 'restaurant_id')
+        if restaurant_id and restaurant_id ~= '' then
+            excluded = restaurant_id
+        end
+    end
+
+    local count = redis.call('SCARD', pool_key)
+    if excluded and redis.call('SISMEMBER', pool_key, excluded) == 1 then
+        count = count - 1
+    end
+    if excluded == 'eat-at-home' and not home_ignores_recent then
+        home_weight = 0
+    end
+
+    -- Restaurants with their own weight replace their default weight of 1
+    local weighted = {}
+    local restaurant_weight = count
+    local weights = redis.call('HGETALL', weights_key)
+    for i = 1, #weights, 2 do
+        local restaurant_id, weight = weights[i], tonumber(weights[i + 1])
+        if weight and weight >= 0 and restaurant_id ~= excluded
+                and redis.call('SISMEMBER', pool_key, restaurant_id) == 1 then
+            table.insert(weighted, {restaurant_id, weight})
+            restaurant_weight = restaurant_weight - 1 + weight
+        end
+    end
+    return pool_key, count, excluded, home_weight, weighted, restaurant_weight
+end
+"""
+
+
+# Standalone retention run
+#
+# KEYS[1]  history sorted set (history:index)
+# KEYS[2]  retention metrics hash (history:retention)
+# KEYS[3]  history version counter (history:version)
+# ARGV[1]  cutoff timestamp (entries strictly older are evicted)
+# ARGV[2]  maximum entries evicted by this run
+# ARGV[3]  ISO timestamp of the run
+#
+# Returns the number of entries evicted
+TRIM_HISTORY_SCRIPT = _TRIM_HISTORY_FUNCTION + """
+return trim_history(KEYS[1], KEYS[2], KEYS[3], ARGV[1], tonumber(ARGV[2]), ARGV[3])
+"""
+
+
+# Complete spin in one atomic round trip: cooldown check, filter set algebra,
+# recent-spin exclusion, weighted pick, cooldown record, history append and a
+# bounded history retention trim.
+#
+# KEYS[1]   user cooldown key (user:{username}:last_spin, expires when the cooldown ends)
+# KEYS[2]   history sorted set (history:index)
+# KEYS[3]   hash for the new history entry (history:entry:{ARGV[1]})
+# KEYS[4]   retention metrics hash (history:retention)
+# KEYS[5]   history version counter (history:version)
+# KEYS[6]   temporary distance-union key
+# KEYS[7]   temporary filter-result key
+# KEYS[8]   per-restaurant weights hash (restaurants:weights; unlisted restaurants weigh 1)
+# KEYS[9..] ARGV[3] distance index sets to union, then the sets to intersect with them
+#
+# ARGV[1]  current timestamp (seconds, float), also the history entry ID and score
+# ARGV[2]  cooldown in seconds
+# ARGV[3]  number of distance keys
+# ARGV[4]  temporary key TTL in seconds
+# ARGV[5]  recent-spin exclusion window in seconds
+# ARGV[6]  "Eat at Home" weight (0 when unavailable today)
+# ARGV[7]  "1" if "Eat at Home" ignores the recent-spin exclusion
+# ARGV[8]  random draw in [0, 1)
+# ARGV[9]  username
+# ARGV[10] ISO timestamp for the history entry
+# ARGV[11] "Eat at Home" display name
+# ARGV[12] history retention cutoff timestamp
+# ARGV[13] maximum history entries evicted per spin
+# ARGV[14] history entry hash TTL in seconds (safety net behind the trim)
+#
+# Returns {"cooldown", seconds_remaining}, {"empty"} or
+# {"ok", entry_id, history_entries_evicted, winner_id, field1, value1, ...}
+SPIN_SCRIPT = _TRIM_HISTORY_FUNCTION + _SPIN_POOL_FUNCTION + """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local cooldown_key, history_key, entry_key, retention_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local version_key, union_key, filter_key, weights_key = KEYS[5], KEYS[6], KEYS[7], KEYS[8]
+local now = tonumber(ARGV[1])
+local timeout = tonumber(ARGV[2])
+local distance_count = tonumber(ARGV[3])
+local temp_ttl = tonumber(ARGV[4])
+local recent_window = tonumber(ARGV[5])
+local home_weight = tonumber(ARGV[6])
+local home_ignores_recent = ARGV[7] == '1'
+local draw = tonumber(ARGV[8])
+
+-- Rate limiting: the cooldown key only exists while the cooldown is active
+-- (keys written before it carried a 2x TTL, hence the clamp)
+local remaining_ms = redis.call('PTTL', cooldown_key)
+if remaining_ms > 0 then
+    return {'cooldown', tostring(math.ceil(math.min(remaining_ms, timeout * 1000) / 1000))}
+end
+
+local pool_key, count, excluded, home_weight, weighted, restaurant_weight = spin_pool(
+    history_key, union_key, filter_key, weights_key, {unpack(KEYS, 9)}, distance_count, temp_ttl,
+    now, recent_window, home_weight, home_ignores_recent)
+
+-- Weighted draw over the restaurants' weights, then "Eat at Home" (home_weight)
+local total = restaurant_weight + home_weight
+if total <= 0 then
+    return {'empty'}
+end
+
+local winner = nil
+local fields = {}
+local target = draw * total
+if target < restaurant_weight then
+    -- Restaurants with their own weight take the start of the range
+    local skip = {}
+    if excluded then
+        skip[excluded] = true
+    end
+    for _, entry in ipairs(weighted) do
+        skip[entry[1]] = true
+        if not winner then
+            if target < entry[2] then
+                winner = entry[1]
+            else
+                target = target - entry[2]
+            end
+        end
+    end
+
+    -- The rest weigh 1 each: any other member, uniformly
+    if not winner and count > #weighted then
+        for _ = 1, 5 do
+            local member = redis.call('SRANDMEMBER', pool_key)
+            if not skip[member] then
+                winner = member
+                break
+            end
+        end
+        if not winner then
+            -- At most #weighted + 1 members are skipped, so #weighted + 2 distinct members hold one
+            for _, member in ipairs(redis.call('SRANDMEMBER', pool_key, #weighted + 2)) do
+                if not skip[member] then
+                    winner = member
+                    break
+                end
+            end
+        end
+    end
+
+    -- Rounding can leave the draw just past the last weight
+    if not winner then
+        for _, entry in ipairs(weighted) do
+            if entry[2] > 0 then
+                winner = entry[1]
+            end
+        end
+    end
+    -- Winner hash key is only known after the draw (single-instance Redis)
+    fields = redis.call('HGETALL', 'restaurants:' .. winner)
+    if #fields == 0 then
+        return {'empty'}
+    end
+else
+    winner = 'eat-at-home'
+end
+
+-- Record the spin for rate limiting (the key expires exactly when the cooldown ends)
+if timeout > 0 then
+    redis.call('SET', cooldown_key, ARGV[1], 'PX', math.floor(timeout * 1000))
+end
+
+-- Append to history
+local name, category = ARGV[11], 'home'
+if #fields > 0 then
+    local restaurant = {}
+    for i = 1, #fields, 2 do
+        restaurant[fields[i]] = fields[i + 1]
+    end
+    name = restaurant['name']
+    local ok, categories = pcall(cjson.decode, restaurant['categories'] or '')
+    if ok and type(categories) == 'table' and categories[1] then
+        category = categories[1]
+    else
+        category = restaurant['category'] or 'unknown'
+    end
+end
+
+redis.call('HSET', entry_key,
+    'id', ARGV[1],
+    'username', ARGV[9],
+    'restaurant_id', winner,
+    'restaurant_name', name or '',
+    'category', category,
+    'timestamp', ARGV[10],
+    'went', '0')
+redis.call('EXPIRE', entry_key, ARGV[14])
+redis.call('ZADD', history_key, ARGV[1], ARGV[1])
+redis.call('INCR', version_key)
+
+-- Retention: evict a bounded number of expired entries
+local evicted = trim_history(history_key, retention_key, version_key, ARGV[12], tonumber(ARGV[13]), ARGV[10])
+
+local reply = {'ok', ARGV[1], evicted, winner}
+for _, value in ipairs(fields) do
+    table.insert(reply, value)
+end
+return reply
+"""
+
+
+# Spin pool statistics without spinning: the same resolution, exclusion and
+# weights as SPIN_SCRIPT (shared spin_pool function)
+#
+# KEYS[1]   history sorted set (history:index)
+# KEYS[2]   temporary distance-union key
+# KEYS[3]   temporary filter-result key
+# KEYS[4]   per-restaurant weights hash (restaurants:weights; unlisted restaurants weigh 1)
+# KEYS[5..] ARGV[1] distance index sets to union, then the sets to intersect with them
+#
+# ARGV[1]  number of distance keys
+# ARGV[2]  temporary key TTL in seconds
+# ARGV[3]  current timestamp (seconds, float)
+# ARGV[4]  recent-spin exclusion window in seconds
+# ARGV[5]  "Eat at Home" weight (0 when unavailable today)
+# ARGV[6]  "1" if "Eat at Home" ignores the recent-spin exclusion
+# ARGV[7]  "1" to also return the pool members
+#
+# Returns {restaurant_count, home_weight, excluded_id or "", excluded_in_pool (0/1),
+#          total restaurant weight, N, N (id, weight) pairs of listed restaurants, member1, ...}
+SPIN_POOL_SCRIPT = _SPIN_POOL_FUNCTION + """
+local pool_key, count, excluded, home_weight, weighted, restaurant_weight = spin_pool(
+    KEYS[1], KEYS[2], KEYS[3], KEYS[4], {unpack(KEYS, 5)}, tonumber(ARGV[1]), tonumber(ARGV[2]),
+    tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5]), ARGV[6] == '1')
+
+local excluded_in_pool = 0
+if excluded and redis.call('SISMEMBER', pool_key, excluded) == 1 then
+    excluded_in_pool = 1
+end
+-- Weights are sent as strings (numbers in replies are truncated to integers)
+local reply = {count, home_weight, excluded or '', excluded_in_pool, tostring(restaurant_weight), #weighted}
+for _, entry in ipairs(weighted) do
+    table.insert(reply, entry[1])
+    table.insert(reply, tostring(entry[2]))
+end
+if ARGV[7] == '1' then
+    for _, member in ipairs(redis.call('SMEMBERS', pool_key)) do
+        table.insert(reply, member)
+    end
+end
+return reply
+"""
+
+
+# Resolve a radius filter: every restaurant of the GEO set within ARGV[3] meters of
+# the origin, stored as a plain set so it can be unioned/intersected with the
+# category, distance and open-day sets (GEOSEARCHSTORE would write a sorted set)
+#
+# KEYS[1]  GEO set of restaurant coordinates (restaurants:geo)
+# KEYS[2]  temporary result set
+# ARGV[1]  origin longitude
+# ARGV[2]  origin latitude
+# ARGV[3]  radius in meters
+# ARGV[4]  TTL of the result set in seconds
+#
+# Returns the number of restaurants in range
+GEO_FILTER_SCRIPT = """
+local members = redis.call('GEOSEARCH', KEYS[1], 'FROMLONLAT', ARGV[1], ARGV[2], 'BYRADIUS', ARGV[3], 'm')
+redis.call('DEL', KEYS[2])
+for i = 1, #members, 1000 do
+    redis.call('SADD', KEYS[2], unpack(members, i, math.min(i + 999, #members)))
+end
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return #members
+"""
+
+
+# Fixed-window request budget: take one unit of KEYS[1]'s budget if any is left.
+# The window starts with the first request and ends when the key expires, so
+# PTTL is the time until the budget refills. Refused requests do not count.
+#
+# KEYS[1]  budget counter key
+# ARGV[1]  requests allowed per window
+# ARGV[2]  window length in milliseconds
+#
+# Returns {allowed (1/0), milliseconds until the window resets}
+RATE_LIMIT_SCRIPT = """
+local used = redis.call('INCR', KEYS[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if used == 1 or ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    ttl = tonumber(ARGV[2])
+end
+if used > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return {0, ttl}
+end
+return {1, ttl}
+"""
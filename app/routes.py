@@ -1,13 +1,19 @@
+import math
+from datetime import datetime, timezone
+
 from flask import Blueprint, request, jsonify, make_response
 from app.models import RestaurantModel
+from app.rate_limit import rate_limited
 from app.utils import (
     set_user_cookie,
     get_user_from_cookie,
     validate_category,
     validate_restaurant_name,
     validate_username,
+    classify_distance,
     create_error_response,
-    create_success_response
+    create_success_response,
+    create_conditional_response
 )
 
 api = Blueprint('api', __name__, url_prefix='/api')
@@ -16,7 +22,48 @@ api = Blueprint('api', __name__, url_prefix='/api')
 def get_restaurant_model():
     """Get RestaurantModel instance with current redis client"""
     from flask import current_app
-    return RestaurantModel(current_app.redis)
+    return RestaurantModel(
+        current_app.redis,
+        backup_worker=current_app.backup_worker,
+        catalog_cache=current_app.catalog_cache
+    )
+
+
+def get_radius_filter():
+    """
+    Read the optional within_m query parameter (radius in meters around GOOGLE_PLACES_LOCATION)
+
+    Returns:
+        tuple: (within_m or None, error message or None)
+    """
+    raw_value = request.args.get('within_m', '').strip()
+    if not raw_value:
+        return None, None
+    try:
+        within_m = float(raw_value)
+    except ValueError:
+        return None, "within_m must be a number of meters"
+    # float() accepts "nan" and "inf", which would break the GEOSEARCH and the filter keys
+    if not math.isfinite(within_m):
+        return None, "within_m must be a number of meters"
+    if within_m <= 0:
+        return None, "within_m must be greater than 0"
+    return within_m, None
+
+
+def get_coordinate_args():
+    """
+    Read the optional lat/lng query parameters (coordinates of a search result)
+
+    Returns:
+        tuple: (lat or None, lng or None, error message or None)
+    """
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    # float() accepts "nan" and "inf", which would break the distance comparison and the cache key
+    if any(value is not None and not math.isfinite(value) for value in (lat, lng)):
+        return None, None, "lat and lng must be finite numbers"
+    return lat, lng, None
 
 
 @api.route('/user/check', methods=['GET'])
@@ -64,27 +111,44 @@ def register_user():
 
 @api.route('/restaurants', methods=['GET'])
 def get_restaurants():
-    """Get all restaurants with optional category and distance filters"""
+    """
+    Get all restaurants with optional category and distance filters
+    Query params: category, distance, within_m (optional radius in meters around
+    GOOGLE_PLACES_LOCATION, resolved with GEOSEARCH)
+    """
     category = request.args.get('category', '').strip()
     distance = request.args.get('distance', '').strip()
+    within_m, error = get_radius_filter()
+    if error:
+        return jsonify(create_error_response(error)), 400
 
     model = get_restaurant_model()
-    restaurants = model.get_all(
-        category=category if category else None,
-        distance=distance if distance else None
-    )
 
-    return jsonify(create_success_response({
-        "restaurants": restaurants,
-        "count": len(restaurants),
-        "filters": {
-            "category": category if category else "all",
-            "distance": distance if distance else "all"
+    def build_data():
+        restaurants = model.get_all(
+            category=category if category else None,
+            distance=distance if distance else None,
+            within_m=within_m
+        )
+        return {
+            "restaurants": restaurants,
+            "count": len(restaurants),
+            "filters": {
+                "category": category if category else "all",
+                "distance": distance if distance else "all",
+                "within_m": within_m
+            }
         }
-    }))
+
+    # Unchanged catalog: answer 304 after a single GET on the version counter
+    try:
+        return create_conditional_response(f"restaurants-{model.catalog_version()}", build_data)
+    except ValueError as e:
+        return jsonify(create_error_response(str(e))), 400
 
 
 @api.route('/restaurants', methods=['POST'])
+@rate_limited('add_restaurant')
 def add_restaurant():
     """Add a new restaurant with multiple categories and distance"""
     # Check user cookie
@@ -100,7 +164,10 @@ def add_restaurant():
 
     name = data.get('name', '').strip()
     categories = data.get('categories', [])
-    distance = data.get('distance', 'nearby').strip()
+    # Without a distance the level is classified from google_distance/eta
+    distance = (data.get('distance') or '').strip() or None
+    # Set when the form's pre-selected level was left as is (not a hand-picked level)
+    distance_auto = bool(data.get('distance_auto'))
     closed_days = data.get('closed_days', [])
 
     # NEW: Extract Google Places data
@@ -110,6 +177,8 @@ def add_restaurant():
     website = data.get('website', '')
     google_distance = data.get('google_distance', '')
     eta = data.get('eta', '')
+    lat = data.get('lat')
+    lng = data.get('lng')
 
     # Validate name
     is_valid, error_msg = validate_restaurant_name(name)
@@ -126,7 +195,8 @@ def add_restaurant():
         restaurant = model.create(
             name, categories, distance, username, closed_days,
             place_id=place_id, phone=phone, address=address,
-            website=website, google_distance=google_distance, eta=eta
+            website=website, google_distance=google_distance, eta=eta,
+            lat=lat, lng=lng, distance_auto=distance_auto
         )
 
         return jsonify(create_success_response({
@@ -158,6 +228,7 @@ def update_restaurant(restaurant_id):
     name = data.get('name')
     categories = data.get('categories')
     distance = data.get('distance')
+    distance_auto = bool(data.get('distance_auto'))
     closed_days = data.get('closed_days')
 
     # Extract Google Places data
@@ -167,6 +238,8 @@ def update_restaurant(restaurant_id):
     website = data.get('website')
     google_distance = data.get('google_distance')
     eta = data.get('eta')
+    lat = data.get('lat')
+    lng = data.get('lng')
 
     # Validate name if provided
     if name is not None:
@@ -184,7 +257,7 @@ def update_restaurant(restaurant_id):
         restaurant = model.update(
             restaurant_id, name=name, categories=categories, distance=distance, closed_days=closed_days,
             place_id=place_id, phone=phone, address=address, website=website,
-            google_distance=google_distance, eta=eta
+            google_distance=google_distance, eta=eta, lat=lat, lng=lng, distance_auto=distance_auto
         )
 
         if not restaurant:
@@ -231,16 +304,36 @@ def delete_restaurant(restaurant_id):
 
 @api.route('/randomize', methods=['GET'])
 def randomize():
-    """Get a random restaurant with optional category and distance filters"""
+    """
+    Get a random restaurant with optional category and distance filters
+    Query params: category, distance, within_m (optional radius in meters around
+    GOOGLE_PLACES_LOCATION, resolved with GEOSEARCH)
+    """
     # Get user from cookie
     username = get_user_from_cookie()
     if not username:
         return jsonify(create_error_response("User not registered. Please register first.")), 401
 
-    # Check rate limiting
+    category = request.args.get('category', '').strip()
+    distance = request.args.get('distance', '').strip()
+    within_m, error = get_radius_filter()
+    if error:
+        return jsonify(create_error_response(error)), 400
+
+    # Rate limit check, pick, spin record and history append run atomically
     model = get_restaurant_model()
-    can_spin, seconds_remaining = model.can_user_spin(username)
-    if not can_spin:
+    try:
+        result = model.spin(
+            username,
+            category=category if category else None,
+            distance=distance if distance else None,
+            within_m=within_m
+        )
+    except ValueError as e:
+        return jsonify(create_error_response(str(e))), 400
+
+    if result["status"] == "cooldown":
+        seconds_remaining = result["seconds_remaining"]
         minutes = seconds_remaining // 60
         seconds = seconds_remaining % 60
         if minutes > 0:
@@ -255,21 +348,14 @@ def randomize():
         }
         return jsonify(response), 429
 
-    category = request.args.get('category', '').strip()
-    distance = request.args.get('distance', '').strip()
-
-    # Get random restaurant
-    restaurant = model.get_random(
-        category=category if category else None,
-        distance=distance if distance else None
-    )
-
-    if not restaurant:
+    if result["status"] == "empty":
         filters = []
         if category:
             filters.append(f"category '{category}'")
         if distance:
             filters.append(f"distance '{distance}'")
+        if within_m:
+            filters.append(f"a {within_m:g} m radius")
         filter_text = " and ".join(filters) if filters else ""
 
         return jsonify(create_error_response(
@@ -277,32 +363,59 @@ def randomize():
             404
         )), 404
 
-    # Record spin time for rate limiting
-    model.record_user_spin(username)
-
-    # Save to history and get entry ID
-    entry_id = model.add_to_history(username, restaurant)
-
     return jsonify(create_success_response({
-        "restaurant": restaurant,
-        "entry_id": entry_id
+        "restaurant": result["restaurant"],
+        "entry_id": result["entry_id"]
     }))
 
 
+@api.route('/spin/status', methods=['GET'])
+def spin_status():
+    """
+    Check whether the user's spin cooldown is active without spinning
+    Returns: can_spin, seconds_remaining and cooldown_seconds
+    """
+    from app.config import Config
+
+    username = get_user_from_cookie()
+    if not username:
+        return jsonify(create_error_response("User not registered. Please register first.")), 401
+
+    model = get_restaurant_model()
+    can_spin, seconds_remaining = model.can_user_spin(username)
+
+    response = make_response(jsonify(create_success_response({
+        "can_spin": can_spin,
+        "seconds_remaining": seconds_remaining,
+        "cooldown_seconds": Config.SPIN_TIMEOUT_SECONDS
+    })))
+    # The answer changes every second; never reuse it
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
 @api.route('/randomize/stats', methods=['GET'])
 def randomize_stats():
     """Get statistics about the current randomization pool"""
     try:
         category = request.args.get('category', '').strip()
         distance = request.args.get('distance', '').strip()
+        within_m, error = get_radius_filter()
+        if error:
+            return jsonify(create_error_response(error)), 400
+        aggregate_only = request.args.get('aggregate_only', '').lower() in ('1', 'true', 'yes')
 
         model = get_restaurant_model()
         stats = model.get_randomization_stats(
             category=category if category else None,
-            distance=distance if distance else None
+            distance=distance if distance else None,
+            within_m=within_m,
+            aggregate_only=aggregate_only
         )
 
         return jsonify(create_success_response(stats))
+    except ValueError as e:
+        return jsonify(create_error_response(str(e))), 400
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -311,17 +424,34 @@ def randomize_stats():
 
 @api.route('/history', methods=['GET'])
 def get_history():
-    """Get spin history (last 20 spins)"""
+    """Get spin history (last 20 spins, or the spins since an ISO-8601 UTC time with ?since=)"""
     limit = request.args.get('limit', 20, type=int)
     limit = min(max(1, limit), 50)  # Clamp between 1 and 50
 
+    since = None
+    raw_since = request.args.get('since', '').strip()
+    if raw_since:
+        try:
+            since = datetime.fromisoformat(raw_since)
+        except ValueError:
+            return jsonify(create_error_response("since must be an ISO-8601 timestamp")), 400
+        # Spin timestamps are naive UTC
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
     model = get_restaurant_model()
-    history = model.get_history(limit=limit)
 
-    return jsonify(create_success_response({
-        "history": history,
-        "count": len(history)
-    }))
+    def build_data():
+        if since is not None:
+            history = model.get_history_since(since, limit=limit)
+        else:
+            history = model.get_history(limit=limit)
+        return {
+            "history": history,
+            "count": len(history)
+        }
+
+    return create_conditional_response(f"history-{model.history_version()}", build_data)
 
 
 @api.route('/history/<entry_id>/went', methods=['POST'])
@@ -358,14 +488,15 @@ def get_user_stats(username):
 def get_categories():
     """Get all available categories (default + custom)"""
     model = get_restaurant_model()
-    categories = model.get_categories()
 
-    return jsonify(create_success_response({
-        "categories": categories
-    }))
+    return create_conditional_response(
+        f"categories-{model.catalog_version()}",
+        lambda: {"categories": model.get_categories()}
+    )
 
 
 @api.route('/categories', methods=['POST'])
+@rate_limited('add_category')
 def add_category():
     """Add a new custom category"""
     # Check user cookie
@@ -432,11 +563,12 @@ def get_config():
 def search_places():
     """
     Search Google Places for restaurants
-    Query param: q (search query)
+    Query params: q (search query), enrich (optional "true"/"false": add driving
+    distance and ETA, default GOOGLE_SEARCH_ENRICH_DRIVING)
     Returns: List of matching places
     """
+    from flask import current_app
     from app.config import Config
-    from app.google_places import GooglePlacesService
 
     # Check if Google Places is enabled
     if not Config.GOOGLE_PLACES_ENABLED or not Config.GOOGLE_PLACES_API_KEY:
@@ -447,14 +579,14 @@ def search_places():
     if len(query) < 2:
         return jsonify(create_success_response({"places": []}))
 
-    # Search via GooglePlacesService
+    # Search via the worker's shared GooglePlacesService
     try:
-        service = GooglePlacesService(
-            Config.GOOGLE_PLACES_API_KEY,
-            Config.GOOGLE_PLACES_LOCATION,
-            Config.GOOGLE_PLACES_RADIUS
+        service = current_app.places_service
+        enrich = request.args.get('enrich')
+        places = service.search_places(
+            query,
+            enrich=None if enrich is None else enrich.lower() in ('1', 'true', 'yes')
         )
-        places = service.search_places(query)
 
         return jsonify(create_success_response({
             "places": places
@@ -468,27 +600,31 @@ def search_places():
 def get_place_details(place_id):
     """
     Get detailed information for a specific place
-    Returns: Full place details
+    Query params: lat, lng (optional, from the search result; enables the parallel lookup)
+    Returns: Full place details, plus distance_tier (classified distance level or null)
     """
+    from flask import current_app
     from app.config import Config
-    from app.google_places import GooglePlacesService
 
     # Check if enabled
     if not Config.GOOGLE_PLACES_ENABLED or not Config.GOOGLE_PLACES_API_KEY:
         return jsonify(create_error_response("Google Places feature is not enabled")), 400
 
+    lat, lng, error = get_coordinate_args()
+    if error:
+        return jsonify(create_error_response(error)), 400
+
     # Fetch details
     try:
-        service = GooglePlacesService(
-            Config.GOOGLE_PLACES_API_KEY,
-            Config.GOOGLE_PLACES_LOCATION,
-            Config.GOOGLE_PLACES_RADIUS
-        )
-        details = service.get_place_details(place_id)
+        service = current_app.places_service
+        details = service.get_place_details(place_id, lat=lat, lng=lng)
 
         if not details:
             return jsonify(create_error_response("Place not found")), 404
 
+        # Distance level the server will store for this place (pre-selects the form)
+        details = dict(details, distance_tier=classify_distance(details.get('distance'), details.get('eta')))
+
         return jsonify(create_success_response({
             "place": details
         }))
@@ -17,6 +17,9 @@ const state = {
     searchTimeout: null  // Debounce timeout for search
 };
 
+// Last body and ETag of each conditional GET, keyed by URL
+const conditionalCache = new Map();
+
 // DOM Elements
 const elements = {
     welcomeModal: null,
@@ -66,6 +69,8 @@ const elements = {
     websiteInput: null,
     googleDistanceInput: null,
     etaInput: null,
+    latInput: null,
+    lngInput: null,
     // Google Places elements (Edit Modal)
     editPlacesSearchGroup: null,
     editRestaurantSearchInput: null,
@@ -75,7 +80,9 @@ const elements = {
     editAddressInput: null,
     editWebsiteInput: null,
     editGoogleDistanceInput: null,
-    editEtaInput: null
+    editEtaInput: null,
+    editLatInput: null,
+    editLngInput: null
 };
 
 // Initialize app on page load
@@ -141,6 +148,8 @@ function initializeElements() {
     elements.websiteInput = document.getElementById('website-input');
     elements.googleDistanceInput = document.getElementById('google-distance-input');
     elements.etaInput = document.getElementById('eta-input');
+    elements.latInput = document.getElementById('lat-input');
+    elements.lngInput = document.getElementById('lng-input');
     // Google Places elements (Edit Modal)
     elements.editPlacesSearchGroup = document.getElementById('edit-places-search-group');
     elements.editRestaurantSearchInput = document.getElementById('edit-restaurant-search-input');
@@ -151,6 +160,8 @@ function initializeElements() {
     elements.editWebsiteInput = document.getElementById('edit-website-input');
     elements.editGoogleDistanceInput = document.getElementById('edit-google-distance-input');
     elements.editEtaInput = document.getElementById('edit-eta-input');
+    elements.editLatInput = document.getElementById('edit-lat-input');
+    elements.editLngInput = document.getElementById('edit-lng-input');
 }
 
 // Setup event listeners
@@ -172,6 +183,12 @@ function setupEventListeners() {
     // Add restaurant form
     elements.addRestaurantForm.addEventListener('submit', handleAddRestaurant);
 
+    // Remember when the user picks a distance level, so an untouched pre-selection
+    // stays automatic (reclassified when the driving data changes)
+    [elements.restaurantDistanceInput, elements.editRestaurantDistance].forEach(select => {
+        select.addEventListener('change', () => { select.dataset.picked = '1'; });
+    });
+
     // Add modal
     elements.openAddModalBtn.addEventListener('click', openAddModal);
     elements.closeAddModal.addEventListener('click', closeAddModal);
@@ -241,6 +258,24 @@ async function checkUser() {
     }
 }
 
+// GET a JSON endpoint that supports ETags, reusing the last body on 304 Not Modified
+async function fetchConditional(url) {
+    const cached = conditionalCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        conditionalCache.set(url, { etag, data });
+    }
+    return data;
+}
+
 // Load configuration from API
 async function loadConfig() {
     try {
@@ -319,8 +354,7 @@ async function handleUserRegistration(e) {
 // Load categories from API
 async function loadCategories() {
     try {
-        const response = await fetch('/api/categories');
-        const data = await response.json();
+        const data = await fetchConditional('/api/categories');
 
         if (data.success) {
             state.categories = data.categories;
@@ -433,8 +467,7 @@ async function loadRestaurants() {
             ? `/api/restaurants?${params.toString()}`
             : '/api/restaurants';
 
-        const response = await fetch(url);
-        const data = await response.json();
+        const data = await fetchConditional(url);
 
         if (data.success) {
             state.restaurants = data.restaurants;
@@ -607,23 +640,6 @@ function formatETA(minutes) {
     return mins > 0 ? `~${hours}h ${mins}m` : `~${hours}h`;
 }
 
-// Convert meters to distance category
-function metersToDistanceCategory(meters) {
-    if (!meters) return 'nearby';
-
-    const miles = meters * 0.000621371;
-
-    if (miles <= 5) {
-        return 'nearby';
-    } else if (miles <= 10) {
-        return 'short-drive';
-    } else if (miles <= 20) {
-        return 'medium-drive';
-    } else {
-        return 'far';
-    }
-}
-
 // Debounced search input handler
 function handleSearchInput(e) {
     const query = e.target.value.trim();
@@ -685,17 +701,14 @@ function renderPlaceResults(places) {
         item.appendChild(addressDiv);
 
         if (place.distance) {
-            const distanceDiv = document.createElement('div');
-            distanceDiv.className = 'place-distance';
-            distanceDiv.textContent = formatMetersToMiles(place.distance);
-            item.appendChild(distanceDiv);
+            item.appendChild(createPlaceDistanceElement(place));
         }
 
         item.addEventListener('click', (e) => {
             e.stopPropagation();
             // Hide dropdown immediately
             elements.placesAutocompleteResults.classList.add('hidden');
-            selectPlace(place.place_id);
+            selectPlace(place);
         });
         container.appendChild(item);
     });
@@ -703,10 +716,34 @@ function renderPlaceResults(places) {
     container.classList.remove('hidden');
 }
 
+// Build the details URL for a search result (coordinates let the server
+// fetch details and driving distance in parallel)
+function placeDetailsUrl(place) {
+    const url = `/api/places/details/${encodeURIComponent(place.place_id)}`;
+    if (place.lat == null || place.lng == null) {
+        return url;
+    }
+    const params = new URLSearchParams({ lat: place.lat, lng: place.lng });
+    return `${url}?${params.toString()}`;
+}
+
+// Distance line for a search result: driving distance and ETA when the server
+// enriched the result, straight-line distance otherwise
+function createPlaceDistanceElement(place) {
+    const distanceDiv = document.createElement('div');
+    distanceDiv.className = 'place-distance';
+    if (place.driving_distance != null && place.eta != null) {
+        distanceDiv.textContent = `${formatMetersToMiles(place.driving_distance)} · ${formatETA(place.eta)}`;
+    } else {
+        distanceDiv.textContent = formatMetersToMiles(place.distance);
+    }
+    return distanceDiv;
+}
+
 // Select a place and fetch full details
-async function selectPlace(placeId) {
+async function selectPlace(place) {
     try {
-        const response = await fetch(`/api/places/details/${placeId}`);
+        const response = await fetch(placeDetailsUrl(place));
         const data = await response.json();
 
         if (data.success && data.place) {
@@ -734,11 +771,13 @@ function populateFormWithPlace(place) {
     elements.websiteInput.value = place.website || '';
     elements.googleDistanceInput.value = place.distance || '';
     elements.etaInput.value = place.eta || '';
+    elements.latInput.value = place.lat || '';
+    elements.lngInput.value = place.lng || '';
 
-    // Auto-set distance dropdown based on Google distance
-    if (place.distance) {
-        const distanceCategory = metersToDistanceCategory(place.distance);
-        elements.restaurantDistanceInput.value = distanceCategory;
+    // Pre-select the distance level the server classified from the driving data
+    if (place.distance_tier) {
+        elements.restaurantDistanceInput.value = place.distance_tier;
+        delete elements.restaurantDistanceInput.dataset.picked;
     }
 
     // Show place info
@@ -777,6 +816,8 @@ function clearPlaceSelection() {
     elements.websiteInput.value = '';
     elements.googleDistanceInput.value = '';
     elements.etaInput.value = '';
+    elements.latInput.value = '';
+    elements.lngInput.value = '';
 
     // Hide place info
     elements.selectedPlaceInfo.classList.add('hidden');
@@ -845,10 +886,7 @@ function renderEditPlaceResults(places) {
         item.appendChild(addressDiv);
 
         if (place.distance) {
-            const distanceDiv = document.createElement('div');
-            distanceDiv.className = 'place-distance';
-            distanceDiv.textContent = formatMetersToMiles(place.distance);
-            item.appendChild(distanceDiv);
+            item.appendChild(createPlaceDistanceElement(place));
         }
 
         item.addEventListener('click', (e) => {
@@ -858,7 +896,7 @@ function renderEditPlaceResults(places) {
             elements.editPlacesAutocompleteResults.classList.add('hidden');
             elements.editRestaurantSearchInput.value = '';
             elements.editRestaurantSearchInput.blur(); // Remove focus
-            selectEditPlace(place.place_id);
+            selectEditPlace(place);
         });
         container.appendChild(item);
     });
@@ -867,9 +905,9 @@ function renderEditPlaceResults(places) {
 }
 
 // Select a place for edit modal and fetch full details
-async function selectEditPlace(placeId) {
+async function selectEditPlace(place) {
     try {
-        const response = await fetch(`/api/places/details/${placeId}`);
+        const response = await fetch(placeDetailsUrl(place));
         const data = await response.json();
 
         if (data.success && data.place) {
@@ -897,11 +935,13 @@ function populateEditFormWithPlace(place) {
     elements.editWebsiteInput.value = place.website || '';
     elements.editGoogleDistanceInput.value = place.distance || '';
     elements.editEtaInput.value = place.eta || '';
+    elements.editLatInput.value = place.lat || '';
+    elements.editLngInput.value = place.lng || '';
 
-    // Auto-set distance dropdown based on Google distance
-    if (place.distance) {
-        const distanceCategory = metersToDistanceCategory(place.distance);
-        elements.editRestaurantDistance.value = distanceCategory;
+    // Pre-select the distance level the server classified from the driving data
+    if (place.distance_tier) {
+        elements.editRestaurantDistance.value = place.distance_tier;
+        delete elements.editRestaurantDistance.dataset.picked;
     }
 
     // Update display
@@ -1111,6 +1151,7 @@ async function handleAddRestaurant(e) {
 
     const name = elements.restaurantNameInput.value.trim();
     const distance = elements.restaurantDistanceInput.value;
+    const distanceAuto = !elements.restaurantDistanceInput.dataset.picked;
 
     // Get selected categories from checkboxes
     const categoryCheckboxes = elements.addCategoriesCheckboxes.querySelectorAll('input[type="checkbox"]:checked');
@@ -1127,6 +1168,8 @@ async function handleAddRestaurant(e) {
     const website = elements.websiteInput.value || '';
     const googleDistance = elements.googleDistanceInput.value || '';
     const eta = elements.etaInput.value || '';
+    const lat = elements.latInput.value || '';
+    const lng = elements.lngInput.value || '';
 
     if (!name) {
         showToast('Please enter a restaurant name', 'error');
@@ -1148,6 +1191,7 @@ async function handleAddRestaurant(e) {
                 name,
                 categories,
                 distance,
+                distance_auto: distanceAuto,
                 closed_days: closedDays,
                 // Google Places data
                 place_id: placeId,
@@ -1155,7 +1199,9 @@ async function handleAddRestaurant(e) {
                 address: address,
                 website: website,
                 google_distance: googleDistance,
-                eta: eta
+                eta: eta,
+                lat: lat,
+                lng: lng
             })
         });
 
@@ -1193,15 +1239,11 @@ async function checkCooldownStatus() {
     if (!state.user) return;
 
     try {
-        // Make a test randomize request to check cooldown
-        const params = new URLSearchParams();
-        const url = `/api/randomize?${params.toString()}`;
-
-        const response = await fetch(url);
+        // Read-only probe: one PTTL on the server, no spin is performed
+        const response = await fetch('/api/spin/status');
         const data = await response.json();
 
-        // If we get a 429, there's an active cooldown
-        if (response.status === 429 && data.seconds_remaining) {
+        if (data.success && !data.can_spin && data.seconds_remaining) {
             showCooldownBanner(data.seconds_remaining);
         }
     } catch (error) {
@@ -1212,8 +1254,7 @@ async function checkCooldownStatus() {
 // Load spin history
 async function loadHistory() {
     try {
-        const response = await fetch('/api/history');
-        const data = await response.json();
+        const data = await fetchConditional('/api/history');
 
         if (data.success) {
             state.history = data.history;
@@ -1322,8 +1363,7 @@ async function showCooldownBanner(secondsRemaining) {
 
         // Fetch the full restaurant details to display
         try {
-            const response = await fetch('/api/restaurants');
-            const data = await response.json();
+            const data = await fetchConditional('/api/restaurants');
 
             if (data.success) {
                 const restaurant = data.restaurants.find(r => r.name === lastSpin.restaurant_name);
@@ -1409,6 +1449,7 @@ function openAddModal() {
 function closeAddModal() {
     elements.addModal.classList.add('hidden');
     elements.addRestaurantForm.reset();
+    delete elements.restaurantDistanceInput.dataset.picked;
 }
 
 // Open edit modal with restaurant data
@@ -1444,6 +1485,7 @@ function openEditModal(restaurant) {
     elements.editRestaurantId.value = restaurant.id;
     elements.editRestaurantName.value = restaurant.name;
     elements.editRestaurantDistance.value = restaurant.distance || 'nearby';
+    delete elements.editRestaurantDistance.dataset.picked;
 
     // Check the appropriate category checkboxes
     const categories = Array.isArray(restaurant.categories) ? restaurant.categories : [restaurant.category || 'takeout'];
@@ -1471,6 +1513,8 @@ function openEditModal(restaurant) {
     elements.editWebsiteInput.value = restaurant.website || '';
     elements.editGoogleDistanceInput.value = restaurant.google_distance || '';
     elements.editEtaInput.value = restaurant.eta || '';
+    elements.editLatInput.value = restaurant.lat || '';
+    elements.editLngInput.value = restaurant.lng || '';
 
     // Show Google Places info if available
     if (restaurant.phone || restaurant.address || restaurant.website || restaurant.google_distance) {
@@ -1619,6 +1663,7 @@ async function handleEditRestaurant(e) {
     const id = elements.editRestaurantId.value;
     const name = elements.editRestaurantName.value.trim();
     const distance = elements.editRestaurantDistance.value;
+    const distanceAuto = !elements.editRestaurantDistance.dataset.picked;
 
     // Get selected categories
     const categoryCheckboxes = elements.editCategoriesCheckboxes.querySelectorAll('input[type="checkbox"]:checked');
@@ -1635,6 +1680,8 @@ async function handleEditRestaurant(e) {
     const website = elements.editWebsiteInput.value || '';
     const googleDistance = elements.editGoogleDistanceInput.value || '';
     const eta = elements.editEtaInput.value || '';
+    const lat = elements.editLatInput.value || '';
+    const lng = elements.editLngInput.value || '';
 
     if (!name) {
         showToast('Please enter a restaurant name', 'error');
@@ -1651,6 +1698,7 @@ async function handleEditRestaurant(e) {
             name,
             categories,
             distance,
+            distance_auto: distanceAuto,
             closed_days: closedDays,
             // Google Places data
             place_id: placeId,
@@ -1658,7 +1706,9 @@ async function handleEditRestaurant(e) {
             address: address,
             website: website,
             google_distance: googleDistance,
-            eta: eta
+            eta: eta,
+            lat: lat,
+            lng: lng
         };
 
         console.log('Updating restaurant with payload:', payload);
@@ -1,4 +1,4 @@
-from flask import request
+from flask import request, jsonify, make_response
 from app.config import Config
 
 
@@ -99,6 +99,41 @@ def validate_username(username):
     return True, None
 
 
+def classify_distance(google_distance=None, eta=None):
+    """
+    Pick the distance level for Google driving data using the configured thresholds
+    The DISTANCE_TIER_BASIS measure is used when known, the other one otherwise
+
+    Args:
+        google_distance (str|float, optional): Driving distance in meters
+        eta (str|float, optional): Driving time in minutes
+
+    Returns:
+        str: Level from VALID_DISTANCES, or None if neither value is usable
+    """
+    measures = {
+        'meters': (google_distance, Config.DISTANCE_TIER_METERS),
+        'eta': (eta, Config.DISTANCE_TIER_ETA_MINUTES)
+    }
+    order = ('eta', 'meters') if Config.DISTANCE_TIER_BASIS == 'eta' else ('meters', 'eta')
+
+    for basis in order:
+        raw_value, thresholds = measures[basis]
+        try:
+            value = float(raw_value)
+        except (TypeError, ValueError):
+            continue
+        if value <= 0:
+            continue
+
+        for level, upper_bound in zip(Config.VALID_DISTANCES, thresholds):
+            if value <= upper_bound:
+                return level
+        return Config.VALID_DISTANCES[min(len(thresholds), len(Config.VALID_DISTANCES) - 1)]
+
+    return None
+
+
 def create_error_response(message, code=400):
     """
     Create a standardized error response
@@ -136,3 +171,26 @@ def create_success_response(data=None, message=None):
         response.update(data)
 
     return response
+
+
+def create_conditional_response(etag, build_data):
+    """
+    Create a JSON success response that supports conditional GETs
+    If the request's If-None-Match already holds the ETag, a 304 Not Modified
+    is returned without calling build_data, so no data is read or serialized
+
+    Args:
+        etag (str): Strong ETag of the current representation (e.g. "restaurants-42")
+        build_data (callable): Returns the data dict for create_success_response
+
+    Returns:
+        Response: 304 or 200 response carrying the ETag
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(jsonify(create_success_response(build_data())))
+    response.set_etag(etag)
+    # Let browsers keep the body but always revalidate it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1 @@
+"""Standalone latency benchmarks (run against a scratch Redis database)"""
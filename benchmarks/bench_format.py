@@ -0,0 +1,84 @@
+"""
+Compare restaurant formatting on bytes replies (per-field decoding) against str replies
+
+Usage:
+    python -m benchmarks.bench_format [--sizes 1000,100000] [--repeat 5] [--redis]
+
+"bytes" is the old path: a decode_responses=False client returns bytes and
+every field was decoded in a Python comprehension before parsing. "str" is the
+current path: the client decodes replies and _format_restaurant only parses.
+The default run is pure computation; --redis also times pipelined HGETALL
+plus formatting against a real server with both client modes.
+
+WARNING: --redis flushes BENCH_REDIS_DB (default 15) on the configured Redis server.
+"""
+import argparse
+
+import redis
+
+from app.models import RestaurantModel
+from benchmarks.common import get_bench_redis, make_restaurant, seed_restaurants, timed
+
+
+def decode_fields(data):
+    """Per-field decoding the model layer did before decode_responses=True"""
+    return {k.decode('utf-8') if isinstance(k, bytes) else k:
+            v.decode('utf-8') if isinstance(v, bytes) else v
+            for k, v in data.items()}
+
+
+def fetch_hashes(client, ids):
+    """Pipelined HGETALL of restaurant hashes"""
+    pipe = client.pipeline(transaction=False)
+    for rid in ids:
+        pipe.hgetall(f"restaurants:{rid}")
+    return pipe.execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--redis', action='store_true', help='Also time HGETALL round trips')
+    args = parser.parse_args()
+
+    # The model only needs a client object to format; no command is sent
+    model = RestaurantModel(redis.Redis())
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    print(f"{'restaurants':>12} {'bytes p50':>10} {'bytes us/r':>11} {'str p50':>9} {'str us/r':>9} {'speedup':>8}")
+    for size in sizes:
+        str_hashes = [make_restaurant(rid) for rid in range(1, size + 1)]
+        bytes_hashes = [{k.encode(): v.encode() for k, v in data.items()} for data in str_hashes]
+        assert [model._format_restaurant(decode_fields(d)) for d in bytes_hashes[:10]] == \
+               [model._format_restaurant(d) for d in str_hashes[:10]]
+
+        _, bytes_median = timed(
+            lambda: [model._format_restaurant(decode_fields(d)) for d in bytes_hashes], args.repeat
+        )
+        _, str_median = timed(lambda: [model._format_restaurant(d) for d in str_hashes], args.repeat)
+        print(f"{size:>12} {bytes_median:>8.1f}ms {bytes_median / size * 1000:>11.2f} "
+              f"{str_median:>7.1f}ms {str_median / size * 1000:>9.2f} {bytes_median / str_median:>7.1f}x")
+
+    if not args.redis:
+        return
+
+    print()
+    print(f"{'restaurants':>12} {'bytes p50':>10} {'str p50':>9} {'speedup':>8}  (HGETALL + format)")
+    for size in sizes:
+        raw_client = get_bench_redis(decode_responses=False)
+        decoding_client = get_bench_redis()
+        ids = seed_restaurants(decoding_client, size)
+
+        _, bytes_median = timed(
+            lambda: [model._format_restaurant(decode_fields(d)) for d in fetch_hashes(raw_client, ids)], args.repeat
+        )
+        _, str_median = timed(
+            lambda: [model._format_restaurant(d) for d in fetch_hashes(decoding_client, ids)], args.repeat
+        )
+        print(f"{size:>12} {bytes_median:>8.1f}ms {str_median:>7.1f}ms {bytes_median / str_median:>7.1f}x")
+        decoding_client.flushdb()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Compare per-ID HGETALL hydration against pipelined RestaurantModel.get_many
+
+Usage:
+    python -m benchmarks.bench_get_all [--sizes 100,1000,10000] [--repeat 5] [--chunk-size 500]
+
+WARNING: flushes BENCH_REDIS_DB (default 15) on the configured Redis server.
+"""
+import argparse
+
+from app.models import RestaurantModel
+from benchmarks.common import get_bench_redis, seed_restaurants, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'restaurants':>12} {'loop best':>11} {'loop p50':>10} {'pipe best':>11} {'pipe p50':>10} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        client = get_bench_redis()
+        ids = seed_restaurants(client, size)
+        model = RestaurantModel(client)
+
+        loop_best, loop_median = timed(lambda: [model.get(rid) for rid in ids], args.repeat)
+        pipe_best, pipe_median = timed(lambda: model.get_many(ids, chunk_size=args.chunk_size), args.repeat)
+
+        print(f"{size:>12} {loop_best:>9.1f}ms {loop_median:>8.1f}ms "
+              f"{pipe_best:>9.1f}ms {pipe_median:>8.1f}ms {loop_median / pipe_median:>7.1f}x")
+        client.flushdb()
+
+
+if __name__ == '__main__':
+    main()
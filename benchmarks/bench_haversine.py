@@ -0,0 +1,48 @@
+"""
+Compare the pure-Python Haversine loop against the NumPy-vectorized batch
+
+Usage:
+    python -m benchmarks.bench_haversine [--sizes 10000,1000000] [--repeat 5]
+
+Pure computation (no Redis or network). Without NumPy installed only the
+pure-Python column is measured.
+"""
+import argparse
+import random
+
+from app import geo
+from benchmarks.common import timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,1000000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    origin = (40.0, -75.0)
+    print(f"{'points':>10} {'python p50':>11} {'python pts/s':>13} {'numpy p50':>10} {'numpy pts/s':>12} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        rng = random.Random(size)
+        lats = [origin[0] + rng.uniform(-0.5, 0.5) for _ in range(size)]
+        lngs = [origin[1] + rng.uniform(-0.5, 0.5) for _ in range(size)]
+
+        _, python_median = timed(lambda: geo._haversine_many_python(*origin, lats, lngs), args.repeat)
+        line = f"{size:>10} {python_median:>9.1f}ms {size / python_median * 1000:>13,.0f}"
+
+        if geo.np is None:
+            print(f"{line} {'-':>10} {'-':>12} {'-':>8}")
+            continue
+
+        # Same input as a list (includes the array conversion) to match the public API
+        _, numpy_median = timed(lambda: geo.haversine_many(*origin, lats, lngs), args.repeat)
+        expected = geo._haversine_many_python(*origin, lats[:100], lngs[:100])
+        actual = geo.haversine_many(*origin, lats[:100], lngs[:100])
+        assert all(abs(a - b) < 1e-6 for a, b in zip(expected, actual))
+
+        print(f"{line} {numpy_median:>8.1f}ms {size / numpy_median * 1000:>12,.0f} "
+              f"{python_median / numpy_median:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare a fresh connection per Google API call (bare requests.get) against the pooled keep-alive session,
+then serial against parallel (coordinates known) place detail lookups
+
+Usage:
+    python -m benchmarks.bench_places_http [--calls 200] [--connect-delay-ms 40] [--response-delay-ms 5]
+
+Runs against a local mock server (no API key or Redis needed). --connect-delay-ms
+models the TCP + TLS handshake that every unpooled call pays.
+"""
+import argparse
+import time
+
+import requests
+
+from app.google_places import GooglePlacesService, create_session
+from benchmarks.mock_google import MockGoogleServer
+
+
+class UnpooledSession:
+    """Session stand-in that opens a new connection per call, like bare requests.get"""
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+
+def run(service, calls):
+    """
+    Time search + details (which also calls Distance Matrix) lookups
+
+    Args:
+        service (GooglePlacesService): Service under test
+        calls (int): Number of search/details pairs
+
+    Returns:
+        list: Per-pair latencies in milliseconds, sorted
+    """
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        service.search_places(f"pizza {i}")
+        service.get_place_details(f"mock-place-{i % 10}")
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--connect-delay-ms', type=float, default=40)
+    parser.add_argument('--response-delay-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'session':>9} {'p50':>9} {'p95':>9} {'total':>10} {'connections':>12}")
+    results = {}
+    for name, session in (('unpooled', UnpooledSession()), ('pooled', create_session())):
+        with MockGoogleServer(args.connect_delay_ms, args.response_delay_ms) as server:
+            service = GooglePlacesService('bench-key', '40.0,-75.0', 50000,
+                                          api_base_url=server.base_url, session=session)
+            samples = run(service, args.calls)
+            p50 = samples[len(samples) // 2]
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            results[name] = p50
+            print(f"{name:>9} {p50:>7.1f}ms {p95:>7.1f}ms {sum(samples):>8.0f}ms {server.connections:>12}")
+
+    print(f"p50 speedup: {results['unpooled'] / results['pooled']:.1f}x")
+
+    # Details + Distance Matrix: back to back vs concurrent
+    print()
+    print(f"{'details':>9} {'p50':>9} {'p95':>9}")
+    with MockGoogleServer(args.connect_delay_ms, args.response_delay_ms) as server:
+        service = GooglePlacesService('bench-key', '40.0,-75.0', 50000,
+                                      api_base_url=server.base_url, session=create_session(),
+                                      distance_budget=60)
+        results = {}
+        for name, coordinates in (('serial', (None, None)), ('parallel', (40.01, -75.0))):
+            samples = []
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                service.get_place_details('mock-place-1', *coordinates)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            results[name] = samples[len(samples) // 2]
+            print(f"{name:>9} {results[name]:>7.1f}ms {samples[min(len(samples) - 1, int(len(samples) * 0.95))]:>7.1f}ms")
+    print(f"p50 speedup: {results['serial'] / results['parallel']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
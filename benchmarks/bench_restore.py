@@ -0,0 +1,63 @@
+"""
+Time a streaming restore of a large snapshot (default 50k restaurants)
+
+Usage:
+    python -m benchmarks.bench_restore [--count 50000] [--batch-size 500]
+
+WARNING: flushes BENCH_REDIS_DB (default 15) on the configured Redis server.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.models import RestaurantModel
+from benchmarks.common import get_bench_redis, make_restaurant
+
+
+def write_snapshot(path, count):
+    """Write a snapshot in the same layout as RestaurantModel.backup_to_file"""
+    restaurants = []
+    for restaurant_id in range(1, count + 1):
+        restaurant = make_restaurant(restaurant_id)
+        restaurant["categories"] = json.loads(restaurant["categories"])
+        restaurant["closed_days"] = json.loads(restaurant["closed_days"])
+        restaurants.append(restaurant)
+
+    with open(path, 'w') as f:
+        json.dump({"timestamp": "2000-01-01T00:00:00", "restaurants": restaurants,
+                   "custom_categories": []}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot = os.path.join(temp_dir, "restaurants_backup_bench.json")
+        write_snapshot(snapshot, args.count)
+        size_mb = os.path.getsize(snapshot) / 1024 / 1024
+
+        client = get_bench_redis()
+        model = RestaurantModel(client)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = model.restore_from_file(snapshot, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"snapshot: {args.count} restaurants, {size_mb:.1f} MB")
+        print(f"restored: {result['restaurants_restored']} in {elapsed:.2f}s "
+              f"({result['restaurants_restored'] / elapsed:,.0f} restaurants/s)")
+        print(f"peak Python memory during restore: {peak / 1024 / 1024:.1f} MB")
+        client.flushdb()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Shared helpers for the benchmark scripts"""
+import json
+import os
+import time
+from datetime import datetime
+
+import redis
+
+from app.config import Config
+
+
+# Benchmarks flush this database, so keep it away from the app's data
+BENCH_REDIS_DB = int(os.getenv('BENCH_REDIS_DB', 15))
+
+
+def get_bench_redis(db=None, decode_responses=True):
+    """
+    Connect to the scratch benchmark database and empty it
+
+    Args:
+        db (int, optional): Redis database number (default BENCH_REDIS_DB)
+        decode_responses (bool): Return str replies like the app client (False = bytes)
+
+    Returns:
+        redis.Redis: Redis client
+    """
+    db = BENCH_REDIS_DB if db is None else db
+    if db == Config.REDIS_DB:
+        raise SystemExit(f"Refusing to flush the application database (REDIS_DB={db})")
+
+    client = redis.Redis(
+        host=Config.REDIS_HOST,
+        port=Config.REDIS_PORT,
+        db=db,
+        password=Config.REDIS_PASSWORD,
+        decode_responses=decode_responses
+    )
+    client.flushdb()
+    return client
+
+
+def make_restaurant(restaurant_id):
+    """
+    Build a realistic restaurant hash for seeding
+
+    Args:
+        restaurant_id (int): Restaurant ID
+
+    Returns:
+        dict: Restaurant hash as stored in Redis
+    """
+    categories = Config.DEFAULT_CATEGORIES
+    return {
+        "id": str(restaurant_id),
+        "name": f"Benchmark Restaurant {restaurant_id}",
+        "categories": json.dumps([categories[restaurant_id % len(categories)]]),
+        "distance": Config.VALID_DISTANCES[restaurant_id % len(Config.VALID_DISTANCES)],
+        "closed_days": json.dumps([restaurant_id % 7]),
+        "added_by": "bench",
+        "added_at": datetime.utcnow().isoformat(),
+        "is_active": "1",
+        "place_id": f"bench-place-{restaurant_id}",
+        "phone": "(555) 555-0100",
+        "address": f"{restaurant_id} Main St",
+        "website": "https://example.com",
+        "google_distance": str(500 + restaurant_id % 20000),
+        "eta": str(2 + restaurant_id % 40)
+    }
+
+
+def seed_restaurants(client, count):
+    """
+    Seed restaurant hashes and their index sets with pipelined writes
+
+    Args:
+        client (redis.Redis): Redis client
+        count (int): Number of restaurants to create
+
+    Returns:
+        list: Seeded restaurant IDs
+    """
+    ids = list(range(1, count + 1))
+    pipe = client.pipeline(transaction=False)
+    for restaurant_id in ids:
+        data = make_restaurant(restaurant_id)
+        pipe.hset(f"restaurants:{restaurant_id}", mapping=data)
+        pipe.sadd("restaurants:index", restaurant_id)
+        for category in json.loads(data["categories"]):
+            pipe.sadd(f"restaurants:by_category:{category}", restaurant_id)
+        pipe.sadd(f"restaurants:by_distance:{data['distance']}", restaurant_id)
+        if len(pipe) >= 5000:
+            pipe.execute()
+    pipe.execute()
+    client.set("restaurants:counter", count)
+    return [str(restaurant_id) for restaurant_id in ids]
+
+
+def timed(func, repeat=5):
+    """
+    Run a callable several times and report the best and median wall time
+
+    Args:
+        func (callable): Function to time
+        repeat (int): Number of runs
+
+    Returns:
+        tuple: (best_ms, median_ms)
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[0], samples[len(samples) // 2]
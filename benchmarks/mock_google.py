@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Google Places / Distance Matrix endpoints used by the
+benchmarks. Serves canned JSON over HTTP/1.1 keep-alive; connect_delay_ms
+sleeps once per new connection to model the TCP + TLS handshake to Google,
+response_delay_ms sleeps on every request to model server time.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class MockGoogleServer:
+    """Threaded mock server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, connect_delay_ms=0, response_delay_ms=0):
+        """
+        Initialize the server (binds a free port on 127.0.0.1)
+
+        Args:
+            connect_delay_ms (float): Delay added to every new connection
+            response_delay_ms (float): Delay added to every request
+        """
+        self.connect_delay = connect_delay_ms / 1000
+        self.response_delay = response_delay_ms / 1000
+        self.connections = 0
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Maps API root to pass as GooglePlacesService(api_base_url=...)"""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/maps/api"
+
+    def start(self):
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle hold the body
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with mock._lock:
+                    mock.connections += 1
+                if mock.connect_delay:
+                    time.sleep(mock.connect_delay)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                mock._count(url.path)
+                if mock.response_delay:
+                    time.sleep(mock.response_delay)
+
+                body = json.dumps(mock_response(url.path, params)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def mock_response(path, params):
+    """
+    Build the canned API answer for a request
+
+    Args:
+        path (str): Request path (e.g. /maps/api/place/textsearch/json)
+        params (dict): Query parameters
+
+    Returns:
+        dict: JSON body in the Google API format
+    """
+    if path.endswith('/place/textsearch/json'):
+        return {
+            "status": "OK",
+            "results": [{
+                "place_id": f"mock-place-{i}",
+                "name": f"{params.get('query', 'Mock')} {i}",
+                "formatted_address": f"{i} Main St",
+                "geometry": {"location": {"lat": 40.0 + i * 0.01, "lng": -75.0}}
+            } for i in range(10)]
+        }
+
+    if path.endswith('/place/details/json'):
+        place_id = params.get('place_id', '')
+        index = int(place_id.rsplit('-', 1)[-1]) if place_id.rsplit('-', 1)[-1].isdigit() else 0
+        return {
+            "status": "OK",
+            "result": {
+                "name": f"Mock {place_id}",
+                "formatted_phone_number": "(555) 555-0100",
+                "formatted_address": f"{index} Main St",
+                "website": "https://example.com",
+                "url": "https://maps.example.com",
+                "geometry": {"location": {"lat": 40.0 + index * 0.01, "lng": -75.0}}
+            }
+        }
+
+    if path.endswith('/distancematrix/json'):
+        destinations = params.get('destinations', '').split('|')
+        return {
+            "status": "OK",
+            "rows": [{"elements": [{
+                "status": "OK",
+                "distance": {"value": 1000 + 250 * i},
+                "duration": {"value": 300 + 60 * i}
+            } for i in range(len(destinations))]}]
+        }
+
+    return {"status": "INVALID_REQUEST"}
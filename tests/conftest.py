@@ -0,0 +1,38 @@
+import pytest
+
+from app.config import Config
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client():
+    """Decoding in-memory Redis (Lua scripts need the lupa package)"""
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def model(redis_client, tmp_path, monkeypatch):
+    """RestaurantModel writing its backups and journal to a temporary directory"""
+    from app.models import RestaurantModel
+
+    monkeypatch.setattr(Config, "BACKUP_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "SPIN_TIMEOUT_SECONDS", 0)
+    return RestaurantModel(redis_client)
+
+
+@pytest.fixture
+def client(model, redis_client):
+    """API test client on the model's Redis, signed in as user tester"""
+    flask = pytest.importorskip("flask")
+    from app.routes import api
+
+    app = flask.Flask(__name__)
+    app.redis = redis_client
+    app.backup_worker = None
+    app.catalog_cache = None
+    app.rate_limits = {}
+    app.register_blueprint(api)
+    client = app.test_client()
+    client.set_cookie(Config.COOKIE_NAME, "tester")
+    return client
@@ -0,0 +1,93 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.config import Config
+from app.journal import BackupJournal, LATEST_SNAPSHOT_FILENAME, replace_latest_snapshot, snapshot_timestamp
+from app.models import RestaurantModel
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def restored_names(backup_dir):
+    """Restore latest snapshot + journal into an empty Redis and list the restaurant names"""
+    model = RestaurantModel(fakeredis.FakeRedis(decode_responses=True))
+    model.restore_from_file(os.path.join(backup_dir, LATEST_SNAPSHOT_FILENAME))
+    return sorted(r["name"] for r in model.get_all(active_only=False))
+
+
+def test_overlapping_writers_keep_newest_snapshot_and_journal(model, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BACKUP_RETENTION_COUNT", 0)
+    model.create("Before", ["takeout"], "nearby", "tester")
+
+    # Writer A is slow to read the catalog; B snapshots and a mutation lands meanwhile
+    slow = RestaurantModel(model.redis)
+    reading = threading.Event()
+    get_many = slow.get_many
+
+    def slow_get_many(*args, **kwargs):
+        reading.set()
+        time.sleep(0.3)
+        return get_many(*args, **kwargs)
+
+    monkeypatch.setattr(slow, "get_many", slow_get_many)
+    writer_a = threading.Thread(target=slow.backup_to_file)
+    writer_a.start()
+    reading.wait(5)
+
+    mutation = threading.Thread(target=model.create, args=("During", ["takeout"], "nearby", "tester"))
+    writer_b = threading.Thread(target=RestaurantModel(model.redis).backup_to_file)
+    mutation.start()
+    writer_b.start()
+    for thread in (writer_a, mutation, writer_b):
+        thread.join(10)
+
+    latest = os.path.join(tmp_path, LATEST_SNAPSHOT_FILENAME)
+    with open(latest) as f:
+        json.load(f)
+    assert not glob.glob(os.path.join(tmp_path, "*.tmp"))
+    assert restored_names(str(tmp_path)) == ["Before", "During"]
+
+
+def test_older_snapshot_never_replaces_latest(tmp_path):
+    newer = {"timestamp": "2026-01-02T00:00:00", "restaurants": [], "custom_categories": []}
+    older = {"timestamp": "2026-01-01T00:00:00", "restaurants": [{"id": "1"}], "custom_categories": []}
+
+    assert replace_latest_snapshot(str(tmp_path), newer) is True
+    assert replace_latest_snapshot(str(tmp_path), older) is False
+    assert snapshot_timestamp(os.path.join(tmp_path, LATEST_SNAPSHOT_FILENAME)) == newer["timestamp"]
+
+
+def test_weights_survive_backup_and_journal_replay(model, tmp_path):
+    class IdleWorker:
+        def notify(self, event):
+            pass
+
+    heavy = model.create("Heavy", ["takeout"], "nearby", "tester")["id"]
+    light = model.create("Light", ["takeout"], "nearby", "tester")["id"]
+    # Without a background writer the weight is compacted into the snapshot right away
+    model.set_weight(heavy, 2.5)
+    # With an idle writer it only reaches the journal, replayed on restore
+    RestaurantModel(model.redis, backup_worker=IdleWorker()).set_weight(light, 0)
+
+    restored = RestaurantModel(fakeredis.FakeRedis(decode_responses=True))
+    restored.restore_from_file(os.path.join(tmp_path, LATEST_SNAPSHOT_FILENAME))
+    assert restored.get_weights() == {heavy: 2.5, light: 0}
+
+
+def test_soft_deleted_restaurants_survive_backup_and_restore(model, tmp_path):
+    kept = model.create("Kept", ["takeout"], "nearby", "tester")["id"]
+    removed = model.create("Removed", ["takeout"], "far", "tester")["id"]
+    # Without a background writer the delete is compacted into the snapshot right away
+    assert model.delete(removed, "tester")
+    assert list(BackupJournal(str(tmp_path)).entries()) == []
+
+    restored = RestaurantModel(fakeredis.FakeRedis(decode_responses=True))
+    restored.restore_from_file(os.path.join(tmp_path, LATEST_SNAPSHOT_FILENAME))
+    assert [r["name"] for r in restored.get_all()] == ["Kept"]
+    assert restored.get(removed)["is_active"] == "0"
+    assert restored.get(kept)["is_active"] == "1"
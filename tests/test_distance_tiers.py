@@ -0,0 +1,85 @@
+import pytest
+
+from app.config import Config
+
+
+@pytest.fixture(autouse=True)
+def auto_tiers(monkeypatch):
+    monkeypatch.setattr(Config, "DISTANCE_TIERS_AUTO", True)
+    monkeypatch.setattr(Config, "DISTANCE_TIER_BASIS", "meters")
+    monkeypatch.setattr(Config, "DISTANCE_TIER_METERS", [8047, 16093, 32187])
+
+
+def level_of(model, redis_client, restaurant_id):
+    level = model.get(restaurant_id)["distance"]
+    assert redis_client.sismember(f"restaurants:by_distance:{level}", restaurant_id)
+    return level
+
+
+def test_explicit_distance_survives_create_and_update(model, redis_client):
+    # 40 km of driving would classify as "far"
+    restaurant = model.create("Picked", ["takeout"], "nearby", "tester", google_distance="40000", eta="30")
+    rid = restaurant["id"]
+    assert level_of(model, redis_client, rid) == "nearby"
+
+    model.update(rid, distance="short-drive", google_distance="40000", eta="30")
+    assert level_of(model, redis_client, rid) == "short-drive"
+
+    model.update(rid, google_distance="45000")
+    model.apply_driving_data({rid: {"distance": 45000, "duration": 35}})
+    model.reindex_distance_tiers()
+    assert level_of(model, redis_client, rid) == "short-drive"
+
+
+def test_missing_distance_is_classified(model, redis_client):
+    rid = model.create("Auto", ["takeout"], None, "tester", google_distance="40000", eta="30")["id"]
+    assert level_of(model, redis_client, rid) == "far"
+
+    model.update(rid, google_distance="1000")
+    assert level_of(model, redis_client, rid) == "nearby"
+
+    model.apply_driving_data({rid: {"distance": 12000, "duration": 15}})
+    assert level_of(model, redis_client, rid) == "short-drive"
+
+
+def test_missing_distance_without_driving_data_uses_default(model, redis_client):
+    rid = model.create("Unknown", ["takeout"], None, "tester")["id"]
+    assert level_of(model, redis_client, rid) == Config.DEFAULT_DISTANCE
+
+
+def form_payload(**overrides):
+    """Body the add/edit forms send: distance always comes from the (pre-selected) dropdown"""
+    payload = {
+        "name": "Form Place", "categories": ["takeout"], "distance": "far", "closed_days": [],
+        "place_id": "abc", "phone": "", "address": "", "website": "",
+        "google_distance": "40000", "eta": "30", "lat": "", "lng": ""
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.parametrize("flagged", [False, True])
+def test_form_added_restaurant_stays_auto_after_rename(client, redis_client, flagged):
+    extra = {"distance_auto": True} if flagged else {}
+    rid = client.post("/api/restaurants", json=form_payload(**extra)).get_json()["restaurant"]["id"]
+    assert redis_client.hget(f"restaurants:{rid}", "distance_source") == "auto"
+
+    response = client.put(f"/api/restaurants/{rid}", json=form_payload(name="Renamed", **extra))
+    assert response.status_code == 200
+    assert redis_client.hmget(f"restaurants:{rid}", "name", "distance_source") == ["Renamed", "auto"]
+
+    # Still reclassified when its driving data changes
+    client.put(f"/api/restaurants/{rid}", json=form_payload(name="Renamed", google_distance="1000", **extra))
+    assert redis_client.hget(f"restaurants:{rid}", "distance") == "nearby"
+
+
+def test_form_pick_that_differs_from_the_classification_is_manual(client, redis_client):
+    rid = client.post("/api/restaurants", json=form_payload()).get_json()["restaurant"]["id"]
+
+    client.put(f"/api/restaurants/{rid}", json=form_payload(distance="short-drive"))
+    assert redis_client.hmget(f"restaurants:{rid}", "distance", "distance_source") == ["short-drive", "manual"]
+
+    # Renaming afterwards keeps the pick
+    client.put(f"/api/restaurants/{rid}", json=form_payload(name="Renamed", distance="short-drive",
+                                                             google_distance="1000"))
+    assert redis_client.hmget(f"restaurants:{rid}", "distance", "distance_source") == ["short-drive", "manual"]
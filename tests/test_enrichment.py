@@ -0,0 +1,54 @@
+from app.enrichment import refresh_driving_data
+from app.google_places import GooglePlacesService
+from app.places_cache import PlacesCache
+
+
+def test_refresh_bypasses_distance_cache(model, redis_client, monkeypatch):
+    cache = PlacesCache(redis_client, 86400, 3600, 16, 60)
+    service = GooglePlacesService("key", "40.0,-75.0", 5000, cache=cache)
+    fetched = []
+
+    def fake_matrix(destinations):
+        fetched.append(destinations)
+        return [{"distance": 1000 * len(fetched), "duration": 5} for _ in destinations]
+
+    monkeypatch.setattr(service, "_fetch_distance_matrix", fake_matrix)
+    rid = model.create("Cached", ["takeout"], "nearby", "tester", place_id="place-1")["id"]
+
+    # Warm the cache, as a search or add earlier that day would
+    assert service.get_driving_distances([{"place_id": "place-1"}])["place-1"]["distance"] == 1000
+    assert service.get_driving_distances([{"place_id": "place-1"}])["place-1"]["distance"] == 1000
+    assert len(fetched) == 1
+
+    stats = refresh_driving_data(model, service, max_age_seconds=0, pause_seconds=0)
+    assert stats["refreshed"] == 1
+    assert len(fetched) == 2
+    assert model.get(rid)["google_distance"] == "2000"
+
+
+def test_failed_lookups_back_off_instead_of_starving_the_rest(model, monkeypatch):
+    service = GooglePlacesService("key", "40.0,-75.0", 5000)
+
+    def fake_matrix(destinations):
+        # "place-bad" has no route
+        return [None if "place-bad" in str(d) else {"distance": 1000, "duration": 5} for d in destinations]
+
+    monkeypatch.setattr(service, "_fetch_distance_matrix", fake_matrix)
+    bad = model.create("No Route", ["takeout"], "nearby", "tester", place_id="place-bad")["id"]
+    good = model.create("Fine", ["takeout"], "nearby", "tester", place_id="place-good")["id"]
+
+    # Never-tried restaurants come first; the failure is stamped
+    stats = refresh_driving_data(model, service, max_age_seconds=0, pause_seconds=0, limit=1,
+                                 retry_after_seconds=3600)
+    assert (stats["refreshed"], stats["failed"]) == (0, 1)
+    assert model.redis.hget(f"restaurants:{bad}", "driving_attempted_at")
+
+    # The next limited run reaches the healthy restaurant and skips the backed-off one
+    assert model.find_stale_driving_data(0, retry_after_seconds=3600) == [(good, "place-good")]
+    stats = refresh_driving_data(model, service, max_age_seconds=0, pause_seconds=0, limit=1,
+                                 retry_after_seconds=3600)
+    assert stats["refreshed"] == 1
+    assert model.get(good)["google_distance"] == "1000"
+
+    # Once the back-off is over it is tried again, least recently tried first
+    assert [rid for rid, _ in model.find_stale_driving_data(0)] == [bad, good]
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+
+def spin_times(model, count):
+    """Spin count times and return the spins' naive UTC times, oldest first"""
+    # Two restaurants: the last spin is excluded from the next one
+    model.create("First", ["takeout"], "nearby", "tester")
+    model.create("Second", ["takeout"], "nearby", "tester")
+    times = []
+    for _ in range(count):
+        entry_id = model.spin("tester")["entry_id"]
+        times.append(datetime.fromisoformat(model.redis.hget(f"history:entry:{entry_id}", "timestamp")))
+    return times
+
+
+def test_history_since_uses_the_spin_time(model):
+    times = spin_times(model, 3)
+
+    assert [e["timestamp"] for e in model.get_history_since(times[1])] == \
+           [times[2].isoformat(), times[1].isoformat()]
+    assert len(model.get_history_since(times[0] - timedelta(minutes=1))) == 3
+    assert model.get_history_since(times[2] + timedelta(seconds=1)) == []
+    assert [e["timestamp"] for e in model.get_history_since(times[0], limit=1)] == [times[2].isoformat()]
+
+
+def test_history_endpoint_accepts_since(model, client):
+    times = spin_times(model, 2)
+
+    response = client.get(f"/api/history?since={times[1].isoformat()}Z")
+    assert response.status_code == 200
+    assert [e["timestamp"] for e in response.get_json()["history"]] == [times[1].isoformat()]
+    assert response.headers["ETag"]
+
+    assert client.get("/api/history?since=yesterday").status_code == 400
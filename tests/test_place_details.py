@@ -0,0 +1,35 @@
+import pytest
+
+from app.config import Config
+
+
+class RecordingService:
+    """Places service stub recording the coordinates it was given"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_place_details(self, place_id, lat=None, lng=None):
+        self.calls.append((place_id, lat, lng))
+        return {"name": "Somewhere", "distance": "1000", "eta": "5"}
+
+
+@pytest.fixture
+def service(client, monkeypatch):
+    monkeypatch.setattr(Config, "GOOGLE_PLACES_ENABLED", True)
+    monkeypatch.setattr(Config, "GOOGLE_PLACES_API_KEY", "key")
+    client.application.places_service = RecordingService()
+    return client.application.places_service
+
+
+@pytest.mark.parametrize("query", ["lat=nan&lng=-75", "lat=40&lng=inf", "lat=-inf&lng=-75"])
+def test_non_finite_coordinates_are_rejected(client, service, query):
+    response = client.get(f"/api/places/details/abc?{query}")
+    assert response.status_code == 400
+    assert service.calls == []
+
+
+def test_finite_coordinates_are_passed_on(client, service):
+    response = client.get("/api/places/details/abc?lat=40.5&lng=-75.25")
+    assert response.status_code == 200
+    assert service.calls == [("abc", 40.5, -75.25)]
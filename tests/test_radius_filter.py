@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from app.config import Config
+from app.models import RestaurantModel
+
+HOME = (40.0, -75.0)
+RESTAURANT = (45.0, -62.0)
+
+
+@pytest.fixture
+def located(model, redis_client, monkeypatch):
+    """One restaurant with coordinates and the straight-line radius that just reaches it"""
+    monkeypatch.setattr(Config, "GOOGLE_PLACES_LOCATION", f"{HOME[0]},{HOME[1]}")
+    model.create("Far Away", ["takeout"], "far", "tester", lat=RESTAURANT[0], lng=RESTAURANT[1])
+    redis_client.geoadd("test:geo", [HOME[1], HOME[0], "home", RESTAURANT[1], RESTAURANT[0], "restaurant"])
+    return redis_client.geodist("test:geo", "home", "restaurant")
+
+
+@pytest.mark.parametrize("with_cache", [False, True])
+def test_close_radii_do_not_share_results(located, model, redis_client, with_cache):
+    from app.cache import CatalogCache
+
+    inside, outside = located + 0.5, located - 0.5
+    # Both radii round to the same %g string but must not share temporary sets
+    assert f"{inside:g}" == f"{outside:g}"
+    assert model._geo_filter_key(inside) != model._geo_filter_key(outside)
+    assert model._filter_sources("takeout", within_m=inside)[3] != model._filter_sources("takeout", within_m=outside)[3]
+
+    if with_cache:
+        model = RestaurantModel(redis_client, catalog_cache=CatalogCache(16, 16))
+    assert [r["name"] for r in model.get_all(within_m=inside)] == ["Far Away"]
+    assert model.get_all(within_m=outside) == []
+    assert [r["name"] for r in model.get_all(within_m=inside)] == ["Far Away"]
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("40.0,-75.0", (40.0, -75.0)),
+    (" 40.0 , -75.0 ", (40.0, -75.0)),
+    ("", None),
+    ("40.0", None),
+    ("40.0,-75.0,3", None),
+    ("nan,-75.0", None),
+    ("40.0,inf", None),
+])
+def test_home_coordinates(monkeypatch, location, expected):
+    monkeypatch.setattr(Config, "GOOGLE_PLACES_LOCATION", location)
+    assert RestaurantModel._home_coordinates() == expected
+
+
+@pytest.mark.parametrize("lat, lng", [("nan", "0"), ("0", "inf"), (math.nan, 0.0), ("-inf", "1")])
+def test_non_finite_coordinates_are_rejected(lat, lng):
+    assert RestaurantModel._parse_coordinates(lat, lng, strict=False) is None
+    with pytest.raises(ValueError):
+        RestaurantModel._parse_coordinates(lat, lng)
@@ -0,0 +1,52 @@
+import pytest
+
+from app.config import Config
+from app.rate_limit import parse_rate_limits, rate_limited
+
+flask = pytest.importorskip("flask")
+
+
+class Budgets:
+    RATE_LIMIT_ADD_RESTAURANT = "2/60"
+    RATE_LIMIT_ADD_CATEGORY = ""
+
+
+@pytest.fixture
+def app(redis_client):
+    app = flask.Flask(__name__)
+    app.redis = redis_client
+    app.rate_limits = parse_rate_limits(Budgets)
+
+    @app.route("/add", methods=["POST"])
+    @rate_limited("add_restaurant")
+    def add():
+        return {"success": True}, 201
+
+    @app.route("/category", methods=["POST"])
+    @rate_limited("add_category")
+    def add_category():
+        return {"success": True}, 201
+
+    return app
+
+
+def test_budgets_are_parsed_once_per_action():
+    assert parse_rate_limits(Budgets) == {"add_restaurant": (2, 60.0), "add_category": None}
+
+
+def test_malformed_budget_fails_at_startup():
+    class Malformed:
+        RATE_LIMIT_ADD_RESTAURANT = "20 per hour"
+
+    with pytest.raises(ValueError, match="RATE_LIMIT|20 per hour"):
+        parse_rate_limits(Malformed)
+
+
+def test_decorator_uses_the_parsed_budget(app, monkeypatch):
+    # Changing Config after startup has no effect; the app keeps what it parsed
+    monkeypatch.setattr(Config, "RATE_LIMIT_ADD_RESTAURANT", "not a budget", raising=False)
+    client = app.test_client()
+    client.set_cookie(Config.COOKIE_NAME, "tester")
+
+    assert [client.post("/add").status_code for _ in range(3)] == [201, 201, 429]
+    assert [client.post("/category").status_code for _ in range(3)] == [201, 201, 201]
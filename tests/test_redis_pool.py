@@ -0,0 +1,37 @@
+import socket
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.redis_pool import InstrumentedConnectionPool
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_exhausted_pool_counts_a_wait_timeout():
+    pool = InstrumentedConnectionPool(
+        max_connections=1, timeout=0.05,
+        connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer()
+    )
+    connection = pool.get_connection("PING")
+    with pytest.raises(ConnectionError, match="No connection available"):
+        pool.get_connection("PING")
+    pool.release(connection)
+
+    stats = pool.stats()
+    assert (stats["waits"], stats["wait_timeouts"], stats["connect_errors"]) == (1, 1, 0)
+
+
+def test_connect_failure_is_not_a_wait_timeout():
+    pool = InstrumentedConnectionPool(max_connections=1, timeout=0.05, host="127.0.0.1", port=unused_port())
+    with pytest.raises(ConnectionError):
+        pool.get_connection("PING")
+
+    stats = pool.stats()
+    assert (stats["waits"], stats["wait_timeouts"], stats["connect_errors"]) == (0, 0, 1)
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from app.config import Config
+
+
+@pytest.fixture
+def pool(model, monkeypatch):
+    """Four takeout restaurants open today, one closed today, one of another category"""
+    monkeypatch.setattr(Config, "EAT_AT_HOME_ENABLED", True)
+    monkeypatch.setattr(Config, "EAT_AT_HOME_WEIGHT", 2)
+    monkeypatch.setattr(Config, "EAT_AT_HOME_EXCLUDED_DAYS", [])
+    monkeypatch.setattr(Config, "EAT_AT_HOME_IGNORE_RECENT_SPIN", False)
+
+    today = model._current_day()
+    for i in range(4):
+        model.create(f"Open {i}", ["takeout"], "nearby", "tester")
+    model.create("Closed", ["takeout"], "nearby", "tester", closed_days=[today])
+    model.create("Other", ["sit-down"], "nearby", "tester")
+    return model
+
+
+def spin_with_draw(model, monkeypatch, draw):
+    monkeypatch.setattr(random, "random", lambda: draw)
+    result = model.spin("tester", category="takeout")
+    assert result["status"] == "ok"
+    return result["restaurant"]["name"]
+
+
+def test_stats_match_spin_pool(pool):
+    stats = pool.get_randomization_stats(category="takeout")
+
+    assert stats["restaurant_count"] == 4
+    assert stats["eat_at_home_count"] == 2
+    assert stats["total_pool_size"] == 6
+    assert stats["closed_today"] == ["Closed"]
+    assert stats == {**pool.get_randomization_stats(category="takeout", aggregate_only=True),
+                     "items": stats["items"], "closed_today": stats["closed_today"]}
+
+
+def test_spin_draws_from_the_stats_pool(pool, monkeypatch):
+    for _ in range(6):
+        stats = pool.get_randomization_stats(category="takeout")
+        pool_names = {item["name"] for item in stats["items"] if not item["excluded"]}
+        boundary = stats["restaurant_count"] / stats["total_pool_size"]
+
+        # Draws below the restaurants' share pick a restaurant, the rest "Eat at Home"
+        winner = spin_with_draw(pool, monkeypatch, boundary - 1e-9)
+        assert winner in pool_names - {Config.EAT_AT_HOME_NAME}
+        assert winner != stats["excluded"]
+
+        stats = pool.get_randomization_stats(category="takeout")
+        assert stats["excluded"] == winner
+        assert stats["restaurant_count"] == 3
+        winner = spin_with_draw(pool, monkeypatch, stats["restaurant_count"] / stats["total_pool_size"])
+        assert winner == Config.EAT_AT_HOME_NAME
+
+
+def test_recent_eat_at_home_spin_is_excluded_from_both(pool, monkeypatch):
+    assert spin_with_draw(pool, monkeypatch, 0.99) == Config.EAT_AT_HOME_NAME
+
+    stats = pool.get_randomization_stats(category="takeout")
+    assert stats["eat_at_home_count"] == 0
+    assert stats["items"][0]["excluded"] is True
+
+    # With "Eat at Home" weighing nothing, even the highest draw picks a restaurant
+    assert spin_with_draw(pool, monkeypatch, 0.99) != Config.EAT_AT_HOME_NAME
+
+
+def test_restaurant_weights_shape_stats_and_spin(pool, monkeypatch):
+    ids = {r["name"]: r["id"] for r in pool.get_all(category="takeout")}
+    assert pool.set_weight(ids["Open 0"], 3)
+    assert pool.set_weight(ids["Open 1"], 0)
+    assert pool.get_weights() == {ids["Open 0"]: 3, ids["Open 1"]: 0}
+
+    stats = pool.get_randomization_stats(category="takeout")
+    assert (stats["restaurant_count"], stats["restaurant_weight"], stats["total_pool_size"]) == (4, 5, 7)
+    counts = {item["name"]: item["count"] for item in stats["items"]}
+    assert counts == {"Open 0": 3, "Open 1": 0, "Open 2": 1, "Open 3": 1, Config.EAT_AT_HOME_NAME: 2}
+
+    # Evenly spread draws land on each entry in proportion to its weight
+    wins = {}
+    for k in range(70):
+        pool.redis.delete("history:index")
+        winner = spin_with_draw(pool, monkeypatch, (k + 0.5) / 70)
+        wins[winner] = wins.get(winner, 0) + 1
+    assert wins.get("Open 1", 0) == 0
+    assert wins["Open 0"] == 30
+    assert wins.get("Open 2", 0) + wins.get("Open 3", 0) == 20
+    assert wins[Config.EAT_AT_HOME_NAME] == 20
+
+    # Back to the default weight drops the entry
+    assert pool.set_weight(ids["Open 0"], 1)
+    assert pool.get_weights() == {ids["Open 1"]: 0}
+
+
+@pytest.mark.parametrize("weight", [-1, "nan", "inf", "heavy"])
+def test_invalid_weights_are_rejected(pool, weight):
+    rid = pool.get_all(category="takeout")[0]["id"]
+    with pytest.raises(ValueError):
+        pool.set_weight(rid, weight)
+    assert pool.set_weight("missing", 2) is False